@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.service import _group_hotels_by_property, _rank_hotel_groups  # noqa: E402
+
+
+def build_cards(count: int, providers: int, seed: int = 7) -> list[dict[str, Any]]:
+    rng = random.Random(seed)
+    properties = max(1, count // providers)
+    cards: list[dict[str, Any]] = []
+    for idx in range(count):
+        property_idx = rng.randrange(properties)
+        provider = f"provider{idx % providers}"
+        hotel_id = f"{provider}:hotel_{property_idx}"
+        price = None if rng.random() < 0.05 else round(rng.uniform(80, 900), 2)
+        cards.append(
+            {
+                "hotel_id": hotel_id,
+                "property_id": f"prop_bench_{property_idx}",
+                "provider_ids": [hotel_id],
+                "name": f"Bench Hotel {property_idx}",
+                "availability_status": "available" if price is not None else "unavailable",
+                "thumbnail_url": "https://images.unsplash.com/photo-1514924013411-cbf25faa35bb",
+                "price_preview": {"from_total": price, "currency": "USD"},
+                "top_offers": [],
+            }
+        )
+    return cards
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark compare_hotels grouping and ranking.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--providers", type=int, default=4)
+    parser.add_argument("--top", type=int, default=8, help="Ranked items kept (compare_hotels max_hotels).")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        cards = build_cards(size, args.providers)
+        best = float("inf")
+        groups = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            groups = _group_hotels_by_property(cards)
+            _rank_hotel_groups(groups, limit=args.top)
+            best = min(best, time.perf_counter() - started)
+        print(f"cards={size} groups={len(groups)} top={args.top} best_ms={best * 1e3:.2f} us_per_card={best / size * 1e6:.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.models import (  # noqa: E402
+    HotelCard,
+    Offer,
+    PricePreview,
+    hotel_card_payload,
+    offer_payload,
+    price_preview_payload,
+)
+
+IMAGE_URLS = [f"https://images.unsplash.com/photo-{idx}.jpg" for idx in range(5)]
+
+
+def card_fields(idx: int, offers: int) -> dict[str, Any]:
+    return {
+        "hotel_id": f"sigtrip:Bench_Hotel_{idx}",
+        "property_id": f"prop_bench_{idx}",
+        "provider_ids": [f"sigtrip:Bench_Hotel_{idx}"],
+        "name": f"Bench Hotel {idx}",
+        "location": "Denver",
+        "location_details": {"city": "Denver", "country_code": "US"},
+        "description": "Bench property.",
+        "amenities": ["wifi", "gym"],
+        "rating": {"stars": 4},
+        "booking_capabilities": {"instant_confirmation": True},
+        "thumbnail_url": IMAGE_URLS[0],
+        "image_urls": IMAGE_URLS,
+        "availability_status": "available",
+        "image_source": "upstream",
+        "pricing_source": "upstream",
+        "distance_km": 1.25,
+        "_offers": [
+            {"offer_id": f"sigtrip:Bench_Hotel_{idx}:R{n}", "room_type": f"R{n}", "room_name": "Room", "total_amount": 100.0 + n, "currency": "USD"}
+            for n in range(offers)
+        ],
+    }
+
+
+def validated(fields: dict[str, Any]) -> dict[str, Any]:
+    offers = [Offer(**offer) for offer in fields["_offers"]]
+    preview = PricePreview(from_total=offers[0].total_amount, currency="USD") if offers else PricePreview()
+    rest = {key: value for key, value in fields.items() if key != "_offers"}
+    return HotelCard(**rest, price_preview=preview, top_offers=offers).model_dump(mode="json")
+
+
+def trusted(fields: dict[str, Any]) -> dict[str, Any]:
+    offers = [offer_payload(**offer) for offer in fields["_offers"]]
+    preview = price_preview_payload(from_total=offers[0]["total_amount"], currency="USD") if offers else price_preview_payload()
+    rest = {key: value for key, value in fields.items() if key != "_offers"}
+    return hotel_card_payload(**rest, price_preview=preview, top_offers=offers)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark per-card build plus JSON dump: validated models vs trusted payloads.")
+    parser.add_argument("--cards", type=int, default=2_000)
+    parser.add_argument("--offers", type=int, default=3, help="Offers per card (max_offers_per_hotel).")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = [card_fields(idx, args.offers) for idx in range(args.cards)]
+    assert validated(rows[0]) == trusted(rows[0]), "trusted payload drifted from the model dump"
+    for label, build in (("validated", validated), ("trusted", trusted)):
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            for row in rows:
+                build(row)
+            best = min(best, time.perf_counter() - started)
+        print(f"{label:<9} cards={args.cards} offers={args.offers} best_ms={best * 1e3:.2f} us_per_card={best / args.cards * 1e6:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.name_matching import TrigramIndex  # noqa: E402
+from src.property_master import _norm  # noqa: E402
+
+BRANDS = ["Club Quarters", "Grand Hyatt", "Hilton Garden Inn", "Marriott", "Holiday Inn Express", "The Rally", "Ace", "Kimpton"]
+AREAS = ["Grand Central", "Union Square", "Downtown", "Airport", "Riverside", "Old Town", "Harbor", "Midtown", "Station"]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark city-scoped trigram property matching.")
+    parser.add_argument("--properties", type=int, default=50_000)
+    parser.add_argument("--cities", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=5_000)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    names_by_city: dict[int, list[str]] = {}
+    for idx in range(args.properties):
+        city = rng.randrange(args.cities)
+        names_by_city.setdefault(city, []).append(f"{rng.choice(BRANDS)} {rng.choice(AREAS)} {idx}")
+
+    started = time.perf_counter()
+    indexes = {
+        city: TrigramIndex((_norm(name), f"prop_{city}_{slot}") for slot, name in enumerate(names))
+        for city, names in names_by_city.items()
+    }
+    build_s = time.perf_counter() - started
+
+    cities = list(names_by_city)
+    queries = []
+    for _ in range(args.queries):
+        city = rng.choice(cities)
+        name = rng.choice(names_by_city[city])
+        queries.append((city, _norm(name.replace(" ", " Hotel, ", 1))))
+
+    started = time.perf_counter()
+    for city, query in queries:
+        indexes[city].search(query, min_score=0.35)
+    search_s = time.perf_counter() - started
+
+    print(f"properties={args.properties} cities={args.cities} build_ms={build_s * 1e3:.1f}")
+    print(f"queries={args.queries} us_per_query={search_s / args.queries * 1e6:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.service import _parse_natural_query, _parse_query_tokens  # noqa: E402
+
+# Phrasings collected from MCP Inspector sessions and the README examples.
+QUERY_CORPUS = [
+    "Show me hotels in Denver",
+    "Find hotels in Denver for 2 guests from 2026-03-01 to 2026-03-03",
+    "Compare hotels in Denver for 2 guests",
+    "hotels in New York tomorrow",
+    "Any rooms in London next weekend for 2 adults?",
+    "I need a hotel in New York from 04/10/2026 to 04/12/2026",
+    "Compare hotels in London this weekend",
+    "Book something in Denver tonight",
+    "cheap hotel in new york 2026-05-01 - 2026-05-04 with 3 guests",
+    "denver",
+    "Where can 4 adults stay in London on 06/01/2026-06/05/2026",
+    "Show me hotels near Grand Central in New York for 1 guest",
+]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark natural-language query parsing.")
+    parser.add_argument("--rounds", type=int, default=20000, help="Parse calls per measurement.")
+    args = parser.parse_args()
+
+    def parse_corpus() -> None:
+        for query in QUERY_CORPUS:
+            _parse_natural_query(query)
+
+    def parse_corpus_cold() -> None:
+        _parse_query_tokens.cache_clear()
+        parse_corpus()
+
+    loops = max(1, args.rounds // len(QUERY_CORPUS))
+    cold = timeit.timeit(parse_corpus_cold, number=loops)
+    warm = timeit.timeit(parse_corpus, number=loops)
+    calls = loops * len(QUERY_CORPUS)
+    print(f"corpus_size={len(QUERY_CORPUS)} calls={calls}")
+    print(f"cold_us_per_query={cold / calls * 1e6:.2f}")
+    print(f"memoized_us_per_query={warm / calls * 1e6:.2f}")
+    print(f"cache={_parse_query_tokens.cache_info()}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
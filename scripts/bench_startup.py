@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# What a new replica runs before it can answer /healthz: import the entry point and build the app.
+STARTUP_CODE = "import src.server as server; server.create_app()"
+
+
+def measure(runs: int) -> tuple[list[float], dict[str, int]]:
+    """Cumulative import time (ms) per run, and self time (us) per module from the last run."""
+    totals: list[float] = []
+    self_us: dict[str, int] = {}
+    # A fixed environment, so a developer's .env or API key does not change what is measured.
+    env = {key: value for key, value in os.environ.items() if not key.startswith(("MCP_", "CACHE_", "APP_ENV"))}
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", STARTUP_CODE],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        total_us = 0
+        self_us = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_part, _cumulative, name = line.removeprefix("import time:").split("|")
+            self_us[name.strip()] = int(self_part)
+            total_us += int(self_part)
+        totals.append(total_us / 1000)
+    return totals, self_us
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Cold-start import budget for the MCP server (python -X importtime).")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to measure; the median is checked.")
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="Fail when the median import time exceeds this.")
+    parser.add_argument(
+        "--src-budget-ms", type=float, default=60.0, help="Fail when this repo's own modules (src.*) exceed this."
+    )
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules (self time) to list.")
+    args = parser.parse_args()
+
+    totals, self_us = measure(max(args.runs, 1))
+    median_ms = statistics.median(totals)
+    src_ms = sum(us for name, us in self_us.items() if name == "src" or name.startswith("src.")) / 1000
+    print(f"runs={len(totals)} import_ms_median={median_ms:.1f} import_ms_min={min(totals):.1f} src_self_ms={src_ms:.1f}")
+    for name, us in sorted(self_us.items(), key=lambda item: item[1], reverse=True)[: args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    failures = []
+    if median_ms > args.budget_ms:
+        failures.append(f"import time {median_ms:.1f}ms exceeds budget {args.budget_ms:.1f}ms")
+    if src_ms > args.src_budget_ms:
+        failures.append(f"src.* import time {src_ms:.1f}ms exceeds budget {args.src_budget_ms:.1f}ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
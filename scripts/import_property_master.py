@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.property_master import PROPERTY_MASTER, PROVIDER_TO_PROPERTY  # noqa: E402
+from src.property_store import SqlitePropertyStore, record_to_row  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bulk import property master rows into the SQLite store.")
+    parser.add_argument("files", nargs="*", help="CSV or JSONL catalog files (lists in CSV cells use '|').")
+    parser.add_argument("--db", default=os.getenv("PROPERTY_MASTER_DB_PATH"), help="SQLite path (default: PROPERTY_MASTER_DB_PATH).")
+    parser.add_argument("--seed-static", action="store_true", help="Also import the built-in PROPERTY_MASTER records.")
+    args = parser.parse_args()
+
+    if not args.db:
+        parser.error("--db or PROPERTY_MASTER_DB_PATH is required")
+
+    store = SqlitePropertyStore(args.db)
+    total = 0
+    if args.seed_static:
+        provider_ids: dict[str, list[str]] = {}
+        for provider_hotel_id, property_id in PROVIDER_TO_PROPERTY.items():
+            provider_ids.setdefault(property_id, []).append(provider_hotel_id)
+        seeded = store.import_rows(
+            record_to_row(record, provider_ids.get(property_id, ())) for property_id, record in PROPERTY_MASTER.items()
+        )
+        print(f"seeded_static={seeded}")
+        total += seeded
+
+    for file_path in args.files:
+        imported = store.import_file(file_path)
+        print(f"imported file={file_path} rows={imported}")
+        total += imported
+
+    store.close()
+    print(f"total_rows={total} db={args.db}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
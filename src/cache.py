@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import itertools
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, NamedTuple
+
+MISS = object()
+
+# One counter for every cache so a generation number is never reused for a key.
+_GENERATIONS = itertools.count(1)
+
+
+class _Entry(NamedTuple):
+    expires_at: float
+    generation: int
+    value: Any
+
+
+class Dependency(NamedTuple):
+    cache: TtlCache
+    key: Any
+    generation: int
+
+
+class DependencySet:
+    """Cache entries read while building a response; `cacheable` drops when an input could not be cached."""
+
+    def __init__(self) -> None:
+        self.entries: list[Dependency] = []
+        self.cacheable = True
+
+    def current(self) -> bool:
+        return all(dep.cache.generation(dep.key) == dep.generation for dep in self.entries)
+
+
+_ACTIVE: ContextVar[DependencySet | None] = ContextVar("cache_dependencies", default=None)
+
+
+@contextmanager
+def record_dependencies() -> Iterator[DependencySet]:
+    """Collect every TtlCache entry read or stored in this context (including across awaits)."""
+    deps = DependencySet()
+    token = _ACTIVE.set(deps)
+    try:
+        yield deps
+    finally:
+        _ACTIVE.reset(token)
+        # Nested recorders (compare -> search) feed their inputs to the enclosing one.
+        outer = _ACTIVE.get()
+        if outer is not None:
+            outer.entries.extend(deps.entries)
+            outer.cacheable = outer.cacheable and deps.cacheable
+
+
+def mark_uncacheable() -> None:
+    deps = _ACTIVE.get()
+    if deps is not None:
+        deps.cacheable = False
+
+
+class TtlCache:
+    """In-process LRU with per-entry TTL; each store gets a fresh generation number."""
+
+    def __init__(self, name: str, ttl_seconds: float, maxsize: int):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._data: OrderedDict[Any, _Entry] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.maxsize > 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Any) -> Any:
+        entry = self._live_entry(key)
+        if entry is None:
+            self.misses += 1
+            return MISS
+        self._data.move_to_end(key)
+        self.hits += 1
+        _record(self, key, entry.generation)
+        return entry.value
+
+    def put(self, key: Any, value: Any, ttl_seconds: float | None = None) -> None:
+        if not self.enabled:
+            mark_uncacheable()
+            return
+        generation = next(_GENERATIONS)
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._data[key] = _Entry(time.monotonic() + ttl, generation, value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        _record(self, key, generation)
+
+    def export(self) -> list[tuple[Any, Any, float]]:
+        """(key, value, seconds left) for every live entry, least recently used first."""
+        now = time.monotonic()
+        return [(key, entry.value, entry.expires_at - now) for key, entry in self._data.items() if entry.expires_at > now]
+
+    def load(self, entries: Iterable[tuple[Any, Any, float]]) -> int:
+        """Add entries (key, value, seconds left) without replacing fresher ones; not recorded as dependencies."""
+        if not self.enabled:
+            return 0
+        now = time.monotonic()
+        loaded = 0
+        # Loaded entries go in behind the live ones (least recently used end), keeping their own order.
+        for key, value, ttl in reversed(list(entries)):
+            if ttl <= 0 or key in self._data:
+                continue
+            self._data[key] = _Entry(now + min(ttl, self.ttl_seconds), next(_GENERATIONS), value)
+            self._data.move_to_end(key, last=False)
+            loaded += 1
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return loaded
+
+    def generation(self, key: Any) -> int | None:
+        entry = self._live_entry(key)
+        return entry.generation if entry is not None else None
+
+    def invalidate(self, key: Any) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {"name": self.name, "size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+    def _live_entry(self, key: Any) -> _Entry | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+
+def _record(cache: TtlCache, key: Any, generation: int) -> None:
+    deps = _ACTIVE.get()
+    if deps is not None:
+        deps.entries.append(Dependency(cache, key, generation))
+
+
+class _ResponseEntry(NamedTuple):
+    expires_at: float
+    encoded: bytes
+    dependencies: DependencySet
+
+
+class ResponseCache:
+    """Pre-encoded tool responses, valid while every input cache entry keeps the generation it was built from."""
+
+    def __init__(self, ttl_seconds: float, maxsize: int, name: str = "responses"):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._data: OrderedDict[Any, _ResponseEntry] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.maxsize > 0
+
+    def get(self, key: Any) -> dict[str, Any] | None:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.monotonic() or not entry.dependencies.current():
+            del self._data[key]
+            self.invalidations += 1
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        outer = _ACTIVE.get()
+        if outer is not None:
+            outer.entries.extend(entry.dependencies.entries)
+        # Decoding hands every caller its own dict without rebuilding models or metadata.
+        return json.loads(entry.encoded)
+
+    def put(self, key: Any, payload: dict[str, Any], dependencies: DependencySet) -> None:
+        if not self.enabled or not dependencies.cacheable:
+            return
+        encoded = json.dumps(payload, separators=(",", ":")).encode()
+        self._data[key] = _ResponseEntry(time.monotonic() + self.ttl_seconds, encoded, dependencies)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
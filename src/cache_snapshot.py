@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import os
+import sqlite3
+import time
+from collections.abc import Sequence
+from typing import Any
+
+from src.tiered_cache import TieredCache, decode_value, encode_value
+
+# SQLite file holding the static caches (rooms, galleries, tool list) across restarts. Empty disables it.
+CACHE_SNAPSHOT_PATH = os.getenv("CACHE_SNAPSHOT_PATH", "")
+CACHE_SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("CACHE_SNAPSHOT_INTERVAL_SECONDS", "300"))
+
+_SCHEMA = """
+CREATE TABLE snapshot (
+    cache TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (cache, position)
+)
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class CacheSnapshot:
+    """Periodic on-disk copy of long-lived caches; each cache reads its part back on first use after a restart.
+
+    Every save writes a complete new file and renames it over the old one, so a reader (or a crash mid-save)
+    never sees a partial snapshot. Expiry is stored as wall-clock time: entries that expired while the
+    process was down are not restored.
+    """
+
+    def __init__(
+        self,
+        caches: Sequence[TieredCache],
+        path: str = CACHE_SNAPSHOT_PATH,
+        interval_seconds: float = CACHE_SNAPSHOT_INTERVAL_SECONDS,
+    ):
+        self.caches = list(caches)
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self.last_saved_at: float | None = None
+        self.last_saved_entries = 0
+        self._attached = False
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def attach(self) -> None:
+        """Register the lazy loaders (once); nothing is read from disk until a cache is first fetched from."""
+        if not self.enabled or self._attached:
+            return
+        self._attached = True
+        for cache in self.caches:
+            cache.restore_from(functools.partial(self.read, cache.name))
+
+    def read(self, cache_name: str) -> list[tuple[str, Any, float]]:
+        """(key, value, seconds left) for `cache_name`, least recently used first."""
+        if not self.enabled or not os.path.exists(self.path):
+            return []
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            rows = conn.execute(
+                "SELECT key, value, expires_at FROM snapshot WHERE cache = ? AND expires_at > ? ORDER BY position",
+                (cache_name, time.time()),
+            ).fetchall()
+        finally:
+            conn.close()
+        now = time.time()
+        return [(key, decode_value(value), expires_at - now) for key, value, expires_at in rows]
+
+    async def restore(self) -> None:
+        """Load every attached cache now (off the event loop) rather than on its first fetch."""
+        for cache in self.caches:
+            await cache.restore_pending()
+
+    async def save(self) -> int:
+        # A save before a cache was first used must carry its restored entries forward, not overwrite them.
+        await self.restore()
+        # Copy the live entries on the loop thread; encoding and disk I/O happen off it.
+        entries = {cache.name: cache.export() for cache in self.caches}
+        count = await asyncio.to_thread(self._write, entries)
+        self.last_saved_at = time.time()
+        self.last_saved_entries = count
+        return count
+
+    def start(self) -> asyncio.Task[None] | None:
+        if not self.enabled or self.interval_seconds <= 0 or (self._task is not None and not self._task.done()):
+            return self._task
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="cache-snapshot")
+        return self._task
+
+    async def stop(self) -> None:
+        """Cancel the periodic task and write a final snapshot."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.enabled:
+            try:
+                await self.save()
+            except Exception as exc:  # noqa: BLE001 - shutdown must not fail on a snapshot
+                logger.warning("cache_snapshot_failed", extra={"path": self.path, "error": str(exc)})
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "path": self.path or None,
+            "interval_seconds": self.interval_seconds,
+            "last_saved_at": self.last_saved_at,
+            "last_saved_entries": self.last_saved_entries,
+        }
+
+    def _write(self, entries: dict[str, list[tuple[Any, Any, float]]]) -> int:
+        now = time.time()
+        rows = [
+            (cache_name, position, key, encode_value(value), now + ttl)
+            for cache_name, items in entries.items()
+            for position, (key, value, ttl) in enumerate(items)
+            if isinstance(key, str)
+        ]
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.execute(_SCHEMA)
+            conn.executemany("INSERT INTO snapshot VALUES (?, ?, ?, ?, ?)", rows)
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_path, self.path)
+        return len(rows)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.save()
+            except Exception as exc:  # noqa: BLE001 - keep the loop alive
+                logger.warning("cache_snapshot_failed", extra={"path": self.path, "error": str(exc)})
@@ -1,29 +1,45 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import os
-from typing import Any
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, NamedTuple
+from urllib.parse import urlsplit
 
 import httpx
 
+from src import tracing
+from src.health import HealthTracker
+from src.metrics import UPSTREAM_EXHAUSTED, UPSTREAM_HEDGES, UPSTREAM_LATENCY, UPSTREAM_RETRIES, UPSTREAM_UNPARSED
+
 UPSTREAM_URL = os.getenv("MCP_PROVIDER_SIGTRIP_URL", "https://hotel.sigtrip.ai/mcp")
+# Extra endpoints serving the same upstream; each request goes to the healthiest one.
+FALLBACK_URLS = [url.strip() for url in os.getenv("MCP_PROVIDER_SIGTRIP_FALLBACK_URLS", "").split(",") if url.strip()]
+UPSTREAM_ENDPOINTS = [UPSTREAM_URL, *(url for url in FALLBACK_URLS if url != UPSTREAM_URL)]
 API_KEY = os.getenv("MCP_PROVIDER_SIGTRIP_API_KEY") or None
 REQUEST_TIMEOUT_SECONDS = float(os.getenv("SIGTRIP_TIMEOUT_SECONDS", "30"))
 RETRY_ATTEMPTS = int(os.getenv("SIGTRIP_RETRY_ATTEMPTS", "2"))
+# Opt-in request hedging: once the first request outlives the tool's p95, a second one races it.
+# Only idempotent reads qualify; booking and cancellation calls are never sent twice.
+IDEMPOTENT_READ_TOOLS = frozenset({"get_prices", "get_rooms", "view_room_gallery"})
+HEDGE_TOOLS = IDEMPOTENT_READ_TOOLS & {tool.strip() for tool in os.getenv("SIGTRIP_HEDGE_TOOLS", "").split(",")}
+HEDGE_DEFAULT_DELAY_SECONDS = float(os.getenv("SIGTRIP_HEDGE_DELAY_SECONDS", "1.0"))
+HEDGE_MIN_SAMPLES = int(os.getenv("SIGTRIP_HEDGE_MIN_SAMPLES", "20"))
+HEDGE_WINDOW_SIZE = int(os.getenv("SIGTRIP_HEDGE_WINDOW", "200"))
 
 logger = logging.getLogger(__name__)
 
+ENDPOINT_HEALTH = HealthTracker()
 
-async def call_upstream(tool_name: str, arguments: dict[str, Any]) -> dict[str, Any] | None:
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "text/event-stream, application/json",
-    }
-    if API_KEY:
-        headers["apikey"] = API_KEY
-        headers["Authorization"] = f"Bearer {API_KEY}"
 
+async def call_upstream(tool_name: str, arguments: dict[str, Any]) -> dict[str, Any] | None:
+    headers = _headers()
     payload = {
         "jsonrpc": "2.0",
         "id": 1,
@@ -34,32 +50,196 @@ async def call_upstream(tool_name: str, arguments: dict[str, Any]) -> dict[str,
         },
     }
 
+    # Retries and hedges share one budget: at most RETRY_ATTEMPTS requests beyond the first.
+    budget = RETRY_ATTEMPTS
+    sent = 0
     last_error: Exception | None = None
-    for attempt in range(RETRY_ATTEMPTS + 1):
+    while True:
+        if not _take_call():
+            logger.info("upstream_call_budget_exhausted", extra={"tool": tool_name})
+            return None
+        if sent:
+            UPSTREAM_RETRIES.labels(tool_name).inc()
+        sent += 1
+        primary = asyncio.ensure_future(_attempt(tool_name, payload, headers, sent, retry=sent > 1))
+        if tool_name in HEDGE_TOOLS and budget > 0:
+            result = await _hedged(tool_name, payload, headers, primary, sent + 1)
+            if result.hedged:
+                budget -= 1
+                sent += 1
+        else:
+            result = await primary
+        if result.done:
+            return result.data
+        last_error = result.error
+        if budget <= 0:
+            break
+        budget -= 1
+
+    UPSTREAM_EXHAUSTED.labels(tool_name).inc()
+    logger.error(
+        "upstream_call_exhausted",
+        extra={"tool": tool_name, "attempts": sent, "error": str(last_error)},
+    )
+    return None
+
+
+class _Attempt(NamedTuple):
+    # done: the upstream answered (data may still be None when the body was unparseable); no retry.
+    done: bool
+    data: dict[str, Any] | None = None
+    error: Exception | None = None
+    hedged: bool = False
+
+
+async def _attempt(
+    tool_name: str, payload: dict[str, Any], headers: dict[str, str], attempt: int, retry: bool, hedge: bool = False
+) -> _Attempt:
+    url = ENDPOINT_HEALTH.choose(UPSTREAM_ENDPOINTS)
+    started = time.perf_counter()
+    status = "error"
+    with tracing.span("upstream.call", tool=tool_name, attempt=attempt, retry=retry, hedge=hedge) as span:
         try:
-            async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT_SECONDS) as client:
-                response = await client.post(UPSTREAM_URL, json=payload, headers=headers)
-                response.raise_for_status()
-                structured = parse_upstream_response(response.text, response.headers.get("content-type", ""))
-                if structured is not None:
-                    return structured
-                logger.warning("upstream_response_unparsed", extra={"tool": tool_name})
-                return None
+            response = await _post(url, payload, headers)
+            status = str(response.status_code)
+            response.raise_for_status()
+            ENDPOINT_HEALTH.record(url, time.perf_counter() - started, ok=True)
+            _LATENCY_WINDOWS.setdefault(tool_name, _LatencyWindow()).add(time.perf_counter() - started)
+            structured = parse_upstream_response(response.text, response.headers.get("content-type", ""))
+            if structured is not None:
+                return _Attempt(done=True, data=structured)
+            UPSTREAM_UNPARSED.labels(tool_name).inc()
+            span.set_attribute("unparsed", True)
+            logger.warning("upstream_response_unparsed", extra={"tool": tool_name})
+            return _Attempt(done=True)
         except (httpx.RequestError, httpx.HTTPStatusError) as exc:
-            last_error = exc
+            if isinstance(exc, httpx.TimeoutException):
+                status = "timeout"
+            ENDPOINT_HEALTH.record(url, time.perf_counter() - started, ok=not _endpoint_fault(exc))
             logger.warning(
                 "upstream_call_failed",
-                extra={"tool": tool_name, "attempt": attempt + 1, "error": str(exc)},
+                extra={"tool": tool_name, "attempt": attempt, "error": str(exc)},
             )
+            return _Attempt(done=False, error=exc)
+        except asyncio.CancelledError:
+            # The other request of a hedged pair answered first (or the caller gave up).
+            status = "cancelled"
+            if not hedge:
+                # A lower bound on this request's latency. Recording only winners would drop every slow
+                # primary a hedge beat, so the p95 (and with it the hedge delay) would keep falling.
+                _LATENCY_WINDOWS.setdefault(tool_name, _LatencyWindow()).add(time.perf_counter() - started)
+            raise
+        finally:
+            span.set_attribute("status", status)
+            UPSTREAM_LATENCY.labels(tool_name, status).observe(time.perf_counter() - started)
+
+
+async def _hedged(
+    tool_name: str, payload: dict[str, Any], headers: dict[str, str], primary: asyncio.Future[_Attempt], attempt: int
+) -> _Attempt:
+    """Give the primary request until the tool's p95; then race a second request and keep the first answer."""
+    hedge: asyncio.Future[_Attempt] | None = None
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=hedge_delay(tool_name))
+        if done or not _take_call():
+            return await primary
+        UPSTREAM_HEDGES.labels(tool_name, "sent").inc()
+        hedge = asyncio.ensure_future(_attempt(tool_name, payload, headers, attempt, retry=True, hedge=True))
+        pending: set[asyncio.Future[_Attempt]] = {primary, hedge}
+        result = _Attempt(done=False)
+        while pending:
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Prefer an answer over a failure when both land in the same wakeup.
+            for task in sorted(finished, key=lambda task: not task.result().done):
+                result = task.result()
+                if result.done:
+                    if task is hedge:
+                        UPSTREAM_HEDGES.labels(tool_name, "won").inc()
+                    return result._replace(hedged=True)
+        return result._replace(hedged=True)
+    finally:
+        # Also reached when the caller is cancelled (e.g. a provider deadline): leave no request running.
+        for task in (primary, hedge):
+            if task is not None and not task.done():
+                task.cancel()
+
+
+def hedge_delay(tool_name: str) -> float:
+    window = _LATENCY_WINDOWS.get(tool_name)
+    observed = window.p95() if window is not None else None
+    return observed if observed is not None else HEDGE_DEFAULT_DELAY_SECONDS
+
+
+class _LatencyWindow:
+    """Recent request latencies for one tool; p95 is recomputed only after new samples.
+
+    Holds successful requests, plus the time cancelled primaries had run (a lower bound on their latency).
+    """
+
+    def __init__(self, size: int = HEDGE_WINDOW_SIZE):
+        self._samples: deque[float] = deque(maxlen=size)
+        self._p95: float | None = None
+        self._dirty = False
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._dirty = True
+
+    def p95(self) -> float | None:
+        if len(self._samples) < HEDGE_MIN_SAMPLES:
+            return None
+        if self._dirty:
+            ordered = sorted(self._samples)
+            self._p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            self._dirty = False
+        return self._p95
+
+
+_LATENCY_WINDOWS: dict[str, _LatencyWindow] = {}
+
+
+class CallBudget:
+    """Upper bound on upstream requests (retries and hedges included) sent from one context."""
+
+    def __init__(self, max_calls: int):
+        self.remaining = max_calls
+        self.used = 0
+        self.refused = 0
+
+    def take(self) -> bool:
+        if self.remaining <= 0:
+            self.refused += 1
+            return False
+        self.remaining -= 1
+        self.used += 1
+        return True
+
+
+_BUDGET: ContextVar[CallBudget | None] = ContextVar("upstream_call_budget", default=None)
+
+
+@contextmanager
+def upstream_budget(max_calls: int) -> Iterator[CallBudget]:
+    """Calls made in this context past `max_calls` return None without touching the upstream."""
+    budget = CallBudget(max_calls)
+    token = _BUDGET.set(budget)
+    try:
+        yield budget
+    finally:
+        _BUDGET.reset(token)
 
-    logger.error(
-        "upstream_call_exhausted",
-        extra={"tool": tool_name, "attempts": RETRY_ATTEMPTS + 1, "error": str(last_error)},
-    )
-    return None
 
+def _take_call() -> bool:
+    budget = _BUDGET.get()
+    return budget is None or budget.take()
 
-async def call_upstream_method(method: str, params: dict[str, Any] | None = None) -> dict[str, Any] | None:
+
+def upstream_available() -> bool:
+    """False while every endpoint is in its unhealthy cooldown (the circuit is open)."""
+    return any(ENDPOINT_HEALTH.healthy(url) for url in UPSTREAM_ENDPOINTS)
+
+
+def _headers() -> dict[str, str]:
     headers = {
         "Content-Type": "application/json",
         "Accept": "text/event-stream, application/json",
@@ -67,7 +247,31 @@ async def call_upstream_method(method: str, params: dict[str, Any] | None = None
     if API_KEY:
         headers["apikey"] = API_KEY
         headers["Authorization"] = f"Bearer {API_KEY}"
+    return headers
+
+
+async def _post(url: str, payload: dict[str, Any], headers: dict[str, str]) -> httpx.Response:
+    async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT_SECONDS) as client:
+        return await client.post(url, json=payload, headers=headers)
+
+
+def _endpoint_fault(exc: Exception) -> bool:
+    # 4xx answers mean the endpoint is up and rejected this request; they do not count against its health.
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500 or exc.response.status_code == 429
+    return True
 
+
+def upstream_health() -> dict[str, dict[str, Any]]:
+    """Health per configured endpoint, labelled without query strings."""
+    return {
+        urlsplit(url)._replace(query="", fragment="").geturl(): health
+        for url, health in ENDPOINT_HEALTH.snapshot(UPSTREAM_ENDPOINTS).items()
+    }
+
+
+async def call_upstream_method(method: str, params: dict[str, Any] | None = None) -> dict[str, Any] | None:
+    headers = _headers()
     payload = {
         "jsonrpc": "2.0",
         "id": 1,
@@ -76,13 +280,26 @@ async def call_upstream_method(method: str, params: dict[str, Any] | None = None
     if params is not None:
         payload["params"] = params
 
-    try:
-        async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT_SECONDS) as client:
-            response = await client.post(UPSTREAM_URL, json=payload, headers=headers)
-            response.raise_for_status()
-    except (httpx.RequestError, httpx.HTTPStatusError) as exc:
-        logger.warning("upstream_method_failed", extra={"method": method, "error": str(exc)})
+    if not _take_call():
         return None
+    url = ENDPOINT_HEALTH.choose(UPSTREAM_ENDPOINTS)
+    started = time.perf_counter()
+    status = "error"
+    with tracing.span("upstream.method", method=method) as span:
+        try:
+            response = await _post(url, payload, headers)
+            status = str(response.status_code)
+            response.raise_for_status()
+            ENDPOINT_HEALTH.record(url, time.perf_counter() - started, ok=True)
+        except (httpx.RequestError, httpx.HTTPStatusError) as exc:
+            if isinstance(exc, httpx.TimeoutException):
+                status = "timeout"
+            ENDPOINT_HEALTH.record(url, time.perf_counter() - started, ok=not _endpoint_fault(exc))
+            logger.warning("upstream_method_failed", extra={"method": method, "error": str(exc)})
+            return None
+        finally:
+            span.set_attribute("status", status)
+            UPSTREAM_LATENCY.labels(method, status).observe(time.perf_counter() - started)
 
     raw = _parse_sse_payload(response.text) if "data:" in response.text else _parse_json_payload(response.text)
     return raw if isinstance(raw, dict) else None
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import os
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+SESSION_DELTA_TTL_SECONDS = float(os.getenv("SESSION_DELTA_TTL_SECONDS", "3600"))
+SESSION_DELTA_MAX_SESSIONS = int(os.getenv("SESSION_DELTA_MAX_SESSIONS", "10000"))
+
+# Item fields whose change means the agent has to see the item again.
+_TRACKED_FIELDS = ("availability_status", "price_preview", "from_total", "currency", "rank_by_price")
+_TRACKED_OFFER_FIELDS = ("total_amount", "nightly_amount", "currency")
+
+
+class _ItemState(NamedTuple):
+    fingerprint: str
+    offers: dict[str, str]
+
+
+class _SessionState(NamedTuple):
+    expires_at: float
+    version: str
+    items: dict[str, _ItemState]
+
+
+class DeltaTracker:
+    """Remembers the last result per session so follow-up calls send only changed hotels and offers.
+
+    A delta is computed only when the caller echoes the session's current version token; otherwise the
+    full result is returned, so a client that lost track of its state can always resynchronize.
+    """
+
+    def __init__(self, ttl_seconds: float = SESSION_DELTA_TTL_SECONDS, max_sessions: int = SESSION_DELTA_MAX_SESSIONS):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[tuple[str, str], _SessionState] = OrderedDict()
+
+    def apply(self, session_id: str, items_key: str, payload: dict[str, Any], since_version: str | None) -> dict[str, Any]:
+        items: list[dict[str, Any]] = payload.get(items_key, [])
+        current = {str(item.get("hotel_id")): _item_state(item) for item in items}
+        previous = self._get((session_id, items_key))
+        version = secrets.token_hex(6)
+
+        delta: dict[str, Any] = {"session_id": session_id, "version": version}
+        if previous is None or since_version is None or since_version != previous.version:
+            delta.update(mode="full", base_version=None)
+        else:
+            changed: list[dict[str, Any]] = []
+            unchanged_hotel_ids: list[str] = []
+            unchanged_offer_ids: dict[str, list[str]] = {}
+            removed_offer_ids: dict[str, list[str]] = {}
+            for item in items:
+                hotel_id = str(item.get("hotel_id"))
+                old = previous.items.get(hotel_id)
+                new = current[hotel_id]
+                if old == new:
+                    unchanged_hotel_ids.append(hotel_id)
+                    continue
+                if old is not None and "top_offers" in item:
+                    kept = [
+                        offer
+                        for offer in item["top_offers"]
+                        if old.offers.get(str(offer.get("offer_id"))) != new.offers.get(str(offer.get("offer_id")))
+                    ]
+                    same = [offer_id for offer_id, fingerprint in new.offers.items() if old.offers.get(offer_id) == fingerprint]
+                    gone = [offer_id for offer_id in old.offers if offer_id not in new.offers]
+                    item = {**item, "top_offers": kept}
+                    if same:
+                        unchanged_offer_ids[hotel_id] = same
+                    if gone:
+                        removed_offer_ids[hotel_id] = gone
+                changed.append(item)
+            payload[items_key] = changed
+            delta.update(
+                mode="delta",
+                base_version=since_version,
+                unchanged_hotel_ids=unchanged_hotel_ids,
+                removed_hotel_ids=[hotel_id for hotel_id in previous.items if hotel_id not in current],
+                unchanged_offer_ids=unchanged_offer_ids,
+                removed_offer_ids=removed_offer_ids,
+            )
+
+        self._put((session_id, items_key), _SessionState(time.monotonic() + self.ttl_seconds, version, current))
+        payload.setdefault("metadata", {})["delta"] = delta
+        return payload
+
+    def _get(self, key: tuple[str, str]) -> _SessionState | None:
+        state = self._sessions.get(key)
+        if state is None:
+            return None
+        if state.expires_at <= time.monotonic():
+            del self._sessions[key]
+            return None
+        return state
+
+    def _put(self, key: tuple[str, str], state: _SessionState) -> None:
+        self._sessions[key] = state
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+
+def _item_state(item: dict[str, Any]) -> _ItemState:
+    offers = {
+        str(offer.get("offer_id")): _fingerprint({field: offer.get(field) for field in _TRACKED_OFFER_FIELDS})
+        for offer in item.get("top_offers") or ()
+    }
+    return _ItemState(_fingerprint({field: item.get(field) for field in _TRACKED_FIELDS}), offers)
+
+
+def _fingerprint(values: dict[str, Any]) -> str:
+    return json.dumps(values, sort_keys=True, separators=(",", ":"))
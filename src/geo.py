@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import math
+import re
+from collections.abc import Callable, Iterable
+from typing import NamedTuple
+
+from src import property_master
+from src.property_master import _norm
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+DEFAULT_CELL_DEGREES = 0.05
+DEFAULT_NEAR_RADIUS_KM = 5.0
+MAX_SEARCH_RADIUS_KM = 20_000.0
+
+
+class GeoPoint(NamedTuple):
+    latitude: float
+    longitude: float
+
+
+# Points agents ask for by name; keyed by normalized name.
+LANDMARKS: dict[str, GeoPoint] = {
+    "coors field": GeoPoint(39.7559, -104.9942),
+    "union station denver": GeoPoint(39.7527, -105.0001),
+    "denver union station": GeoPoint(39.7527, -105.0001),
+    "colorado convention center": GeoPoint(39.7427, -104.9952),
+    "grand central": GeoPoint(40.7527, -73.9772),
+    "grand central terminal": GeoPoint(40.7527, -73.9772),
+    "times square": GeoPoint(40.7580, -73.9855),
+    "empire state building": GeoPoint(40.7484, -73.9857),
+    "trafalgar square": GeoPoint(51.5080, -0.1281),
+    "big ben": GeoPoint(51.5007, -0.1246),
+    "covent garden": GeoPoint(51.5117, -0.1240),
+}
+
+_LAT_LON_RE = re.compile(r"^\s*(-?\d{1,2}(?:\.\d+)?)\s*,\s*(-?\d{1,3}(?:\.\d+)?)\s*$")
+
+
+def haversine_km(a: GeoPoint, b: GeoPoint) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (a.latitude, a.longitude, b.latitude, b.longitude))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+class GeoIndex:
+    """Fixed-size lat/lon grid buckets with radius and k-nearest queries."""
+
+    def __init__(self, cell_degrees: float = DEFAULT_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self._cells: dict[tuple[int, int], list[tuple[str, GeoPoint]]] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, key: str, point: GeoPoint) -> None:
+        self._cells.setdefault(self._cell(point), []).append((key, point))
+        self._size += 1
+
+    def within_radius(
+        self,
+        center: GeoPoint,
+        radius_km: float,
+        accept: Callable[[str], bool] | None = None,
+    ) -> list[tuple[float, str]]:
+        """(distance_km, key) pairs within `radius_km`, nearest first."""
+        lat_span = math.ceil(radius_km / (KM_PER_DEGREE_LAT * self.cell_degrees))
+        cos_lat = max(math.cos(math.radians(min(abs(center.latitude) + radius_km / KM_PER_DEGREE_LAT, 89.9))), 0.01)
+        lon_span = math.ceil(radius_km / (KM_PER_DEGREE_LAT * cos_lat * self.cell_degrees))
+        row, col = self._cell(center)
+        wrap = round(360 / self.cell_degrees)
+
+        found: list[tuple[float, str]] = []
+        cols = range(col - lon_span, col + lon_span + 1) if 2 * lon_span + 1 < wrap else range(wrap)
+        for cell_row in range(row - lat_span, row + lat_span + 1):
+            for cell_col in cols:
+                # Columns wrap at the antimeridian.
+                bucket = self._cells.get((cell_row, cell_col % wrap))
+                if not bucket:
+                    continue
+                for key, point in bucket:
+                    if accept is not None and not accept(key):
+                        continue
+                    distance = haversine_km(center, point)
+                    if distance <= radius_km:
+                        found.append((distance, key))
+        found.sort()
+        return found
+
+    def nearest(
+        self,
+        center: GeoPoint,
+        k: int,
+        max_radius_km: float | None = None,
+        accept: Callable[[str], bool] | None = None,
+    ) -> list[tuple[float, str]]:
+        """k nearest keys, growing the search radius geometrically from one cell."""
+        if k <= 0 or not self._size:
+            return []
+        limit = min(max_radius_km or MAX_SEARCH_RADIUS_KM, MAX_SEARCH_RADIUS_KM)
+        radius = min(self.cell_degrees * KM_PER_DEGREE_LAT, limit)
+        while True:
+            found = self.within_radius(center, radius, accept)
+            # Anything outside `radius` is farther than everything inside it.
+            if len(found) >= k or radius >= limit:
+                return found[:k]
+            radius = min(radius * 2, limit)
+
+    def _cell(self, point: GeoPoint) -> tuple[int, int]:
+        wrap = round(360 / self.cell_degrees)
+        return math.floor(point.latitude / self.cell_degrees), math.floor(point.longitude / self.cell_degrees) % wrap
+
+
+def resolve_point(value: str) -> GeoPoint | None:
+    """Parse "lat,lon" or a known landmark name; None when neither applies."""
+    match = _LAT_LON_RE.match(value)
+    if match:
+        latitude, longitude = float(match.group(1)), float(match.group(2))
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            return GeoPoint(latitude, longitude)
+        return None
+    return LANDMARKS.get(_norm(value))
+
+
+def build_geo_index(records: Iterable[property_master.PropertyRecord]) -> GeoIndex:
+    index = GeoIndex()
+    for record in records:
+        if record.latitude is not None and record.longitude is not None:
+            index.add(record.property_id, GeoPoint(record.latitude, record.longitude))
+    return index
+
+
+GEO_INDEX: property_master.CatalogIndex[GeoIndex] = property_master.CatalogIndex(build_geo_index, "geo-index")
+
+
+def get_geo_index() -> GeoIndex:
+    """Geo index over the property master; see property_master.CatalogIndex for when it is rebuilt."""
+    return GEO_INDEX.get()
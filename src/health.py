@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import os
+import time
+from collections.abc import Iterable
+from typing import Any
+
+HEALTH_EWMA_ALPHA = float(os.getenv("HEALTH_EWMA_ALPHA", "0.2"))
+# Latency assumed for a target with no samples yet; a healthy target below it stays preferred.
+HEALTH_INITIAL_LATENCY_SECONDS = float(os.getenv("HEALTH_INITIAL_LATENCY_SECONDS", "1.0"))
+HEALTH_ERROR_THRESHOLD = float(os.getenv("HEALTH_ERROR_THRESHOLD", "0.5"))
+HEALTH_MIN_SAMPLES = int(os.getenv("HEALTH_MIN_SAMPLES", "5"))
+HEALTH_COOLDOWN_SECONDS = float(os.getenv("HEALTH_COOLDOWN_SECONDS", "30"))
+# What a failed request costs the caller (a retry, often after a timeout), added to the score per unit of error rate.
+HEALTH_ERROR_PENALTY_SECONDS = float(os.getenv("HEALTH_ERROR_PENALTY_SECONDS", "10"))
+
+
+class TargetHealth:
+    """EWMA of latency and error rate for one provider or endpoint; every update is O(1)."""
+
+    __slots__ = ("name", "latency", "error_rate", "samples", "skip_until")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latency = HEALTH_INITIAL_LATENCY_SECONDS
+        self.error_rate = 0.0
+        self.samples = 0
+        self.skip_until = 0.0
+
+    def record(self, seconds: float, ok: bool, alpha: float = HEALTH_EWMA_ALPHA) -> None:
+        self.latency = seconds if self.samples == 0 else self.latency + alpha * (seconds - self.latency)
+        self.error_rate += alpha * ((0.0 if ok else 1.0) - self.error_rate)
+        self.samples += 1
+        if ok:
+            self.skip_until = 0.0
+        elif self.samples >= HEALTH_MIN_SAMPLES and self.error_rate >= HEALTH_ERROR_THRESHOLD:
+            # Skipped for a cooldown, then offered one probe request; a success clears the skip.
+            self.skip_until = time.monotonic() + HEALTH_COOLDOWN_SECONDS
+
+    @property
+    def healthy(self) -> bool:
+        return self.skip_until <= time.monotonic()
+
+    @property
+    def score(self) -> float:
+        """Lower is better: expected seconds per request, counting failures at HEALTH_ERROR_PENALTY_SECONDS."""
+        return self.latency + HEALTH_ERROR_PENALTY_SECONDS * self.error_rate
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "score": round(self.score, 4),
+            "latency_ms": round(self.latency * 1000, 1),
+            "error_rate": round(self.error_rate, 4),
+            "samples": self.samples,
+        }
+
+
+class HealthTracker:
+    def __init__(self) -> None:
+        self._targets: dict[str, TargetHealth] = {}
+
+    def get(self, name: str) -> TargetHealth:
+        target = self._targets.get(name)
+        if target is None:
+            target = self._targets[name] = TargetHealth(name)
+        return target
+
+    def record(self, name: str, seconds: float, ok: bool) -> None:
+        self.get(name).record(seconds, ok)
+
+    def healthy(self, name: str) -> bool:
+        return self.get(name).healthy
+
+    def choose(self, names: Iterable[str]) -> str:
+        """Best-scoring healthy target (first listed wins ties); if none is healthy, the best of all of them.
+
+        Cost is one comparison per configured target, a small fixed set, so routing stays O(1) per call.
+        """
+        best: TargetHealth | None = None
+        fallback: TargetHealth | None = None
+        for name in names:
+            target = self.get(name)
+            if fallback is None or target.score < fallback.score:
+                fallback = target
+            if target.healthy and (best is None or target.score < best.score):
+                best = target
+        chosen = best or fallback
+        if chosen is None:
+            raise ValueError("choose() needs at least one target")
+        return chosen.name
+
+    def confidence(self) -> dict[str, float]:
+        """1 - error rate per target, for ranking offers by how likely a provider's answer holds."""
+        return {name: 1.0 - target.error_rate for name, target in self._targets.items()}
+
+    def snapshot(self, names: Iterable[str] | None = None) -> dict[str, dict[str, Any]]:
+        selected = self._targets if names is None else {name: self.get(name) for name in names}
+        return {name: target.snapshot() for name, target in selected.items()}
+
+    def clear(self) -> None:
+        self._targets.clear()
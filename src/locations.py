@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from src import property_master
+from src.property_master import _norm
+
+# City nicknames and spellings agents commonly send, keyed by normalized city.
+CITY_ALIASES: dict[str, tuple[str, ...]] = {
+    "new york": ("nyc", "new york city", "manhattan", "ny"),
+    "london": ("city of london", "greater london"),
+    "denver": ("denver co", "mile high city"),
+}
+
+# Country names accepted as disambiguation hints ("London, UK"). Bare two-letter
+# codes are left out on purpose: "us", "co" or "in" appear in ordinary queries.
+COUNTRY_ALIASES: dict[str, tuple[str, ...]] = {
+    "US": ("usa", "united states", "united states of america", "america"),
+    "GB": ("uk", "united kingdom", "great britain", "britain", "england"),
+    "CA": ("canada",),
+    "IE": ("ireland",),
+    "FR": ("france",),
+    "DE": ("germany",),
+    "ES": ("spain",),
+    "IT": ("italy",),
+    "NL": ("netherlands", "holland"),
+    "AU": ("australia",),
+    "JP": ("japan",),
+}
+
+SUGGESTION_CAP = 10
+
+
+@dataclass(frozen=True)
+class LocationEntry:
+    location_id: str
+    city: str
+    city_norm: str
+    country_code: str
+    hotel_count: int = 0
+    aliases: tuple[str, ...] = ()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "location_id": self.location_id,
+            "city": self.city,
+            "country_code": self.country_code,
+            "hotel_count": self.hotel_count,
+        }
+
+
+class LocationIndex:
+    """Alias map plus prefix trie over city names; lookups cost O(length of query)."""
+
+    def __init__(self, entries: Iterable[LocationEntry]):
+        ranked = sorted(entries, key=lambda e: (-e.hotel_count, e.city_norm, e.country_code))
+        self.entries: dict[str, LocationEntry] = {entry.location_id: entry for entry in ranked}
+        self._by_alias: dict[str, list[str]] = {}
+        self._trie: dict[str, Any] = {}
+        for entry in ranked:
+            for alias in (entry.city_norm, *entry.aliases):
+                ids = self._by_alias.setdefault(alias, [])
+                if entry.location_id not in ids:
+                    ids.append(entry.location_id)
+                self._insert_prefixes(alias, entry.location_id)
+        self._max_alias_tokens = max((len(alias.split()) for alias in self._by_alias), default=1)
+
+        self._countries: dict[str, str] = {}
+        for code, names in COUNTRY_ALIASES.items():
+            for name in names:
+                self._countries[_norm(name)] = code
+        self._max_country_tokens = max((len(name.split()) for name in self._countries), default=1)
+
+    def resolve(self, query: str) -> LocationEntry | None:
+        """Longest word-aligned alias in the query wins; a country name in the query filters candidates."""
+        tokens = _norm(query).split()
+        if not tokens:
+            return None
+        country_hint, country_span = self._country_hint(tokens)
+
+        best: tuple[int, str] | None = None
+        for start in range(len(tokens)):
+            for length in range(min(self._max_alias_tokens, len(tokens) - start), 0, -1):
+                if best is not None and length <= best[0]:
+                    break
+                if country_span and start < country_span[1] and start + length > country_span[0]:
+                    continue
+                location_id = self._pick(self._by_alias.get(" ".join(tokens[start : start + length])), country_hint)
+                if location_id is not None:
+                    best = (length, location_id)
+                    break
+        return self.entries[best[1]] if best is not None else None
+
+    def suggest(self, prefix: str, limit: int = 5) -> list[LocationEntry]:
+        node = self._trie
+        for char in _norm(prefix):
+            node = node.get(char)
+            if node is None:
+                return []
+        return [self.entries[location_id] for location_id in node.get("", ())[: max(limit, 0)]]
+
+    def _pick(self, location_ids: list[str] | None, country_hint: str | None) -> str | None:
+        for location_id in location_ids or ():
+            if country_hint is None or self.entries[location_id].country_code == country_hint:
+                return location_id
+        return None
+
+    def _insert_prefixes(self, alias: str, location_id: str) -> None:
+        # Index every word start so "york" also suggests "New York".
+        words = alias.split()
+        for offset in range(len(words)):
+            node = self._trie
+            for char in " ".join(words[offset:]):
+                node = node.setdefault(char, {})
+                top: list[str] = node.setdefault("", [])
+                if location_id not in top and len(top) < SUGGESTION_CAP:
+                    top.append(location_id)
+
+    def _country_hint(self, tokens: list[str]) -> tuple[str | None, tuple[int, int] | None]:
+        for start in range(len(tokens)):
+            for length in range(min(self._max_country_tokens, len(tokens) - start), 0, -1):
+                code = self._countries.get(" ".join(tokens[start : start + length]))
+                if code is not None:
+                    return code, (start, start + length)
+        return None, None
+
+
+def build_location_index(records: Iterable[property_master.PropertyRecord]) -> LocationIndex:
+    grouped: dict[tuple[str, str], list[Any]] = {}
+    for record in records:
+        key = (_norm(record.city), record.country_code.upper())
+        group = grouped.setdefault(key, [record.city, 0])
+        group[1] += 1
+
+    entries = []
+    for (city_norm, country_code), (city, hotel_count) in grouped.items():
+        entries.append(
+            LocationEntry(
+                location_id=f"{country_code.lower()}:{city_norm.replace(' ', '_')}",
+                city=city,
+                city_norm=city_norm,
+                country_code=country_code,
+                hotel_count=hotel_count,
+                aliases=tuple(_norm(alias) for alias in CITY_ALIASES.get(city_norm, ())),
+            )
+        )
+    return LocationIndex(entries)
+
+
+LOCATION_INDEX: property_master.CatalogIndex[LocationIndex] = property_master.CatalogIndex(build_location_index, "location-index")
+
+
+def get_location_index() -> LocationIndex:
+    """Location index over the property master; see property_master.CatalogIndex for when it is rebuilt."""
+    return LOCATION_INDEX.get()
+
+
+def resolve_location(query: str) -> LocationEntry | None:
+    return get_location_index().resolve(query)
+
+
+def suggest_locations(prefix: str, limit: int = 5) -> list[LocationEntry]:
+    return get_location_index().suggest(prefix, limit)
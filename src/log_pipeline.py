@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+from src.metrics import LOG_DROPPED
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Each event name may emit LOG_RATE_PER_EVENT records per second; past that, 1 in LOG_SAMPLE_EVERY gets through.
+LOG_RATE_PER_EVENT = float(os.getenv("LOG_RATE_PER_EVENT", "20"))
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", "100"))
+
+REDACTED = "[REDACTED]"
+
+# Keys whose values are never logged: credentials and guest PII.
+_SECRET_KEY = re.compile(r"api[_-]?key|authorization|token|secret|password|cookie", re.IGNORECASE)
+_PII_KEY = re.compile(
+    r"guest[_-]?(?:name|email|phone|details)|first[_-]?name|last[_-]?name|full[_-]?name|email|phone|card[_-]?number"
+    r"|passport|birth|address",
+    re.IGNORECASE,
+)
+# Secrets and PII that end up inside free text (exception messages, upstream bodies).
+_VALUE_PATTERNS = (
+    (re.compile(r"(?i)\b(bearer)\s+[A-Za-z0-9._~+/=-]+"), r"\1 " + REDACTED),
+    (re.compile(r"(?i)\b(api[_-]?key|token|secret|password)([\"']?\s*[:=]\s*[\"']?)[^\s\"'&,}]+"), r"\1\2" + REDACTED),
+    (re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}"), REDACTED),
+    # International (+...) or (NNN) NNN-NNNN phone numbers; bare digit runs are left alone (dates, ids).
+    (re.compile(r"(?<![\w+])\+\d[\d\s().-]{6,}\d\b|\(\d{3}\)\s?\d{3}-\d{4}\b"), REDACTED),
+)
+# Literal values of configured credentials, redacted wherever they appear.
+_known_secrets: list[str] = []
+
+# Attributes every LogRecord has; anything else came in through `extra=`.
+_RECORD_ATTRS = frozenset(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {"message", "asctime"}
+
+
+def redact(value: Any, key: str = "") -> Any:
+    if key and (_SECRET_KEY.search(key) or _PII_KEY.search(key)):
+        return REDACTED
+    if isinstance(value, str):
+        for secret in _known_secrets:
+            value = value.replace(secret, REDACTED)
+        for pattern, replacement in _VALUE_PATTERNS:
+            value = pattern.sub(replacement, value)
+        return value
+    if isinstance(value, dict):
+        return {k: redact(v, str(k)) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, event, then the record's `extra=` fields, redacted."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": redact(record.getMessage()),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = redact(value, key)
+        if record.exc_text:
+            entry["exc"] = redact(record.exc_text)
+        return json.dumps(entry, default=str, separators=(",", ":"))
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        extras = {key: value for key, value in record.__dict__.items() if key not in _RECORD_ATTRS and not key.startswith("_")}
+        line = f"{record.levelname} {record.name} {redact(record.getMessage())}"
+        if extras:
+            line += " " + json.dumps(redact(extras), default=str)
+        if record.exc_text:
+            line += "\n" + redact(record.exc_text)
+        return line
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per event name; over the limit, records are sampled and the skipped count rides on the next one.
+
+    CRITICAL records always pass.
+    """
+
+    def __init__(self, rate_per_second: float = LOG_RATE_PER_EVENT, sample_every: int = LOG_SAMPLE_EVERY):
+        super().__init__()
+        self.rate_per_second = rate_per_second
+        self.sample_every = max(sample_every, 1)
+        # event -> [tokens, last refill, suppressed since last emitted record]
+        self._buckets: dict[tuple[str, str], list[float]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate_per_second <= 0 or record.levelno >= logging.CRITICAL:
+            return True
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.rate_per_second, now, 0]
+        bucket[0] = min(self.rate_per_second, bucket[0] + (now - bucket[1]) * self.rate_per_second)
+        bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+        elif (bucket[2] + 1) % self.sample_every:
+            bucket[2] += 1
+            LOG_DROPPED.labels("rate_limited").inc()
+            return False
+        if bucket[2]:
+            record.suppressed = int(bucket[2])
+            bucket[2] = 0
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the listener thread; when the queue is full the record is dropped and counted, never waited on."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve args and the traceback here (they may reference objects that change later);
+        # redaction and JSON encoding happen on the listener thread. Other handlers keep the original record.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_DROPPED.labels("queue_full").inc()
+
+
+_listener: QueueListener | None = None
+
+
+def configure_logging(
+    level: str = LOG_LEVEL,
+    fmt: str = LOG_FORMAT,
+    queue_size: int = LOG_QUEUE_SIZE,
+    stream: Any = None,
+) -> QueueListener:
+    """Route the root logger through a bounded queue to a stream handler on a background thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+    _known_secrets[:] = sorted(
+        {value for name, value in os.environ.items() if _SECRET_KEY.search(name) and len(value) >= 8}, key=len, reverse=True
+    )
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=max(queue_size, 1)))
+    handler.addFilter(RateLimitFilter())
+
+    root = logging.getLogger()
+    for existing in [h for h in root.handlers if isinstance(h, NonBlockingQueueHandler)]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from collections.abc import Iterable
+from typing import Any
+
+from src.metrics import LOOP_BLOCKED, Sample
+
+# Lag sampling is cheap (one timer per interval) and on by default; 0 disables it.
+LOOP_LAG_INTERVAL_SECONDS = float(os.getenv("LOOP_LAG_INTERVAL_SECONDS", "0.25"))
+LOOP_LAG_WINDOW = int(os.getenv("LOOP_LAG_WINDOW", "1200"))
+# Debug mode: log the loop thread's stack when a single callback runs longer than this (0 = off).
+LOOP_SLOW_CALLBACK_SECONDS = float(os.getenv("LOOP_SLOW_CALLBACK_SECONDS", "0"))
+
+LAG_QUANTILES = (0.5, 0.9, 0.99, 1.0)
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """Measures how late a periodic timer fires; the lateness is time the loop spent on other callbacks."""
+
+    def __init__(self, interval_seconds: float = LOOP_LAG_INTERVAL_SECONDS, window: int = LOOP_LAG_WINDOW):
+        self.interval_seconds = interval_seconds
+        self._samples: deque[float] = deque(maxlen=max(window, 1))
+        self._task: asyncio.Task[None] | None = None
+        self.total_seconds = 0.0
+        self.count = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def ensure_started(self) -> None:
+        """Start sampling on the running loop; idempotent, so callers can invoke it on every request."""
+        if self.interval_seconds <= 0:
+            return
+        # A task left behind by a closed loop (tests, restarts) never finishes; start over on the new one.
+        if self.running and self._task.get_loop() is asyncio.get_running_loop():  # type: ignore[union-attr]
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="loop-lag-monitor")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def record(self, lag_seconds: float) -> None:
+        lag_seconds = max(lag_seconds, 0.0)
+        self._samples.append(lag_seconds)
+        self.total_seconds += lag_seconds
+        self.count += 1
+
+    def percentiles(self, quantiles: Iterable[float] = LAG_QUANTILES) -> dict[float, float]:
+        ordered = sorted(self._samples)
+        if not ordered:
+            return {q: 0.0 for q in quantiles}
+        # Nearest-rank over the recent window.
+        return {q: ordered[min(len(ordered) - 1, max(math.ceil(q * len(ordered)) - 1, 0))] for q in quantiles}
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "interval_ms": self.interval_seconds * 1000,
+            "window_samples": len(self._samples),
+            "lag_ms": {f"p{round(q * 100)}": round(value * 1000, 3) for q, value in self.percentiles().items()},
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval_seconds
+            await asyncio.sleep(self.interval_seconds)
+            self.record(loop.time() - expected)
+
+
+class BlockingCallDetector:
+    """Watchdog thread that pings the loop and logs the loop thread's stack while a callback overruns.
+
+    The stack is captured during the stall, so it points at the blocking code itself (regex parsing,
+    recursive image extraction, validation, JSON encoding) rather than at whoever resumes afterwards.
+    """
+
+    def __init__(self, threshold_seconds: float = LOOP_SLOW_CALLBACK_SECONDS):
+        self.threshold_seconds = threshold_seconds
+        self.blocked_count = 0
+        self._thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def ensure_started(self) -> None:
+        if self.threshold_seconds <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        if self.running and self._loop is loop:
+            return
+        self.stop()
+        self._loop = loop
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._watch, args=(loop, threading.get_ident()), name="loop-blocking-detector", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _watch(self, loop: asyncio.AbstractEventLoop, loop_thread_id: int) -> None:
+        acked = threading.Event()
+        while not self._stop.is_set() and not loop.is_closed():
+            acked.clear()
+            sent = time.monotonic()
+            try:
+                loop.call_soon_threadsafe(acked.set)
+            except RuntimeError:
+                return
+            if acked.wait(self.threshold_seconds):
+                self._stop.wait(self.threshold_seconds / 2)
+                continue
+            frame = sys._current_frames().get(loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+            # One report per stall: wait for the loop to come back before pinging again.
+            while not acked.wait(self.threshold_seconds) and not self._stop.is_set() and not loop.is_closed():
+                pass
+            blocked = time.monotonic() - sent
+            self.blocked_count += 1
+            LOOP_BLOCKED.inc()
+            logger.warning("event_loop_blocked", extra={"blocked_ms": round(blocked * 1000, 1), "stack": stack})
+
+
+LAG_MONITOR = LoopLagMonitor()
+BLOCKING_DETECTOR = BlockingCallDetector()
+
+
+def ensure_started() -> None:
+    LAG_MONITOR.ensure_started()
+    BLOCKING_DETECTOR.ensure_started()
+
+
+def lag_collector() -> Iterable[tuple[str, str, str, Iterable[Sample]]]:
+    samples: list[Sample] = [
+        ("event_loop_lag_seconds", {"quantile": str(q)}, value) for q, value in LAG_MONITOR.percentiles().items()
+    ]
+    samples.append(("event_loop_lag_seconds_sum", {}, LAG_MONITOR.total_seconds))
+    samples.append(("event_loop_lag_seconds_count", {}, LAG_MONITOR.count))
+    return [("event_loop_lag_seconds", "summary", "Event loop timer lateness over the recent window.", samples)]
@@ -0,0 +1,504 @@
+from __future__ import annotations
+
+import datetime as dt
+import functools
+import secrets
+import time
+from collections.abc import Awaitable, Callable
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+
+from src import client, loop_monitor, profiling, tracing
+from src.metrics import REGISTRY, TOOL_LATENCY, cache_collector
+
+if TYPE_CHECKING:
+    from mcp.server.fastmcp import FastMCP
+
+    from src.cache_snapshot import CacheSnapshot
+    from src.providers import ProviderRegistry
+    from src.server import ServerSettings
+    from src.service import HotelWrapperService
+    from src.warmer import CacheWarmer
+
+
+class AppState:
+    """Providers, service and background jobs, each built on first use rather than when the app is created."""
+
+    def __init__(self, settings: ServerSettings):
+        self.settings = settings
+
+    @functools.cached_property
+    def providers(self) -> ProviderRegistry:
+        from src.providers import ProviderRegistry
+
+        return ProviderRegistry.from_env()
+
+    @functools.cached_property
+    def service(self) -> HotelWrapperService:
+        from src.service import HotelWrapperService
+
+        # Attach the on-disk snapshot before the first request can read the caches.
+        self.snapshot.attach()
+        return HotelWrapperService(provider=self.providers)
+
+    @functools.cached_property
+    def warmer(self) -> CacheWarmer:
+        from src.warmer import CacheWarmer
+
+        warmer = CacheWarmer(self.service.provider)
+        # Searches are only counted once there is a warmer to use the counts.
+        self.service.search_listeners.append(warmer.popular.record)
+        return warmer
+
+    @functools.cached_property
+    def snapshot(self) -> CacheSnapshot:
+        from src.cache_snapshot import CacheSnapshot
+        from src.providers import sigtrip
+
+        # Long-lived upstream content survives restarts; prices are too short-lived to be worth restoring.
+        snapshot = CacheSnapshot([sigtrip.ROOM_CACHE, sigtrip.GALLERY_CACHE, sigtrip.TOOLS_CACHE])
+        snapshot.attach()
+        return snapshot
+
+    def built(self, name: str) -> Any:
+        """The named part if something already needed it, else None; for status routes that must not build it."""
+        return self.__dict__.get(name)
+
+
+_state: AppState | None = None
+
+
+def state() -> AppState:
+    if _state is None:
+        raise RuntimeError("No app registered; create one with src.server.create_app()")
+    return _state
+
+
+def register(app: FastMCP, settings: ServerSettings) -> AppState:
+    """Attach every tool and route to `app`; returns the state they share."""
+    global _state
+    first = _state is None
+    _state = AppState(settings)
+    for path, methods, handler in ROUTES:
+        app.custom_route(path, methods=methods, include_in_schema=False)(handler)
+    for tool in TOOLS:
+        app.add_tool(tool)
+    if first:
+        REGISTRY.register_collector(cache_collector(_caches))
+        REGISTRY.register_collector(loop_monitor.lag_collector)
+    return _state
+
+
+_ToolFn = TypeVar("_ToolFn", bound=Callable[..., Awaitable[Any]])
+
+
+def _observed(fn: _ToolFn) -> _ToolFn:
+    """Trace and time each tool call; `functools.wraps` keeps the signature FastMCP builds the schema from."""
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        loop_monitor.ensure_started()
+        started = time.perf_counter()
+        outcome = "exception"
+        with tracing.span(f"tool.{fn.__name__}") as span, profiling.track_stages() as timings:
+            try:
+                result = await fn(*args, **kwargs)
+                outcome = "error" if isinstance(result, dict) and result.get("ok") is False else "ok"
+                return result
+            finally:
+                elapsed = time.perf_counter() - started
+                span.set_attribute("outcome", outcome)
+                TOOL_LATENCY.labels(fn.__name__, outcome).observe(elapsed)
+                profiling.SLOW_REQUESTS.record(fn.__name__, elapsed, outcome, timings.stages)
+
+    return wrapper  # type: ignore[return-value]
+
+
+def _caches() -> list[Any]:
+    # Caches of parts nobody has used yet are empty; reporting them is not worth importing them at scrape time.
+    caches: list[Any] = []
+    service = state().built("service")
+    if service is not None:
+        from src import property_store
+        from src.providers import sigtrip
+
+        caches.extend(
+            [
+                service.response_cache,
+                sigtrip.PRICE_CACHE,
+                sigtrip.ROOM_CACHE,
+                sigtrip.GALLERY_CACHE,
+                sigtrip.TOOLS_CACHE,
+            ]
+        )
+        store = property_store.get_property_store()
+        if store is not None:
+            caches.append(store)
+    return caches
+
+
+async def healthz(_request: Request) -> Response:
+    settings = state().settings
+    return JSONResponse(
+        {
+            "status": "ok",
+            "service": "sigtrip-wrapper-mcp",
+            "env": settings.app_env,
+            "version": settings.app_version,
+        },
+        status_code=200,
+    )
+
+
+async def readyz(_request: Request) -> Response:
+    app_state = state()
+    settings = app_state.settings
+    issues: list[str] = []
+    if not settings.sigtrip_api_key_set:
+        issues.append("MCP_PROVIDER_SIGTRIP_API_KEY is not set")
+    if not settings.sigtrip_url:
+        issues.append("MCP_PROVIDER_SIGTRIP_URL is not set")
+
+    if issues:
+        return JSONResponse(
+            {
+                "status": "not_ready",
+                "service": "sigtrip-wrapper-mcp",
+                "issues": issues,
+            },
+            status_code=503,
+        )
+
+    from src import tiered_cache
+
+    # A probe only reports: providers, warmer and snapshot appear once something else built them
+    # (the first tool call, or the lifespan when warming or snapshots are enabled).
+    providers, warmer, snapshot = (app_state.built(name) for name in ("providers", "warmer", "snapshot"))
+    return JSONResponse(
+        {
+            "status": "ready",
+            "service": "sigtrip-wrapper-mcp",
+            "upstream": settings.sigtrip_url,
+            "api_key_configured": settings.sigtrip_api_key_set,
+            "providers": providers.describe() if providers is not None else None,
+            "upstream_endpoints": client.upstream_health(),
+            "cache_warmer": warmer.stats() if warmer is not None else None,
+            "cache_snapshot": snapshot.stats() if snapshot is not None else None,
+            "shared_cache": tiered_cache.SHARED_CACHE.describe() if tiered_cache.SHARED_CACHE is not None else None,
+        },
+        status_code=200,
+    )
+
+
+def _is_admin(request: Request) -> bool:
+    admin_token = state().settings.admin_token
+    if admin_token is None:
+        return False
+    supplied = request.headers.get("x-admin-token") or request.headers.get("authorization", "").removeprefix("Bearer ")
+    return secrets.compare_digest(supplied.encode(), admin_token.encode())
+
+
+async def debug_slow_requests(request: Request) -> Response:
+    if not _is_admin(request):
+        return JSONResponse({"status": "forbidden"}, status_code=403)
+    slowest = profiling.SLOW_REQUESTS.snapshot()
+    if request.query_params.get("reset") == "true":
+        profiling.SLOW_REQUESTS.clear()
+    return JSONResponse({"capacity": profiling.SLOW_REQUESTS.capacity, "requests": slowest}, status_code=200)
+
+
+async def debug_profile(request: Request) -> Response:
+    """Profile the live event loop: ?seconds=5&mode=cprofile|sample&limit=40."""
+    if not _is_admin(request):
+        return JSONResponse({"status": "forbidden"}, status_code=403)
+    if profiling.profiler_busy():
+        return JSONResponse({"status": "busy", "message": "A profiling session is already running."}, status_code=409)
+    try:
+        seconds = float(request.query_params.get("seconds", "5"))
+        limit = int(request.query_params.get("limit", "40"))
+    except ValueError:
+        return JSONResponse({"status": "invalid", "message": "seconds and limit must be numbers."}, status_code=400)
+    mode = request.query_params.get("mode", "cprofile")
+    if mode not in ("cprofile", "sample"):
+        return JSONResponse({"status": "invalid", "message": "mode must be cprofile or sample."}, status_code=400)
+    return JSONResponse(await profiling.run_profile(seconds, mode=mode, limit=limit), status_code=200)
+
+
+async def debug_event_loop(request: Request) -> Response:
+    if not _is_admin(request):
+        return JSONResponse({"status": "forbidden"}, status_code=403)
+    loop_monitor.ensure_started()
+    return JSONResponse(
+        {
+            **loop_monitor.LAG_MONITOR.stats(),
+            "slow_callback_threshold_ms": loop_monitor.BLOCKING_DETECTOR.threshold_seconds * 1000,
+            "blocked_count": loop_monitor.BLOCKING_DETECTOR.blocked_count,
+        },
+        status_code=200,
+    )
+
+
+async def metrics(_request: Request) -> Response:
+    loop_monitor.ensure_started()
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@_observed
+async def search_hotel_offers(
+    location: str,
+    check_in: str | None = None,
+    check_out: str | None = None,
+    guests: int = 1,
+    max_hotels: int = 5,
+    max_offers_per_hotel: int = 3,
+    near: str | None = None,
+    radius_km: float | None = None,
+    view: str = "full",
+    fields: list[str] | None = None,
+    session_id: str | None = None,
+    since_version: str | None = None,
+    ) -> dict:
+    """Return multiple hotels with images and upfront 'price from' previews. Optional near='Coors Field' or 'lat,lon'.
+
+    view='compact' returns only ids, names, prices and offer ids; fields=[...] picks hotel card fields explicitly.
+    With session_id, pass back metadata.delta.version as since_version to receive only changed hotels and offers.
+    """
+    return await state().service.search_hotel_offers(
+        location=location,
+        check_in=check_in,
+        check_out=check_out,
+        guests=guests,
+        max_hotels=max_hotels,
+        max_offers_per_hotel=max_offers_per_hotel,
+        near=near,
+        radius_km=radius_km,
+        view=view,
+        fields=fields,
+        session_id=session_id,
+        since_version=since_version,
+    )
+
+
+@_observed
+async def plan_hotel_options(
+    query: str,
+    max_hotels: int = 5,
+    max_offers_per_hotel: int = 3,
+    view: str = "full",
+    fields: list[str] | None = None,
+    session_id: str | None = None,
+    since_version: str | None = None,
+) -> dict:
+    """Natural-language entrypoint. Example: 'Show me hotels in Denver'."""
+    return await state().service.plan_hotel_options(
+        query=query,
+        max_hotels=max_hotels,
+        max_offers_per_hotel=max_offers_per_hotel,
+        view=view,
+        fields=fields,
+        session_id=session_id,
+        since_version=since_version,
+    )
+
+
+@_observed
+async def compare_hotels(
+    location: str,
+    hotel_ids: list[str] | None = None,
+    check_in: str | None = None,
+    check_out: str | None = None,
+    guests: int = 1,
+    max_hotels: int = 8,
+    view: str = "full",
+    fields: list[str] | None = None,
+    session_id: str | None = None,
+    since_version: str | None = None,
+) -> dict:
+    """Compare hotels by upfront price and availability. view='compact' or fields=[...] trims each item."""
+    return await state().service.compare_hotels(
+        location=location,
+        hotel_ids=hotel_ids,
+        check_in=check_in,
+        check_out=check_out,
+        guests=guests,
+        max_hotels=max_hotels,
+        view=view,
+        fields=fields,
+        session_id=session_id,
+        since_version=since_version,
+    )
+
+
+@_observed
+async def compare_hotels_from_query(
+    query: str,
+    hotel_ids: list[str] | None = None,
+    max_hotels: int = 8,
+    view: str = "full",
+    fields: list[str] | None = None,
+    session_id: str | None = None,
+    since_version: str | None = None,
+) -> dict:
+    """Natural-language comparison entrypoint. Example: 'Compare hotels in Denver for 2 guests'."""
+    return await state().service.compare_hotels_from_query(
+        query=query,
+        hotel_ids=hotel_ids,
+        max_hotels=max_hotels,
+        view=view,
+        fields=fields,
+        session_id=session_id,
+        since_version=since_version,
+    )
+
+
+@_observed
+async def suggest_locations(query: str, limit: int = 5) -> dict:
+    """Autocomplete and resolve a city name before searching. Example: 'new y' or 'London, UK'."""
+    return await state().service.suggest_locations(query=query, limit=limit)
+
+
+@_observed
+async def create_booking_request(
+    guest_details: str,
+    offer_id: str | None = None,
+    room_id: str | None = None,
+    hotel_id: str | None = None,
+) -> dict:
+    """Create booking payment request. Supports new offer_id and legacy room_id inputs."""
+    del hotel_id
+    effective_offer_id = offer_id or room_id
+    if not effective_offer_id:
+        from src.service import error_envelope
+
+        return error_envelope(
+            code="MISSING_OFFER_ID",
+            message="offer_id (or legacy room_id) is required",
+            retryable=False,
+        )
+    return await state().service.create_booking_request(offer_id=effective_offer_id, guest_details=guest_details)
+
+
+@_observed
+async def cancel_booking(provider_booking_ref: str, reason: str | None = None, email: str | None = None) -> dict:
+    """Attempt booking cancellation. Returns unsupported gracefully if provider lacks capability."""
+    return await state().service.cancel_booking(provider_booking_ref=provider_booking_ref, reason=reason, email=email)
+
+
+@_observed
+async def get_booking_status(provider_booking_ref: str) -> dict:
+    """Retrieve booking status. Returns unsupported gracefully if provider lacks capability."""
+    return await state().service.get_booking_status(provider_booking_ref=provider_booking_ref)
+
+
+# Backward-compatible aliases for existing integrations.
+@_observed
+async def discover_hotels(location: str) -> dict:
+    """Deprecated alias. Use search_hotel_offers instead."""
+    check_in, check_out = _default_dates()
+    result = await state().service.search_hotel_offers(
+        location=location,
+        check_in=check_in,
+        check_out=check_out,
+        guests=1,
+        max_hotels=5,
+        max_offers_per_hotel=1,
+    )
+
+    hotels = []
+    for item in result.get("hotels", []):
+        offers = item.get("top_offers", [])
+        room_names = ", ".join(offer.get("room_name", "Room") for offer in offers[:3])
+        hotels.append(
+            {
+                "id": item.get("hotel_id"),
+                "name": item.get("name"),
+                "location": {
+                    "city": location.title(),
+                    "country_code": "US",
+                    "address": "Address provided at booking",
+                },
+                "description": f"Available rooms: {room_names}." if room_names else "No offers currently available.",
+                "amenities": ["wifi_free"],
+                "images": item.get("image_urls", []),
+            }
+        )
+    return hotels
+
+
+@_observed
+async def get_availability(hotel_id: str, check_in: str, check_out: str, guests: int = 1) -> list[dict]:
+    """Deprecated alias. Use search_hotel_offers and read top_offers instead."""
+    location_guess = _location_from_hotel_id(hotel_id)
+    result = await state().service.search_hotel_offers(
+        location=location_guess,
+        check_in=check_in,
+        check_out=check_out,
+        guests=guests,
+        max_hotels=10,
+        max_offers_per_hotel=10,
+    )
+
+    for item in result.get("hotels", []):
+        if item.get("hotel_id") == hotel_id:
+            legacy_rooms = []
+            for offer in item.get("top_offers", []):
+                legacy_rooms.append(
+                    {
+                        "room_id": offer.get("offer_id"),
+                        "name": offer.get("room_name"),
+                        "price": {
+                            "amount": offer.get("total_amount"),
+                            "currency": offer.get("currency"),
+                        },
+                        "category": offer.get("category", "Standard"),
+                    }
+                )
+            return legacy_rooms
+
+    return []
+
+
+def _default_dates() -> tuple[str, str]:
+    today = dt.date.today()
+    check_in = today + dt.timedelta(days=1)
+    check_out = today + dt.timedelta(days=2)
+    return check_in.isoformat(), check_out.isoformat()
+
+
+def _location_from_hotel_id(hotel_id: str) -> str:
+    if hotel_id == "sigtrip:The_Rally_Hotel":
+        return "denver"
+    if hotel_id == "sigtrip:Club_Quarters,_Trafalgar_Square":
+        return "london"
+    if hotel_id == "sigtrip:Club_Quarters,_Grand_Central":
+        return "new york"
+
+    if hotel_id.startswith("sigtrip:"):
+        return hotel_id.removeprefix("sigtrip:").replace("_", " ")
+    return "unknown"
+
+
+ROUTES: list[tuple[str, list[str], Callable[[Request], Awaitable[Response]]]] = [
+    ("/healthz", ["GET"], healthz),
+    ("/readyz", ["GET"], readyz),
+    ("/debug/slow-requests", ["GET"], debug_slow_requests),
+    ("/debug/profile", ["POST"], debug_profile),
+    ("/debug/event-loop", ["GET"], debug_event_loop),
+    ("/metrics", ["GET"], metrics),
+]
+
+# Registration order is the order clients list the tools in.
+TOOLS: list[Callable[..., Awaitable[Any]]] = [
+    search_hotel_offers,
+    plan_hotel_options,
+    compare_hotels,
+    compare_hotels_from_query,
+    suggest_locations,
+    create_booking_request,
+    cancel_booking,
+    get_booking_status,
+    discover_hotels,
+    get_availability,
+]
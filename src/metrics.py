@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import bisect
+import math
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+# Everything here is updated from the single event loop thread: plain int/float updates, no locks.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Sample = tuple[str, dict[str, str], float]
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], Any] = {}
+
+    def labels(self, *values: str) -> Any:
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    @property
+    def family(self) -> str:
+        return self.name
+
+    def samples(self) -> Iterator[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    @property
+    def family(self) -> str:
+        return f"{self.name}_total"
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def samples(self) -> Iterator[Sample]:
+        for values, child in self._children.items():
+            yield f"{self.name}_total", dict(zip(self.labelnames, values)), child.value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    @contextmanager
+    def time(self, *values: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.labels(*values).observe(time.perf_counter() - started)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def samples(self) -> Iterator[Sample]:
+        for values, child in self._children.items():
+            labels = dict(zip(self.labelnames, values))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), child.counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, child.sum
+            yield f"{self.name}_count", labels, child.count
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], Iterable[tuple[str, str, str, Iterable[Sample]]]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[tuple[str, str, str, Iterable[Sample]]]]) -> None:
+        """`collector()` yields (name, kind, documentation, samples) at scrape time, for state kept elsewhere."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        families = [(m.family, m.kind, m.documentation, m.samples()) for m in self._metrics.values()]
+        for collector in self._collectors:
+            families.extend(collector())
+        for name, kind, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric: Any) -> Any:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+REGISTRY = Registry()
+
+TOOL_LATENCY = REGISTRY.histogram("mcp_tool_duration_seconds", "MCP tool handler latency.", ("tool", "outcome"))
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "upstream_request_duration_seconds", "Upstream MCP call latency per attempt.", ("tool", "status")
+)
+UPSTREAM_RETRIES = REGISTRY.counter("upstream_retries", "Upstream attempts after the first.", ("tool",))
+UPSTREAM_UNPARSED = REGISTRY.counter("upstream_response_unparsed", "Upstream responses without a parseable result.", ("tool",))
+UPSTREAM_EXHAUSTED = REGISTRY.counter("upstream_call_exhausted", "Upstream calls that failed every attempt.", ("tool",))
+UPSTREAM_HEDGES = REGISTRY.counter("upstream_hedges", "Hedged upstream requests sent and won.", ("tool", "result"))
+HOTEL_CARD_IMAGES = REGISTRY.counter(
+    "hotel_card_image_source", "Hotel cards by image source (fallback = city stock photo).", ("provider", "image_source")
+)
+PROPERTY_MAPPINGS = REGISTRY.counter("property_mapping", "resolve_property results by mapping method.", ("method",))
+LOOP_BLOCKED = REGISTRY.counter("event_loop_blocked", "Stalls longer than LOOP_SLOW_CALLBACK_SECONDS.")
+LOG_DROPPED = REGISTRY.counter("log_records_dropped", "Log records not written, by reason.", ("reason",))
+TRACE_DROPPED = REGISTRY.counter("trace_spans_dropped", "Finished spans not exported because the export queue was full.")
+CACHE_WARM_RUNS = REGISTRY.counter("cache_warm_runs", "Cache warmer cycles by result.", ("result",))
+
+
+def cache_collector(caches: Callable[[], Iterable[Any]]) -> Callable[[], Iterable[tuple[str, str, str, Iterable[Sample]]]]:
+    """Scrape-time view of objects with `stats()` -> {name, hits, misses, size}; nothing is recorded per lookup."""
+
+    def collect() -> Iterable[tuple[str, str, str, Iterable[Sample]]]:
+        stats = [cache.stats() for cache in caches()]
+        requests = [
+            ("cache_requests_total", {"cache": item["name"], "result": result}, item[key])
+            for item in stats
+            for result, key in (("hit", "hits"), ("miss", "misses"))
+        ]
+        entries = [("cache_entries", {"cache": item["name"]}, item["size"]) for item in stats if "size" in item]
+        shared = [
+            ("shared_cache_requests_total", {"cache": item["name"], "result": result}, item[key])
+            for item in stats
+            if "shared_hits" in item
+            for result, key in (("hit", "shared_hits"), ("miss", "shared_misses"), ("error", "shared_errors"))
+        ]
+        return [
+            ("cache_requests_total", "counter", "Cache lookups by result.", requests),
+            ("cache_entries", "gauge", "Live cache entries.", entries),
+            ("shared_cache_requests_total", "counter", "Shared (L2) cache lookups and failed writes by result.", shared),
+        ]
+
+    return collect
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from typing import Literal
-from pydantic import BaseModel, Field, HttpUrl
+from collections.abc import Iterable, Mapping
+from typing import Any, Literal
+from pydantic import BaseModel, Field, HttpUrl, PrivateAttr
 
 
 class PricePreview(BaseModel):
@@ -41,6 +42,7 @@ class HotelCard(BaseModel):
     image_source: Literal["upstream", "fallback", "none"] = "none"
     pricing_source: Literal["upstream", "none"] = "none"
     top_offers: list[Offer] = Field(default_factory=list)
+    distance_km: float | None = None
 
 
 class SearchHotelsResponse(BaseModel):
@@ -49,6 +51,48 @@ class SearchHotelsResponse(BaseModel):
     metadata: dict = Field(default_factory=dict)
     hotels: list[HotelCard] = Field(default_factory=list)
 
+    # The card dicts from_trusted was given; to_payload returns them as-is.
+    _trusted_hotels: list[dict[str, Any]] | None = PrivateAttr(default=None)
+
+    @classmethod
+    def from_trusted(
+        cls,
+        *,
+        provider: str,
+        query: dict[str, Any],
+        metadata: dict[str, Any],
+        hotels: list[dict[str, Any]],
+    ) -> SearchHotelsResponse:
+        """Wrap `hotel_card_payload` dicts built from boundary-validated data, skipping validation.
+
+        `hotels` still holds HotelCard instances (built with model_construct), so attribute access works
+        the same as on a validated response.
+        """
+        cards = [_construct_card(hotel) for hotel in hotels]
+        response = cls.model_construct(provider=provider, query=query, metadata=metadata, hotels=cards)
+        response._trusted_hotels = hotels
+        return response
+
+    def to_payload(self) -> dict[str, Any]:
+        if self._trusted_hotels is not None:
+            return {
+                "provider": self.provider,
+                "query": dict(self.query),
+                "metadata": dict(self.metadata),
+                "hotels": list(self._trusted_hotels),
+            }
+        return self.model_dump(mode="json")
+
+
+def _construct_card(hotel: Mapping[str, Any]) -> HotelCard:
+    return HotelCard.model_construct(
+        **{
+            **hotel,
+            "price_preview": PricePreview.model_construct(**hotel["price_preview"]),
+            "top_offers": [Offer.model_construct(**offer) for offer in hotel.get("top_offers", ())],
+        }
+    )
+
 
 class HotelComparisonItem(BaseModel):
     property_id: str | None = None
@@ -70,6 +114,20 @@ class CompareHotelsResponse(BaseModel):
     comparison: list[HotelComparisonItem] = Field(default_factory=list)
 
 
+class LocationSuggestion(BaseModel):
+    location_id: str
+    city: str
+    country_code: str
+    hotel_count: int = 0
+
+
+class SuggestLocationsResponse(BaseModel):
+    query: str
+    resolved: LocationSuggestion | None = None
+    suggestions: list[LocationSuggestion] = Field(default_factory=list)
+    metadata: dict = Field(default_factory=dict)
+
+
 class GuestDetails(BaseModel):
     first_name: str
     last_name: str
@@ -114,3 +172,140 @@ class BookingStatusResponse(BaseModel):
     provider: str = "sigtrip"
     provider_reference: str | None = None
     message: str | None = None
+
+
+HOTEL_CARD_FIELDS = frozenset(HotelCard.model_fields)
+OFFER_FIELDS = frozenset(Offer.model_fields)
+COMPARISON_ITEM_FIELDS = frozenset(HotelComparisonItem.model_fields)
+
+# view="compact": identity, price and bookable offer ids only.
+COMPACT_HOTEL_FIELDS = frozenset({"hotel_id", "property_id", "name", "availability_status", "price_preview", "top_offers"})
+COMPACT_OFFER_FIELDS = frozenset({"offer_id", "room_name", "total_amount", "currency"})
+COMPACT_COMPARISON_FIELDS = frozenset(
+    {"hotel_id", "property_id", "name", "availability_status", "from_total", "currency", "rank_by_price"}
+)
+
+# Card fields filled from the upstream rooms + gallery calls, and those filled from the prices call.
+HOTEL_IMAGE_FIELDS = frozenset({"thumbnail_url", "image_urls", "image_source"})
+HOTEL_PRICE_FIELDS = frozenset({"price_preview", "top_offers", "availability_status", "pricing_source"})
+
+
+def project_payload(payload: dict[str, Any], fields: frozenset[str] | None) -> dict[str, Any]:
+    """Keep only `fields` (in model order); None keeps everything."""
+    if fields is None:
+        return payload
+    return {key: value for key, value in payload.items() if key in fields}
+
+
+# JSON-ready builders for data already validated at the upstream boundary. Each returns
+# exactly what the matching model's model_dump(mode="json") would, without the
+# validate/serialize round trip; tests/test_models.py keeps them in sync with the models.
+
+
+def price_preview_payload(
+    from_total: float | None = None,
+    from_nightly: float | None = None,
+    currency: str | None = None,
+    includes_taxes_fees: bool = True,
+) -> dict[str, Any]:
+    return {
+        "from_total": from_total,
+        "from_nightly": from_nightly,
+        "currency": currency,
+        "includes_taxes_fees": includes_taxes_fees,
+    }
+
+
+def offer_payload(
+    *,
+    offer_id: str,
+    room_name: str,
+    room_type: str | None = None,
+    total_amount: float | None = None,
+    nightly_amount: float | None = None,
+    currency: str | None = None,
+    category: str | None = None,
+    cancellation_policy: str | None = None,
+) -> dict[str, Any]:
+    return {
+        "offer_id": offer_id,
+        "room_type": room_type,
+        "room_name": room_name,
+        "total_amount": total_amount,
+        "nightly_amount": nightly_amount,
+        "currency": currency,
+        "category": category,
+        "cancellation_policy": cancellation_policy,
+    }
+
+
+def hotel_card_payload(
+    *,
+    hotel_id: str,
+    name: str,
+    location: str,
+    price_preview: dict[str, Any],
+    availability_status: Literal["available", "unavailable"],
+    property_id: str | None = None,
+    provider: str = "sigtrip",
+    provider_ids: Iterable[str] = (),
+    location_details: Mapping[str, Any] | None = None,
+    description: str | None = None,
+    amenities: Iterable[str] = (),
+    rating: Mapping[str, Any] | None = None,
+    booking_capabilities: Mapping[str, Any] | None = None,
+    thumbnail_url: str | None = None,
+    image_urls: Iterable[str] = (),
+    image_source: Literal["upstream", "fallback", "none"] = "none",
+    pricing_source: Literal["upstream", "none"] = "none",
+    top_offers: Iterable[dict[str, Any]] = (),
+    distance_km: float | None = None,
+) -> dict[str, Any]:
+    return {
+        "hotel_id": hotel_id,
+        "property_id": property_id,
+        "provider": provider,
+        "provider_ids": list(provider_ids),
+        "name": name,
+        "location": location,
+        "location_details": dict(location_details) if location_details is not None else None,
+        "description": description,
+        "amenities": list(amenities),
+        "rating": dict(rating) if rating is not None else None,
+        "booking_capabilities": dict(booking_capabilities) if booking_capabilities is not None else None,
+        "thumbnail_url": thumbnail_url,
+        "image_urls": list(image_urls),
+        "price_preview": price_preview,
+        "availability_status": availability_status,
+        "image_source": image_source,
+        "pricing_source": pricing_source,
+        "top_offers": list(top_offers),
+        "distance_km": distance_km,
+    }
+
+
+def comparison_item_payload(
+    *,
+    hotel_id: str,
+    name: str,
+    availability_status: Literal["available", "unavailable"],
+    property_id: str | None = None,
+    provider_ids: Iterable[str] = (),
+    from_total: float | None = None,
+    currency: str | None = None,
+    image_url: str | None = None,
+    offer_count: int = 0,
+    rank_by_price: int | None = None,
+) -> dict[str, Any]:
+    return {
+        "property_id": property_id,
+        "hotel_id": hotel_id,
+        "provider_ids": list(provider_ids),
+        "name": name,
+        "availability_status": availability_status,
+        "from_total": from_total,
+        "currency": currency,
+        "image_url": image_url,
+        "offer_count": offer_count,
+        "rank_by_price": rank_by_price,
+    }
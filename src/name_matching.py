@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterable
+
+
+def trigrams(normalized: str) -> frozenset[str]:
+    padded = f"  {normalized} "
+    return frozenset(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+class TrigramIndex:
+    """Inverted trigram index over normalized names, scored with the Dice coefficient."""
+
+    def __init__(self, entries: Iterable[tuple[str, str]] = ()):
+        self._keys: list[str] = []
+        self._sizes: list[int] = []
+        self._postings: dict[str, list[int]] = {}
+        for normalized, key in entries:
+            self.add(normalized, key)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, normalized: str, key: str) -> None:
+        grams = trigrams(normalized)
+        slot = len(self._keys)
+        self._keys.append(key)
+        self._sizes.append(len(grams))
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(slot)
+
+    def search(self, normalized: str, limit: int = 3, min_score: float = 0.0) -> list[tuple[float, str]]:
+        """Return up to `limit` (score, key) pairs, best first, one per key."""
+        grams = trigrams(normalized)
+        if not grams:
+            return []
+        overlap: Counter[int] = Counter()
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings:
+                overlap.update(postings)
+
+        best: dict[str, float] = {}
+        query_size = len(grams)
+        for slot, shared in overlap.items():
+            score = 2.0 * shared / (query_size + self._sizes[slot])
+            key = self._keys[slot]
+            if score >= min_score and score > best.get(key, -1.0):
+                best[key] = score
+        ranked = sorted(best.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(round(score, 3), key) for key, score in ranked]
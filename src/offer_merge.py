@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import re
+from collections.abc import Iterable, Mapping
+from typing import Any, NamedTuple
+
+# Offers from different providers are ranked in one currency; displayed amounts are never converted.
+OFFER_BASE_CURRENCY = os.getenv("OFFER_BASE_CURRENCY", "USD").upper()
+# USD per unit of each currency (override or extend with a JSON object in the same unit). Amounts are
+# converted to OFFER_BASE_CURRENCY through these: amount x rate[currency] / rate[OFFER_BASE_CURRENCY].
+DEFAULT_FX_RATES = {"USD": 1.0, "EUR": 1.08, "GBP": 1.27, "CAD": 0.73, "AUD": 0.66, "JPY": 0.0067, "CHF": 1.13}
+OFFER_FX_RATES: dict[str, float] = {
+    **DEFAULT_FX_RATES,
+    **{key.upper(): float(value) for key, value in json.loads(os.getenv("OFFER_FX_RATES", "{}")).items()},
+}
+OFFER_RANK_NONREFUNDABLE_PENALTY = float(os.getenv("OFFER_RANK_NONREFUNDABLE_PENALTY", "0.10"))
+OFFER_RANK_UNKNOWN_CANCELLATION_PENALTY = float(os.getenv("OFFER_RANK_UNKNOWN_CANCELLATION_PENALTY", "0.03"))
+OFFER_RANK_CONFIDENCE_WEIGHT = float(os.getenv("OFFER_RANK_CONFIDENCE_WEIGHT", "0.20"))
+
+_UNRANKED = float("inf")
+_NON_REFUNDABLE = re.compile(r"non[\s-]?refundable|no refund|not refundable|prepaid|pay now", re.IGNORECASE)
+_REFUNDABLE = re.compile(r"free cancell?ation|fully refundable|refundable|cancel (?:for free|without)", re.IGNORECASE)
+# Words that do not tell two room types apart ("King Room" == "Room, 1 King Bed").
+_ROOM_STOPWORDS = frozenset({"room", "rooms", "bed", "beds", "with", "and", "the", "a", "1", "one", "guest"})
+_ROOM_SYNONYMS = {"dbl": "double", "twn": "twin", "std": "standard", "dlx": "deluxe", "ste": "suite", "kng": "king", "qn": "queen"}
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+class RankingPolicy(NamedTuple):
+    """Effective price = base-currency total x (1 + cancellation penalty) x (1 + confidence weight x (1 - confidence)).
+
+    `provider_confidence` is the likelihood (0..1) that a provider's quoted availability holds; unknown providers get 1.
+    """
+
+    nonrefundable_penalty: float = OFFER_RANK_NONREFUNDABLE_PENALTY
+    unknown_cancellation_penalty: float = OFFER_RANK_UNKNOWN_CANCELLATION_PENALTY
+    confidence_weight: float = OFFER_RANK_CONFIDENCE_WEIGHT
+    provider_confidence: Mapping[str, float] = {}
+
+    def score(self, offer: Mapping[str, Any], provider: str) -> float:
+        base = to_base_currency(offer.get("total_amount"), offer.get("currency"))
+        if base is None:
+            return _UNRANKED
+        terms = cancellation_terms(offer.get("cancellation_policy"))
+        if terms == "nonrefundable":
+            base *= 1 + self.nonrefundable_penalty
+        elif terms == "unknown":
+            base *= 1 + self.unknown_cancellation_penalty
+        confidence = min(max(self.provider_confidence.get(provider, 1.0), 0.0), 1.0)
+        return base * (1 + self.confidence_weight * (1 - confidence))
+
+
+DEFAULT_POLICY = RankingPolicy()
+
+
+def to_base_currency(
+    amount: Any,
+    currency: Any,
+    rates: Mapping[str, float] = OFFER_FX_RATES,
+    base_currency: str = OFFER_BASE_CURRENCY,
+) -> float | None:
+    if amount is None:
+        return None
+    rate = rates.get(str(currency or base_currency).upper())
+    base_rate = rates.get(base_currency.upper())
+    # An amount in a currency we cannot convert cannot be ranked against the others.
+    if rate is None or not base_rate:
+        return None
+    return float(amount) * rate / base_rate
+
+
+def cancellation_terms(policy: Any) -> str:
+    if not isinstance(policy, str) or not policy.strip():
+        return "unknown"
+    if _NON_REFUNDABLE.search(policy):
+        return "nonrefundable"
+    if _REFUNDABLE.search(policy):
+        return "refundable"
+    return "unknown"
+
+
+def room_key(offer: Mapping[str, Any]) -> str:
+    """Provider-independent room identity: normalized words of the room name, order-insensitive."""
+    text = str(offer.get("room_name") or offer.get("room_type") or "").lower()
+    words = {_ROOM_SYNONYMS.get(word, word) for word in _WORD.findall(text)}
+    return " ".join(sorted(words - _ROOM_STOPWORDS)) or text
+
+
+def merge_offers(
+    offer_lists: Mapping[str, Iterable[Mapping[str, Any]]],
+    limit: int,
+    policy: RankingPolicy = DEFAULT_POLICY,
+) -> list[dict[str, Any]]:
+    """Best `limit` offers across providers, one per equivalent room (same cancellation terms).
+
+    Each provider's list is ranked on its own (they are short and usually already price-ordered), then the
+    lists are consumed through a k-way heap merge that stops as soon as `limit` distinct rooms are found:
+    O(n log n_p) for the per-provider sorts plus O(m log k) for the m offers actually pulled.
+    """
+    if limit <= 0:
+        return []
+    streams = [_ranked(index, provider, offers, policy) for index, (provider, offers) in enumerate(offer_lists.items())]
+    merged: list[dict[str, Any]] = []
+    seen: set[tuple[str, str]] = set()
+    for _score, _provider_rank, _position, offer in heapq.merge(*streams):
+        key = (room_key(offer), cancellation_terms(offer.get("cancellation_policy")))
+        if key in seen:
+            continue
+        seen.add(key)
+        merged.append(offer)
+        if len(merged) >= limit:
+            break
+    return merged
+
+
+def _ranked(
+    provider_rank: int, provider: str, offers: Iterable[Mapping[str, Any]], policy: RankingPolicy
+) -> list[tuple[float, int, int, dict[str, Any]]]:
+    # (score, provider rank, position) is unique, so ties never compare the offer dicts.
+    return sorted((policy.score(offer, provider), provider_rank, position, dict(offer)) for position, offer in enumerate(offers))
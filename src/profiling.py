@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import heapq
+import io
+import itertools
+import os
+import pstats
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+SLOW_REQUEST_LOG_SIZE = int(os.getenv("SLOW_REQUEST_LOG_SIZE", "50"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "30"))
+PROFILE_SAMPLE_INTERVAL_SECONDS = 0.005
+
+
+class StageTimings:
+    """Wall time per stage for one tool invocation; repeated stages accumulate."""
+
+    __slots__ = ("stages",)
+
+    def __init__(self) -> None:
+        self.stages: dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+
+_TIMINGS: ContextVar[StageTimings | None] = ContextVar("stage_timings", default=None)
+
+
+@contextmanager
+def track_stages() -> Iterator[StageTimings]:
+    timings = StageTimings()
+    token = _TIMINGS.set(timings)
+    try:
+        yield timings
+    finally:
+        _TIMINGS.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block into the current invocation's breakdown; free when no invocation is being tracked."""
+    timings = _TIMINGS.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+class SlowRequestLog:
+    """The `capacity` slowest invocations seen so far (min-heap, O(log n) insert)."""
+
+    def __init__(self, capacity: int = SLOW_REQUEST_LOG_SIZE):
+        self.capacity = capacity
+        self._heap: list[tuple[float, int, dict[str, Any]]] = []
+        self._order = itertools.count()
+
+    def record(self, tool: str, duration_seconds: float, outcome: str, stages: dict[str, float]) -> None:
+        if self.capacity <= 0:
+            return
+        if len(self._heap) >= self.capacity and duration_seconds <= self._heap[0][0]:
+            return
+        entry = {
+            "tool": tool,
+            "duration_ms": round(duration_seconds * 1000, 3),
+            "outcome": outcome,
+            "finished_at": time.time(),
+            "stages_ms": {name: round(seconds * 1000, 3) for name, seconds in stages.items()},
+        }
+        item = (duration_seconds, next(self._order), entry)
+        if len(self._heap) < self.capacity:
+            heapq.heappush(self._heap, item)
+        else:
+            heapq.heapreplace(self._heap, item)
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        return [entry for _, _, entry in sorted(self._heap, reverse=True)]
+
+    def clear(self) -> None:
+        self._heap.clear()
+
+
+SLOW_REQUESTS = SlowRequestLog()
+
+_profile_lock = asyncio.Lock()
+
+
+def profiler_busy() -> bool:
+    return _profile_lock.locked()
+
+
+async def run_profile(seconds: float, mode: str = "cprofile", limit: int = 40) -> dict[str, Any]:
+    """Profile the running event loop for `seconds` while it keeps serving requests."""
+    seconds = min(max(seconds, 0.1), PROFILE_MAX_SECONDS)
+    async with _profile_lock:
+        if mode == "sample":
+            return await _sample_stacks(seconds, limit)
+        return await _cprofile(seconds, limit)
+
+
+async def _cprofile(seconds: float, limit: int) -> dict[str, Any]:
+    # cProfile hooks the current thread, which is the loop thread: every callback in the window is captured.
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.disable()
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+    return {"mode": "cprofile", "seconds": seconds, "stats": out.getvalue()}
+
+
+async def _sample_stacks(seconds: float, limit: int) -> dict[str, Any]:
+    loop_thread_id = threading.get_ident()
+    stacks: Counter[str] = Counter()
+    stop = threading.Event()
+
+    def sampler() -> None:
+        while not stop.wait(PROFILE_SAMPLE_INTERVAL_SECONDS):
+            frame = sys._current_frames().get(loop_thread_id)
+            if frame is None:
+                continue
+            summary = traceback.extract_stack(frame)
+            stacks[";".join(f"{entry.name} ({os.path.basename(entry.filename)}:{entry.lineno})" for entry in summary)] += 1
+
+    thread = threading.Thread(target=sampler, name="loop-stack-sampler", daemon=True)
+    thread.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        stop.set()
+        # The sampler wakes at least every interval, so this join is bounded.
+        thread.join(timeout=1.0)
+    total = sum(stacks.values())
+    return {
+        "mode": "sample",
+        "seconds": seconds,
+        "samples": total,
+        "interval_ms": PROFILE_SAMPLE_INTERVAL_SECONDS * 1000,
+        "top_stacks": [{"stack": stack, "samples": count} for stack, count in stacks.most_common(limit)],
+    }
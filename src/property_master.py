@@ -1,8 +1,21 @@
 from __future__ import annotations
 
+import asyncio
+import datetime as dt
 import re
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Mapping
 from dataclasses import dataclass
-from typing import Any
+from functools import lru_cache
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Generic, TypeVar
+
+from src.metrics import PROPERTY_MAPPINGS
+from src.name_matching import TrigramIndex
+
+if TYPE_CHECKING:
+    from src.property_store import SqlitePropertyStore
 
 
 @dataclass(frozen=True)
@@ -20,6 +33,8 @@ class PropertyRecord:
     pay_at_hotel: bool = True
     requires_stripe_token: bool = True
     aliases: tuple[str, ...] = ()
+    latitude: float | None = None
+    longitude: float | None = None
 
 
 PROPERTY_MASTER: dict[str, PropertyRecord] = {
@@ -37,6 +52,8 @@ PROPERTY_MASTER: dict[str, PropertyRecord] = {
         pay_at_hotel=True,
         requires_stripe_token=True,
         aliases=("rally hotel",),
+        latitude=39.7547,
+        longitude=-104.9958,
     ),
     "prop_us_nyc_clubq_grand_central": PropertyRecord(
         property_id="prop_us_nyc_clubq_grand_central",
@@ -52,6 +69,8 @@ PROPERTY_MASTER: dict[str, PropertyRecord] = {
         pay_at_hotel=True,
         requires_stripe_token=True,
         aliases=("club quarters grand central",),
+        latitude=40.7532,
+        longitude=-73.9741,
     ),
     "prop_uk_london_clubq_trafalgar": PropertyRecord(
         property_id="prop_uk_london_clubq_trafalgar",
@@ -67,6 +86,8 @@ PROPERTY_MASTER: dict[str, PropertyRecord] = {
         pay_at_hotel=True,
         requires_stripe_token=True,
         aliases=("club quarters trafalgar square",),
+        latitude=51.5068,
+        longitude=-0.1256,
     ),
 }
 
@@ -78,21 +99,95 @@ PROVIDER_TO_PROPERTY: dict[str, str] = {
 }
 
 
+# Dice scores over name trigrams, scoped to one city.
+FUZZY_MATCH_MIN_SCORE = 0.6
+FUZZY_AUTO_ACCEPT_SCORE = 0.85
+FUZZY_REVIEW_MIN_SCORE = 0.35
+MAPPING_REVIEW_QUEUE_SIZE = 1000
+
+_PropertyIndex = tuple[dict[str, Mapping[str, Any]], dict[tuple[str, str], str], dict[str, TrigramIndex]]
+_REVIEW_QUEUE: OrderedDict[str, dict[str, Any]] = OrderedDict()
+_REVIEW_QUEUE_LOCK = threading.Lock()
+
+
+def rebuild_property_index() -> None:
+    """Rebuild lookup tables after PROPERTY_MASTER changes; readers switch over atomically."""
+    global _INDEX, _INDEX_GENERATION
+    _INDEX = _build_index(PROPERTY_MASTER)
+    _INDEX_GENERATION += 1
+
+
 def resolve_property(
     *,
     provider_hotel_id: str,
     hotel_name: str,
     city: str,
     country_code: str = "US",
-) -> tuple[dict[str, Any], dict[str, Any]]:
+) -> tuple[Mapping[str, Any], dict[str, Any]]:
+    profile, mapping = _resolve_property(provider_hotel_id, hotel_name, city, country_code)
+    PROPERTY_MAPPINGS.labels(mapping["method"]).inc()
+    return profile, mapping
+
+
+async def resolve_property_async(
+    *,
+    provider_hotel_id: str,
+    hotel_name: str,
+    city: str,
+    country_code: str = "US",
+) -> tuple[Mapping[str, Any], dict[str, Any]]:
+    """resolve_property for the event loop: answered from the DB store's LRU when possible, else in a thread."""
+    store = _property_store()
+    if store is None:
+        # Static dicts and trigram indexes only; nothing here blocks.
+        return resolve_property(
+            provider_hotel_id=provider_hotel_id, hotel_name=hotel_name, city=city, country_code=country_code
+        )
+    profile = store.cached_provider_id(provider_hotel_id)
+    if profile is not None:
+        PROPERTY_MAPPINGS.labels("provider_id_map").inc()
+        return profile, {"method": "provider_id_map", "confidence": 1.0, "source": "db"}
+    return await asyncio.to_thread(
+        resolve_property,
+        provider_hotel_id=provider_hotel_id,
+        hotel_name=hotel_name,
+        city=city,
+        country_code=country_code,
+    )
+
+
+def _resolve_property(
+    provider_hotel_id: str,
+    hotel_name: str,
+    city: str,
+    country_code: str,
+) -> tuple[Mapping[str, Any], dict[str, Any]]:
+    store = _property_store()
+    if store is not None:
+        profile = store.lookup_provider_id(provider_hotel_id)
+        if profile is not None:
+            return profile, {"method": "provider_id_map", "confidence": 1.0, "source": "db"}
+        profile = store.lookup_name_city(hotel_name, city)
+        if profile is not None:
+            return profile, {"method": "name_city_match", "confidence": 0.75, "source": "db"}
+
+    profiles = _INDEX[0]
     if provider_hotel_id in PROVIDER_TO_PROPERTY:
         property_id = PROVIDER_TO_PROPERTY[provider_hotel_id]
-        record = PROPERTY_MASTER[property_id]
-        return _record_to_profile(record), {"method": "provider_id_map", "confidence": 1.0}
+        return profiles[property_id], {"method": "provider_id_map", "confidence": 1.0}
 
     candidate = _find_by_name_city(hotel_name, city)
     if candidate is not None:
-        return _record_to_profile(candidate), {"method": "name_city_match", "confidence": 0.75}
+        return profiles[candidate.property_id], {"method": "name_city_match", "confidence": 0.75}
+
+    candidates = _fuzzy_candidates(hotel_name, city, store)
+    if candidates and candidates[0][0] >= FUZZY_MATCH_MIN_SCORE:
+        score, profile = candidates[0]
+        if score < FUZZY_AUTO_ACCEPT_SCORE:
+            _queue_for_review(provider_hotel_id, hotel_name, city, candidates, "matched_low_confidence", store)
+        return profile, {"method": "fuzzy_name_match", "confidence": round(0.75 * score, 3), "score": score}
+    if candidates:
+        _queue_for_review(provider_hotel_id, hotel_name, city, candidates, "unmatched", store)
 
     fallback = {
         "property_id": _fallback_property_id(hotel_name, city),
@@ -114,47 +209,208 @@ def resolve_property(
     return fallback, {"method": "fallback_generated", "confidence": 0.2}
 
 
+def property_id_for_provider(provider_hotel_id: str) -> str | None:
+    """Mapped canonical id for a provider hotel id (DB first, then static map); no fuzzy matching."""
+    store = _property_store()
+    if store is not None:
+        profile = store.lookup_provider_id(provider_hotel_id)
+        if profile is not None:
+            return profile["property_id"]
+    return PROVIDER_TO_PROPERTY.get(provider_hotel_id)
+
+
+def catalog_version() -> tuple[Any, ...]:
+    """Changes whenever the static index is rebuilt, the DB path changes, or the DB reloads."""
+    store = _property_store()
+    if store is None:
+        return (_INDEX_GENERATION, None, None)
+    return (_INDEX_GENERATION, str(store.path), store.reloads)
+
+
+def iter_catalog_records() -> list[PropertyRecord]:
+    """Static records overlaid with DB records (DB wins per property_id)."""
+    records: dict[str, PropertyRecord] = dict(PROPERTY_MASTER)
+    store = _property_store()
+    if store is not None:
+        for record, _provider_ids in store.iter_records():
+            records[record.property_id] = record
+    return list(records.values())
+
+
+_T = TypeVar("_T")
+
+
+class CatalogIndex(Generic[_T]):
+    """An index built from iter_catalog_records(), rebuilt when catalog_version() changes.
+
+    On the event loop a stale index keeps serving while one background thread builds the next and swaps
+    it in; `refresh()` awaits a current index without blocking the loop. Outside a loop (scripts, tests)
+    `get()` rebuilds inline.
+    """
+
+    def __init__(self, build: Callable[[Iterable[PropertyRecord]], _T], name: str):
+        self._build = build
+        self._name = name
+        self._current: tuple[tuple[Any, ...], _T] | None = None
+        self._build_lock = threading.Lock()
+
+    def get(self) -> _T:
+        current = self._current
+        if current is not None and current[0] == catalog_version():
+            return current[1]
+        if current is None or not _on_event_loop():
+            return self._rebuild()
+        if not self._build_lock.locked():
+            threading.Thread(target=self._rebuild, name=f"{self._name}-rebuild", daemon=True).start()
+        return current[1]
+
+    async def refresh(self) -> _T:
+        current = self._current
+        if current is not None and current[0] == catalog_version():
+            return current[1]
+        return await asyncio.to_thread(self._rebuild)
+
+    def _rebuild(self) -> _T:
+        with self._build_lock:
+            version = catalog_version()
+            current = self._current
+            if current is None or current[0] != version:
+                current = self._current = (version, self._build(iter_catalog_records()))
+            return current[1]
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def pending_mapping_reviews() -> list[dict[str, Any]]:
+    """Low-confidence or near-miss mappings awaiting manual review, oldest first."""
+    with _REVIEW_QUEUE_LOCK:
+        return [dict(entry) for entry in _REVIEW_QUEUE.values()]
+
+
+def _fuzzy_candidates(
+    hotel_name: str,
+    city: str,
+    store: SqlitePropertyStore | None,
+) -> list[tuple[float, Mapping[str, Any]]]:
+    name_norm, city_norm = _norm(hotel_name), _norm(city)
+    profiles, _by_name_city, trigram_by_city = _INDEX
+    scored: dict[str, tuple[float, Mapping[str, Any]]] = {}
+    if store is not None:
+        for score, profile in store.fuzzy_candidates(name_norm, city_norm, min_score=FUZZY_REVIEW_MIN_SCORE):
+            scored[profile["property_id"]] = (score, profile)
+    trigram_index = trigram_by_city.get(city_norm)
+    if trigram_index is not None:
+        for score, property_id in trigram_index.search(name_norm, min_score=FUZZY_REVIEW_MIN_SCORE):
+            if score > scored.get(property_id, (-1.0,))[0]:
+                scored[property_id] = (score, profiles[property_id])
+    return sorted(scored.values(), key=lambda item: -item[0])
+
+
+def _queue_for_review(
+    provider_hotel_id: str,
+    hotel_name: str,
+    city: str,
+    candidates: list[tuple[float, Mapping[str, Any]]],
+    decision: str,
+    store: SqlitePropertyStore | None,
+) -> None:
+    entry = {
+        "provider_hotel_id": provider_hotel_id,
+        "hotel_name": hotel_name,
+        "city": city,
+        "decision": decision,
+        "candidates": [{"property_id": profile["property_id"], "score": score} for score, profile in candidates],
+        "queued_at": dt.datetime.now(dt.timezone.utc).isoformat(),
+    }
+    with _REVIEW_QUEUE_LOCK:
+        if provider_hotel_id in _REVIEW_QUEUE:
+            return
+        _REVIEW_QUEUE[provider_hotel_id] = entry
+        if len(_REVIEW_QUEUE) > MAPPING_REVIEW_QUEUE_SIZE:
+            _REVIEW_QUEUE.popitem(last=False)
+    if store is not None:
+        store.enqueue_review(entry)
+
+
+def _property_store() -> SqlitePropertyStore | None:
+    # Imported lazily: the store module builds on PropertyRecord and the helpers below.
+    from src.property_store import get_property_store
+
+    return get_property_store()
+
+
 def _find_by_name_city(hotel_name: str, city: str) -> PropertyRecord | None:
-    target_name = _norm(hotel_name)
-    target_city = _norm(city)
-    for record in PROPERTY_MASTER.values():
-        names = [_norm(record.name), *[_norm(alias) for alias in record.aliases]]
-        if target_city == _norm(record.city) and target_name in names:
-            return record
-    return None
+    property_id = _INDEX[1].get((_norm(city), _norm(hotel_name)))
+    return PROPERTY_MASTER.get(property_id) if property_id is not None else None
+
 
+def _build_index(records: dict[str, PropertyRecord]) -> _PropertyIndex:
+    profiles: dict[str, Mapping[str, Any]] = {}
+    by_name_city: dict[tuple[str, str], str] = {}
+    trigram_by_city: dict[str, TrigramIndex] = {}
+    for property_id, record in records.items():
+        profiles[property_id] = _record_to_profile(record)
+        city = _norm(record.city)
+        trigram_index = trigram_by_city.setdefault(city, TrigramIndex())
+        for name in (record.name, *record.aliases):
+            # First record wins on collisions, matching the old linear scan order.
+            by_name_city.setdefault((city, _norm(name)), record.property_id)
+            trigram_index.add(_norm(name), record.property_id)
+    return profiles, by_name_city, trigram_by_city
 
-def _record_to_profile(record: PropertyRecord) -> dict[str, Any]:
+
+def _record_to_profile(record: PropertyRecord) -> Mapping[str, Any]:
     rating = None
     if record.rating_score is not None:
-        rating = {"score": record.rating_score, "provider": record.rating_provider}
+        rating = MappingProxyType({"score": record.rating_score, "provider": record.rating_provider})
 
-    return {
-        "property_id": record.property_id,
-        "name": record.name,
-        "location_details": {
-            "address": record.address,
-            "city": record.city,
-            "country_code": record.country_code,
-        },
-        "description": record.description,
-        "amenities": list(record.amenities),
-        "rating": rating,
-        "booking_capabilities": {
-            "instant_confirmation": record.instant_confirmation,
-            "pay_at_hotel": record.pay_at_hotel,
-            "requires_stripe_token": record.requires_stripe_token,
-        },
-    }
+    # Profiles are shared across requests, so every nested container is read-only.
+    return MappingProxyType(
+        {
+            "property_id": record.property_id,
+            "name": record.name,
+            "location_details": MappingProxyType(
+                {
+                    "address": record.address,
+                    "city": record.city,
+                    "country_code": record.country_code,
+                }
+            ),
+            "description": record.description,
+            "amenities": tuple(record.amenities),
+            "rating": rating,
+            "booking_capabilities": MappingProxyType(
+                {
+                    "instant_confirmation": record.instant_confirmation,
+                    "pay_at_hotel": record.pay_at_hotel,
+                    "requires_stripe_token": record.requires_stripe_token,
+                }
+            ),
+        }
+    )
 
 
 def _fallback_property_id(hotel_name: str, city: str) -> str:
     return f"prop_unmapped_{_slug(city)}_{_slug(hotel_name)}"
 
 
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
 def _slug(value: str) -> str:
-    return re.sub(r"[^a-z0-9]+", "_", value.lower()).strip("_")
+    return _NON_ALNUM_RE.sub("_", value.lower()).strip("_")
 
 
+@lru_cache(maxsize=4096)
 def _norm(value: str) -> str:
-    return re.sub(r"[^a-z0-9]+", " ", value.lower()).strip()
+    return _NON_ALNUM_RE.sub(" ", value.lower()).strip()
+
+
+_INDEX: _PropertyIndex = _build_index(PROPERTY_MASTER)
+_INDEX_GENERATION = 0
@@ -0,0 +1,563 @@
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from src.name_matching import TrigramIndex
+from src.property_master import PropertyRecord, _norm, _record_to_profile
+
+PROPERTY_MASTER_DB_PATH = os.getenv("PROPERTY_MASTER_DB_PATH") or None
+PROPERTY_MASTER_CACHE_SIZE = int(os.getenv("PROPERTY_MASTER_CACHE_SIZE", "10000"))
+PROPERTY_MASTER_RELOAD_SECONDS = float(os.getenv("PROPERTY_MASTER_RELOAD_SECONDS", "5"))
+IMPORT_BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS properties (
+    property_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    city TEXT NOT NULL,
+    country_code TEXT NOT NULL,
+    address TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    amenities TEXT NOT NULL DEFAULT '[]',
+    rating_score REAL,
+    rating_provider TEXT,
+    instant_confirmation INTEGER NOT NULL DEFAULT 0,
+    pay_at_hotel INTEGER NOT NULL DEFAULT 1,
+    requires_stripe_token INTEGER NOT NULL DEFAULT 1,
+    latitude REAL,
+    longitude REAL
+);
+CREATE TABLE IF NOT EXISTS provider_property_mappings (
+    provider_hotel_id TEXT PRIMARY KEY,
+    property_id TEXT NOT NULL REFERENCES properties(property_id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_provider_property_mappings_property
+    ON provider_property_mappings(property_id);
+CREATE TABLE IF NOT EXISTS property_aliases (
+    property_id TEXT NOT NULL REFERENCES properties(property_id) ON DELETE CASCADE,
+    alias TEXT NOT NULL,
+    city_norm TEXT NOT NULL,
+    alias_norm TEXT NOT NULL,
+    PRIMARY KEY (property_id, alias_norm)
+);
+CREATE INDEX IF NOT EXISTS idx_property_aliases_city_alias
+    ON property_aliases(city_norm, alias_norm);
+"""
+
+# Kept in a sibling file: a write to the catalog DB bumps its PRAGMA data_version, which makes every worker
+# drop its lookup cache and rebuild its location and geo indexes.
+_REVIEW_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mapping_review_queue (
+    provider_hotel_id TEXT PRIMARY KEY,
+    hotel_name TEXT NOT NULL,
+    city TEXT NOT NULL,
+    decision TEXT NOT NULL,
+    candidates TEXT NOT NULL DEFAULT '[]',
+    queued_at TEXT NOT NULL
+);
+"""
+
+_PROPERTY_COLUMNS = (
+    "property_id, name, city, country_code, address, description, amenities, rating_score, "
+    "rating_provider, instant_confirmation, pay_at_hotel, requires_stripe_token, latitude, longitude"
+)
+
+# Upsert in place: REPLACE would delete the row and cascade away its provider mappings.
+_PROPERTY_UPSERT_SET = ", ".join(
+    f"{column} = excluded.{column}" for column in _PROPERTY_COLUMNS.replace(" ", "").split(",")[1:]
+)
+
+# Columns added after the first schema version; ALTERed into existing DB files on open.
+_ADDED_PROPERTY_COLUMNS = (("latitude", "REAL"), ("longitude", "REAL"))
+
+_MISS = object()
+
+
+class _LruCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[Any, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Any) -> Any:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return _MISS
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: Any) -> Any:
+        """Like get, but a miss is not counted (the caller falls back to a counted lookup)."""
+        value = self._data.get(key, _MISS)
+        if value is not _MISS:
+            self._data.move_to_end(key)
+            self.hits += 1
+        return value
+
+    def put(self, key: Any, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class SqlitePropertyStore:
+    """SQLite-backed property master with a read-through LRU and change detection."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        cache_size: int = PROPERTY_MASTER_CACHE_SIZE,
+        reload_interval_seconds: float = PROPERTY_MASTER_RELOAD_SECONDS,
+    ):
+        self.path = Path(path)
+        self.reload_interval_seconds = reload_interval_seconds
+        self._cache = _LruCache(cache_size)
+        self._conn: sqlite3.Connection | None = None
+        self._file_signature: tuple[int, int] | None = None
+        self._data_version: int | None = None
+        self._next_check = 0.0
+        self.reloads = 0
+        self.review_path = self.path.with_name(f"{self.path.stem}.review{self.path.suffix}")
+        self._review_conn: sqlite3.Connection | None = None
+        self._review_writer: ThreadPoolExecutor | None = None
+        self._review_lock = threading.Lock()
+        self._pending_reviews: list[Mapping[str, Any]] = []
+        # Lookups run on worker threads (and the catalog indexes rebuild on their own), so the shared
+        # connection, the LRU and the change detection state are only touched under this lock.
+        self._lock = threading.RLock()
+
+    def cached_provider_id(self, provider_hotel_id: str) -> Mapping[str, Any] | None:
+        """LRU profile for a provider id, or None whenever answering would need the database.
+
+        Never blocks: safe to call on the event loop before falling back to `lookup_provider_id` in a thread.
+        """
+        if self._conn is None or time.monotonic() >= self._next_check:
+            return None
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            profile = self._cache.peek(("provider_id", provider_hotel_id))
+        finally:
+            self._lock.release()
+        return None if profile is _MISS else profile
+
+    def lookup_provider_id(self, provider_hotel_id: str) -> Mapping[str, Any] | None:
+        key = ("provider_id", provider_hotel_id)
+        return self._cached(
+            key,
+            "SELECT p.* FROM provider_property_mappings m JOIN properties p USING (property_id) "
+            "WHERE m.provider_hotel_id = ?",
+            (provider_hotel_id,),
+        )
+
+    def lookup_name_city(self, hotel_name: str, city: str) -> Mapping[str, Any] | None:
+        city_norm, name_norm = _norm(city), _norm(hotel_name)
+        return self._cached(
+            ("name_city", city_norm, name_norm),
+            "SELECT p.* FROM property_aliases a JOIN properties p USING (property_id) "
+            "WHERE a.city_norm = ? AND a.alias_norm = ? ORDER BY p.rowid LIMIT 1",
+            (city_norm, name_norm),
+        )
+
+    def lookup_property_id(self, property_id: str) -> Mapping[str, Any] | None:
+        return self._cached(("property_id", property_id), "SELECT * FROM properties WHERE property_id = ?", (property_id,))
+
+    def fuzzy_candidates(
+        self,
+        name_norm: str,
+        city_norm: str,
+        limit: int = 3,
+        min_score: float = 0.0,
+    ) -> list[tuple[float, Mapping[str, Any]]]:
+        """Score aliases in one city against `name_norm` via a per-city trigram index held in the LRU."""
+        key = ("trigram_city", city_norm)
+        with self._lock:
+            self._check_for_changes()
+            trigram_index = self._cache.get(key)
+            if trigram_index is _MISS:
+                rows = self._connection().execute(
+                    "SELECT alias_norm, property_id FROM property_aliases WHERE city_norm = ?",
+                    (city_norm,),
+                )
+                trigram_index = TrigramIndex((alias_norm, property_id) for alias_norm, property_id in rows)
+                self._cache.put(key, trigram_index)
+
+        candidates: list[tuple[float, Mapping[str, Any]]] = []
+        for score, property_id in trigram_index.search(name_norm, limit=limit, min_score=min_score):
+            profile = self.lookup_property_id(property_id)
+            if profile is not None:
+                candidates.append((score, profile))
+        return candidates
+
+    def enqueue_review(self, entry: Mapping[str, Any]) -> None:
+        """Queue a review decision; a background thread writes the pending ones to `review_path` in one batch."""
+        with self._review_lock:
+            self._pending_reviews.append(entry)
+            if len(self._pending_reviews) > 1:
+                return  # a flush is already scheduled and will pick this one up
+        if self._review_writer is None:
+            self._review_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="property-review")
+        self._review_writer.submit(self._flush_reviews)
+
+    def iter_records(self) -> Iterator[tuple[PropertyRecord, tuple[str, ...]]]:
+        """Yield every record with its provider ids, ordered by insertion."""
+        with self._lock:
+            conn = self._connection()
+            provider_ids: dict[str, list[str]] = {}
+            for provider_hotel_id, property_id in conn.execute(
+                "SELECT provider_hotel_id, property_id FROM provider_property_mappings"
+            ):
+                provider_ids.setdefault(property_id, []).append(provider_hotel_id)
+            # One grouped alias query for the whole catalog instead of one per property.
+            aliases: dict[str, list[tuple[str, str]]] = {}
+            for property_id, alias, alias_norm in conn.execute(
+                "SELECT property_id, alias, alias_norm FROM property_aliases ORDER BY rowid"
+            ):
+                aliases.setdefault(property_id, []).append((alias, alias_norm))
+            rows = conn.execute("SELECT * FROM properties ORDER BY rowid").fetchall()
+        for row in rows:
+            record = _row_to_record(row, aliases.get(row["property_id"], ()))
+            yield record, tuple(provider_ids.get(record.property_id, ()))
+
+    def import_rows(self, rows: Iterable[Mapping[str, Any]]) -> int:
+        """Upsert property rows in batches; aliases and provider ids are replaced per property."""
+        with self._lock:
+            conn = self._connection()
+            imported = 0
+            batch: list[Mapping[str, Any]] = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    imported += self._write_batch(conn, batch)
+                    batch = []
+            if batch:
+                imported += self._write_batch(conn, batch)
+            self.reload()
+        return imported
+
+    def import_file(self, path: str | Path) -> int:
+        source = Path(path)
+        if source.suffix.lower() == ".csv":
+            return self.import_rows(_iter_csv_rows(source))
+        if source.suffix.lower() in (".jsonl", ".ndjson"):
+            return self.import_rows(_iter_jsonl_rows(source))
+        raise ValueError(f"Unsupported property master import format: {source.suffix or source.name}")
+
+    def reload(self) -> None:
+        """Drop cached lookups and reopen the database (e.g. after the file was replaced)."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._cache.clear()
+            self._file_signature = None
+            self._data_version = None
+            self._next_check = 0.0
+            self.reloads += 1
+
+    def cache_stats(self) -> dict[str, int]:
+        return {"hits": self._cache.hits, "misses": self._cache.misses, "reloads": self.reloads}
+
+    def stats(self) -> dict[str, Any]:
+        return {"name": "property_master", "size": len(self._cache), **self.cache_stats()}
+
+    def close(self) -> None:
+        if self._review_writer is not None:
+            self._review_writer.shutdown(wait=True)
+            self._review_writer = None
+        if self._review_conn is not None:
+            self._review_conn.close()
+            self._review_conn = None
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _cached(self, key: tuple[str, ...], sql: str, params: tuple[Any, ...]) -> Mapping[str, Any] | None:
+        with self._lock:
+            self._check_for_changes()
+            cached = self._cache.get(key)
+            if cached is not _MISS:
+                return cached
+            conn = self._connection()
+            row = conn.execute(sql, params).fetchone()
+            profile = None
+            if row is not None:
+                aliases = conn.execute(
+                    "SELECT alias, alias_norm FROM property_aliases WHERE property_id = ? ORDER BY rowid",
+                    (row["property_id"],),
+                ).fetchall()
+                profile = _record_to_profile(_row_to_record(row, aliases))
+            self._cache.put(key, profile)
+            return profile
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(_SCHEMA)
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(properties)")}
+            for column, column_type in _ADDED_PROPERTY_COLUMNS:
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE properties ADD COLUMN {column} {column_type}")
+            self._conn = conn
+            self._file_signature = self._stat_signature()
+            self._data_version = self._read_data_version()
+        return self._conn
+
+    def _flush_reviews(self) -> None:
+        # Runs on the writer thread, the only user of the review connection.
+        with self._review_lock:
+            entries, self._pending_reviews = self._pending_reviews, []
+        rows = [
+            (
+                entry["provider_hotel_id"],
+                entry["hotel_name"],
+                entry["city"],
+                entry["decision"],
+                json.dumps(entry.get("candidates", [])),
+                entry["queued_at"],
+            )
+            for entry in entries
+        ]
+        try:
+            if self._review_conn is None:
+                self._review_conn = sqlite3.connect(self.review_path, check_same_thread=False)
+                self._review_conn.executescript(_REVIEW_SCHEMA)
+            with self._review_conn:
+                self._review_conn.executemany(
+                    "INSERT OR REPLACE INTO mapping_review_queue "
+                    "(provider_hotel_id, hotel_name, city, decision, candidates, queued_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+        except sqlite3.Error as exc:
+            logger.warning("mapping_review_write_failed", extra={"path": str(self.review_path), "error": str(exc)})
+
+    def _check_for_changes(self) -> None:
+        # Throttled so steady-state lookups stay a dict hit; detects both in-place
+        # writes from other connections (data_version) and a swapped-in file (inode/mtime).
+        now = time.monotonic()
+        if self._conn is None or now < self._next_check:
+            return
+        self._next_check = now + self.reload_interval_seconds
+        if self._stat_signature() != self._file_signature:
+            logger.info("property_master_db_replaced", extra={"path": str(self.path)})
+            self.reload()
+            return
+        data_version = self._read_data_version()
+        if data_version != self._data_version:
+            self._data_version = data_version
+            self._cache.clear()
+            self.reloads += 1
+
+    def _stat_signature(self) -> tuple[int, int] | None:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _read_data_version(self) -> int | None:
+        if self._conn is None:
+            return None
+        return int(self._conn.execute("PRAGMA data_version").fetchone()[0])
+
+    def _write_batch(self, conn: sqlite3.Connection, rows: list[Mapping[str, Any]]) -> int:
+        properties: list[tuple[Any, ...]] = []
+        aliases: list[tuple[str, str, str, str]] = []
+        mappings: list[tuple[str, str]] = []
+        for row in rows:
+            property_id = str(row.get("property_id") or "").strip()
+            name = str(row.get("name") or "").strip()
+            city = str(row.get("city") or "").strip()
+            if not property_id or not name or not city:
+                logger.warning("property_import_row_skipped", extra={"property_id": property_id or None})
+                continue
+            rating_score = _to_optional_float(row.get("rating_score"))
+            properties.append(
+                (
+                    property_id,
+                    name,
+                    city,
+                    str(row.get("country_code") or "US").upper(),
+                    str(row.get("address") or ""),
+                    str(row.get("description") or ""),
+                    json.dumps(_to_list(row.get("amenities"))),
+                    rating_score,
+                    row.get("rating_provider") or None,
+                    int(_to_bool(row.get("instant_confirmation"), False)),
+                    int(_to_bool(row.get("pay_at_hotel"), True)),
+                    int(_to_bool(row.get("requires_stripe_token"), True)),
+                    _to_optional_float(row.get("latitude")),
+                    _to_optional_float(row.get("longitude")),
+                )
+            )
+            city_norm = _norm(city)
+            for alias in (name, *_to_list(row.get("aliases"))):
+                aliases.append((property_id, alias, city_norm, _norm(alias)))
+            for provider_hotel_id in _to_list(row.get("provider_ids")):
+                mappings.append((provider_hotel_id, property_id))
+
+        with conn:
+            conn.executemany(
+                f"INSERT INTO properties ({_PROPERTY_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                f"ON CONFLICT(property_id) DO UPDATE SET {_PROPERTY_UPSERT_SET}",
+                properties,
+            )
+            property_ids = [(item[0],) for item in properties]
+            conn.executemany("DELETE FROM property_aliases WHERE property_id = ?", property_ids)
+            conn.executemany("DELETE FROM provider_property_mappings WHERE property_id = ?", property_ids)
+            conn.executemany(
+                "INSERT OR IGNORE INTO property_aliases (property_id, alias, city_norm, alias_norm) VALUES (?, ?, ?, ?)",
+                aliases,
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO provider_property_mappings (provider_hotel_id, property_id) VALUES (?, ?)",
+                mappings,
+            )
+        return len(properties)
+
+
+def _row_to_record(row: sqlite3.Row, aliases: Iterable[tuple[str, str]]) -> PropertyRecord:
+    # `aliases` are (alias, alias_norm) pairs; the name itself is stored as an alias for lookups.
+    name_norm = _norm(row["name"])
+    return PropertyRecord(
+        property_id=row["property_id"],
+        name=row["name"],
+        city=row["city"],
+        country_code=row["country_code"],
+        address=row["address"],
+        description=row["description"],
+        amenities=list(json.loads(row["amenities"] or "[]")),
+        rating_score=row["rating_score"],
+        rating_provider=row["rating_provider"],
+        instant_confirmation=bool(row["instant_confirmation"]),
+        pay_at_hotel=bool(row["pay_at_hotel"]),
+        requires_stripe_token=bool(row["requires_stripe_token"]),
+        aliases=tuple(alias for alias, alias_norm in aliases if alias_norm != name_norm),
+        latitude=row["latitude"],
+        longitude=row["longitude"],
+    )
+
+
+def record_to_row(record: PropertyRecord, provider_ids: Iterable[str] = ()) -> dict[str, Any]:
+    return {
+        "property_id": record.property_id,
+        "name": record.name,
+        "city": record.city,
+        "country_code": record.country_code,
+        "address": record.address,
+        "description": record.description,
+        "amenities": list(record.amenities),
+        "rating_score": record.rating_score,
+        "rating_provider": record.rating_provider,
+        "instant_confirmation": record.instant_confirmation,
+        "pay_at_hotel": record.pay_at_hotel,
+        "requires_stripe_token": record.requires_stripe_token,
+        "aliases": list(record.aliases),
+        "provider_ids": list(provider_ids),
+        "latitude": record.latitude,
+        "longitude": record.longitude,
+    }
+
+
+_STORE: SqlitePropertyStore | None = None
+_STORE_PATH: str | None = None
+# (path, monotonic time to look again) after the DB file was found missing.
+_MISSING: tuple[str, float] | None = None
+
+
+def get_property_store() -> SqlitePropertyStore | None:
+    """Return the configured store, or None when no DB is configured or the file is missing.
+
+    Called for every resolved hotel, so the file system is only consulted until the store exists (it then
+    watches the file itself), and a missing file is looked for again every PROPERTY_MASTER_RELOAD_SECONDS.
+    """
+    global _STORE, _STORE_PATH, _MISSING
+    path = PROPERTY_MASTER_DB_PATH
+    if not path:
+        return None
+    if _STORE is not None and _STORE_PATH == path:
+        return _STORE
+    now = time.monotonic()
+    if _MISSING is not None and _MISSING[0] == path and now < _MISSING[1]:
+        return None
+    if not os.path.exists(path):
+        _MISSING = (path, now + PROPERTY_MASTER_RELOAD_SECONDS)
+        return None
+    _MISSING = None
+    _STORE = SqlitePropertyStore(path)
+    _STORE_PATH = path
+    return _STORE
+
+
+def _iter_csv_rows(path: Path) -> Iterator[dict[str, Any]]:
+    with path.open(newline="", encoding="utf-8") as handle:
+        yield from csv.DictReader(handle)
+
+
+def _iter_jsonl_rows(path: Path) -> Iterator[dict[str, Any]]:
+    with path.open(encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning("property_import_line_unparsed", extra={"line": line_number})
+                continue
+            if isinstance(row, dict):
+                yield row
+
+
+def _to_list(value: Any) -> list[str]:
+    # CSV cells carry lists as "a|b|c"; JSONL rows carry real arrays.
+    if value is None or value == "":
+        return []
+    if isinstance(value, str):
+        return [part.strip() for part in value.split("|") if part.strip()]
+    return [str(part) for part in value if str(part).strip()]
+
+
+def _to_bool(value: Any, default: bool) -> bool:
+    if value is None or value == "":
+        return default
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "y")
+    return bool(value)
+
+
+def _to_optional_float(value: Any) -> float | None:
+    try:
+        if value is None or value == "":
+            return None
+        return float(value)
+    except (TypeError, ValueError):
+        return None
@@ -1,3 +1,4 @@
+from src.providers.registry import ProviderRegistry
 from src.providers.sigtrip import SigtripProvider
 
-__all__ = ["SigtripProvider"]
+__all__ = ["ProviderRegistry", "SigtripProvider"]
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from typing import Protocol
+from src.geo import GeoPoint
 from src.models import BookingCancellationResponse, BookingResponse, BookingStatusResponse, GuestDetails, SearchHotelsResponse
 
 
@@ -13,6 +14,10 @@ class HotelProvider(Protocol):
         guests: int,
         max_hotels: int,
         max_offers_per_hotel: int,
+        near: GeoPoint | None = None,
+        radius_km: float | None = None,
+        fields: frozenset[str] | None = None,
+        offer_fields: frozenset[str] | None = None,
     ) -> SearchHotelsResponse:
         ...
 
@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import re
+import time
+from collections.abc import Callable, Mapping
+from typing import Any, NamedTuple
+
+from src import tracing
+from src.cache import mark_uncacheable
+from src.health import HealthTracker
+from src.geo import GeoPoint
+from src.models import (
+    BookingCancellationResponse,
+    BookingResponse,
+    BookingStatusResponse,
+    GuestDetails,
+    SearchHotelsResponse,
+    price_preview_payload,
+)
+from src.offer_merge import DEFAULT_POLICY, RankingPolicy, merge_offers, to_base_currency
+from src.providers.base import HotelProvider
+from src.providers.sigtrip import SigtripProvider
+
+# Default per-provider search deadline; override per provider with MCP_PROVIDER_<NAME>_DEADLINE_SECONDS.
+PROVIDER_DEADLINE_SECONDS = float(os.getenv("PROVIDER_DEADLINE_SECONDS", "10"))
+DEFAULT_PROVIDER = "sigtrip"
+
+_URL_ENV = re.compile(r"^MCP_PROVIDER_([A-Z0-9]+(?:_[A-Z0-9]+)*)_URL$")
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderConfig(NamedTuple):
+    name: str
+    url: str
+    api_key_set: bool
+    deadline_seconds: float
+
+
+# Provider adapters by name. A configured provider without an adapter is reported, not built.
+# The registry applies each config's deadline; the Sigtrip client reads its URL and API key from the same
+# MCP_PROVIDER_SIGTRIP_* variables itself (src/client.py).
+PROVIDER_FACTORIES: dict[str, Callable[[ProviderConfig], HotelProvider]] = {
+    "sigtrip": lambda _config: SigtripProvider(),
+}
+
+
+def provider_configs(environ: Mapping[str, str] | None = None) -> list[ProviderConfig]:
+    """Read MCP_PROVIDER_<NAME>_URL / _API_KEY / _DEADLINE_SECONDS; Sigtrip is always present (its URL has a default)."""
+    env = os.environ if environ is None else environ
+    names = {match.group(1).lower() for key in env if (match := _URL_ENV.match(key)) and env[key]}
+    names.add(DEFAULT_PROVIDER)
+    configs: list[ProviderConfig] = []
+    for name in sorted(names, key=lambda item: (item != DEFAULT_PROVIDER, item)):
+        prefix = f"MCP_PROVIDER_{name.upper()}"
+        deadline = env.get(f"{prefix}_DEADLINE_SECONDS")
+        configs.append(
+            ProviderConfig(
+                name=name,
+                url=env.get(f"{prefix}_URL") or ("https://hotel.sigtrip.ai/mcp" if name == DEFAULT_PROVIDER else ""),
+                api_key_set=bool(env.get(f"{prefix}_API_KEY")),
+                deadline_seconds=float(deadline) if deadline else PROVIDER_DEADLINE_SECONDS,
+            )
+        )
+    return configs
+
+
+class _ProviderOutcome(NamedTuple):
+    name: str
+    response: SearchHotelsResponse | None
+    status: str
+    elapsed_ms: float
+
+
+class ProviderRegistry:
+    """Configured providers, usable as one HotelProvider: searches fan out, bookings route by id prefix.
+
+    Every search runs under its provider's deadline, including when only one provider is configured.
+    """
+
+    provider_name = "multi"
+
+    def __init__(
+        self,
+        providers: Mapping[str, HotelProvider],
+        deadlines: Mapping[str, float] | None = None,
+        ranking_policy: RankingPolicy = DEFAULT_POLICY,
+    ):
+        if not providers:
+            raise ValueError("ProviderRegistry needs at least one provider")
+        self.providers = dict(providers)
+        self.deadlines = {name: (deadlines or {}).get(name, PROVIDER_DEADLINE_SECONDS) for name in self.providers}
+        self.ranking_policy = ranking_policy
+        # Outcome of each provider's searches (ok vs timeout/error, elapsed): unhealthy providers sit out a cooldown.
+        self.health = HealthTracker()
+        self.skipped: dict[str, str] = {}
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] | None = None) -> ProviderRegistry:
+        providers: dict[str, HotelProvider] = {}
+        deadlines: dict[str, float] = {}
+        skipped: dict[str, str] = {}
+        for config in provider_configs(environ):
+            factory = PROVIDER_FACTORIES.get(config.name)
+            if factory is None:
+                skipped[config.name] = "no adapter for this provider"
+                logger.warning("provider_skipped", extra={"provider": config.name, "reason": skipped[config.name]})
+                continue
+            providers[config.name] = factory(config)
+            deadlines[config.name] = config.deadline_seconds
+        registry = cls(providers, deadlines)
+        registry.skipped = skipped
+        return registry
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "active": [
+                {"name": name, "deadline_seconds": self.deadlines[name], "health": self.health.get(name).snapshot()}
+                for name in self.providers
+            ],
+            "skipped": dict(self.skipped),
+        }
+
+    async def search_hotel_offers(
+        self,
+        location: str,
+        check_in: str,
+        check_out: str,
+        guests: int,
+        max_hotels: int,
+        max_offers_per_hotel: int,
+        near: GeoPoint | None = None,
+        radius_km: float | None = None,
+        fields: frozenset[str] | None = None,
+        offer_fields: frozenset[str] | None = None,
+    ) -> SearchHotelsResponse:
+        arguments: dict[str, Any] = {
+            "location": location,
+            "check_in": check_in,
+            "check_out": check_out,
+            "guests": guests,
+            "max_hotels": max_hotels,
+            "max_offers_per_hotel": max_offers_per_hotel,
+        }
+        # Same rule as the service: optional arguments only when used, for providers without them.
+        if near is not None:
+            arguments.update(near=near, radius_km=radius_km)
+        if fields is not None:
+            arguments.update(fields=fields, offer_fields=offer_fields)
+        # Skip providers in cooldown, unless every provider is; then ask them all rather than return nothing.
+        selected = [name for name in self.providers if self.health.healthy(name)] or list(self.providers)
+        outcomes = await asyncio.gather(*(self._search_one(name, arguments) for name in selected))
+        if len(self.providers) == 1 and outcomes[0].response is not None:
+            # A lone provider's response passes through unchanged; it still ran under its deadline.
+            return outcomes[0].response
+
+        merged: dict[str, dict[str, Any]] = {}
+        offers_by_property: dict[str, dict[str, list[dict[str, Any]]]] = {}
+        provider_metadata: dict[str, Any] = {}
+        for outcome in outcomes:
+            entry: dict[str, Any] = {"status": outcome.status, "elapsed_ms": outcome.elapsed_ms}
+            if outcome.response is not None:
+                payload = outcome.response.to_payload()
+                hotels = payload.get("hotels", [])
+                entry["hotels"] = len(hotels)
+                entry["metadata"] = payload.get("metadata", {})
+                for hotel in hotels:
+                    key = _merge_hotel(merged, hotel)
+                    if "top_offers" in hotel:
+                        offers_by_property.setdefault(key, {})[outcome.name] = hotel["top_offers"]
+            entry["health"] = self.health.get(outcome.name).snapshot()
+            provider_metadata[outcome.name] = entry
+        for name in self.providers:
+            if name not in provider_metadata:
+                provider_metadata[name] = {"status": "skipped_unhealthy", "health": self.health.get(name).snapshot()}
+                mark_uncacheable()
+        policy = self.ranking_policy._replace(
+            provider_confidence={**self.health.confidence(), **self.ranking_policy.provider_confidence}
+        )
+        for key, offer_lists in offers_by_property.items():
+            # A property offered by one provider keeps that provider's own offer order.
+            if len(offer_lists) > 1:
+                merged[key] = _with_offers(merged[key], merge_offers(offer_lists, max_offers_per_hotel, policy))
+        # Rank the merged set before cutting it to max_hotels: nearest first for "near" searches, else cheapest.
+        ranked = sorted(merged.values(), key=_distance if near is not None else _card_price)
+
+        return SearchHotelsResponse.from_trusted(
+            provider=",".join(outcome.name for outcome in outcomes if outcome.response is not None) or self.provider_name,
+            query={"location": location, "check_in": check_in, "check_out": check_out, "guests": guests},
+            metadata={"providers": provider_metadata},
+            hotels=ranked[:max_hotels],
+        )
+
+    async def create_booking_request(self, offer_id: str, guest: GuestDetails) -> BookingResponse:
+        return await self._provider_for(offer_id).create_booking_request(offer_id, guest)
+
+    async def cancel_booking(
+        self,
+        provider_booking_ref: str,
+        reason: str | None = None,
+        email: str | None = None,
+    ) -> BookingCancellationResponse:
+        return await self._provider_for(provider_booking_ref).cancel_booking(provider_booking_ref, reason=reason, email=email)
+
+    async def get_booking_status(self, provider_booking_ref: str) -> BookingStatusResponse:
+        return await self._provider_for(provider_booking_ref).get_booking_status(provider_booking_ref)
+
+    async def _search_one(self, name: str, arguments: dict[str, Any]) -> _ProviderOutcome:
+        started = time.perf_counter()
+        deadline = self.deadlines[name]
+        with tracing.span("registry.search", provider=name, deadline_seconds=deadline) as span:
+            try:
+                async with asyncio.timeout(deadline):
+                    response = await self.providers[name].search_hotel_offers(**arguments)
+                status = "ok"
+            except TimeoutError:
+                response, status = None, "timeout"
+            except Exception as exc:  # noqa: BLE001 - one provider failing must not fail the search
+                response, status = None, "error"
+                logger.warning("provider_search_failed", extra={"provider": name, "error": str(exc)})
+            span.set_attribute("status", status)
+        elapsed = time.perf_counter() - started
+        self.health.record(name, elapsed, ok=response is not None)
+        if response is None:
+            # A result missing a provider's hotels must not be served from the response cache.
+            mark_uncacheable()
+        return _ProviderOutcome(name, response, status, round(elapsed * 1000, 3))
+
+    def _provider_for(self, identifier: str) -> HotelProvider:
+        # Offer ids and hotel ids are "<provider>:..."; anything else goes to the primary provider.
+        prefix = identifier.split(":", 1)[0] if ":" in identifier else ""
+        return self.providers.get(prefix) or next(iter(self.providers.values()))
+
+
+def _merge_hotel(merged: dict[str, dict[str, Any]], hotel: dict[str, Any]) -> str:
+    """One card per canonical property: the cheapest card wins, provider ids accumulate, first-seen order is kept."""
+    key = str(hotel.get("property_id") or hotel.get("hotel_id"))
+    existing = merged.get(key)
+    if existing is None:
+        merged[key] = hotel
+        return key
+    winner = hotel if _card_price(hotel) < _card_price(existing) else existing
+    if "provider_ids" in winner:
+        provider_ids = dict.fromkeys([*existing.get("provider_ids", []), *hotel.get("provider_ids", [])])
+        winner = {**winner, "provider_ids": list(provider_ids)}
+    merged[key] = winner
+    return key
+
+
+def _with_offers(hotel: dict[str, Any], offers: list[dict[str, Any]]) -> dict[str, Any]:
+    """The card with merged offers, and the price preview and availability recomputed from them."""
+    updated = {**hotel, "top_offers": offers}
+    if "availability_status" in hotel:
+        updated["availability_status"] = "available" if offers else "unavailable"
+    if "pricing_source" in hotel:
+        updated["pricing_source"] = "upstream" if offers else "none"
+    if "price_preview" in hotel:
+        preview = hotel.get("price_preview") or {}
+        priced = [offer for offer in offers if to_base_currency(offer.get("total_amount"), offer.get("currency")) is not None]
+        if priced:
+            best = min(priced, key=lambda offer: to_base_currency(offer.get("total_amount"), offer.get("currency")))
+            updated["price_preview"] = price_preview_payload(
+                from_total=best.get("total_amount"),
+                from_nightly=best.get("nightly_amount"),
+                currency=best.get("currency"),
+                includes_taxes_fees=preview.get("includes_taxes_fees", True),
+            )
+        else:
+            updated["price_preview"] = price_preview_payload()
+    return updated
+
+
+def _distance(hotel: dict[str, Any]) -> float:
+    distance = hotel.get("distance_km")
+    return float(distance) if distance is not None else float("inf")
+
+
+def _card_price(hotel: dict[str, Any]) -> float:
+    preview = hotel.get("price_preview") or {}
+    if not isinstance(preview, dict):
+        return float("inf")
+    value = to_base_currency(preview.get("from_total"), preview.get("currency"))
+    return value if value is not None else float("inf")
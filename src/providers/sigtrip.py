@@ -1,21 +1,46 @@
 from __future__ import annotations
 
+import asyncio
+import heapq
+import json
+import os
 import re
+from functools import lru_cache
 from typing import Any
 
+from pydantic import HttpUrl, TypeAdapter, ValidationError
+
+from src import profiling, tracing
+from src.cache import MISS, mark_uncacheable
 from src.client import call_upstream, call_upstream_method
 from src.models import (
     BookingCancellationResponse,
     BookingResponse,
     BookingStatusResponse,
+    HOTEL_IMAGE_FIELDS,
+    HOTEL_PRICE_FIELDS,
     GuestDetails,
-    HotelCard,
-    Offer,
-    PricePreview,
     SearchHotelsResponse,
+    hotel_card_payload,
+    offer_payload,
+    price_preview_payload,
 )
-from src.property_master import resolve_property
-
+from src.geo import DEFAULT_NEAR_RADIUS_KM, GEO_INDEX, GeoPoint, get_geo_index
+from src.locations import LOCATION_INDEX, LocationEntry, resolve_location
+from src.metrics import HOTEL_CARD_IMAGES
+from src.property_master import property_id_for_provider, resolve_property_async
+from src.tiered_cache import SHARED_CACHE, TieredCache
+
+# Upstream read caches, each in-process and (with CACHE_L2_URL) shared across replicas.
+# Prices move quickly; room lists, galleries and the tool list rarely change. 0 disables a cache.
+PRICE_CACHE_TTL_SECONDS = float(os.getenv("SIGTRIP_PRICE_CACHE_SECONDS", "60"))
+CONTENT_CACHE_TTL_SECONDS = float(os.getenv("SIGTRIP_CONTENT_CACHE_SECONDS", "3600"))
+UPSTREAM_CACHE_SIZE = int(os.getenv("SIGTRIP_CACHE_SIZE", "2048"))
+
+PRICE_CACHE = TieredCache("sigtrip_prices", PRICE_CACHE_TTL_SECONDS, UPSTREAM_CACHE_SIZE, SHARED_CACHE)
+ROOM_CACHE = TieredCache("sigtrip_rooms", CONTENT_CACHE_TTL_SECONDS, UPSTREAM_CACHE_SIZE, SHARED_CACHE)
+GALLERY_CACHE = TieredCache("sigtrip_galleries", CONTENT_CACHE_TTL_SECONDS, UPSTREAM_CACHE_SIZE, SHARED_CACHE)
+TOOLS_CACHE = TieredCache("sigtrip_tools", CONTENT_CACHE_TTL_SECONDS, 1, SHARED_CACHE)
 
 LOCATION_MAP = {
     "london": ["Club Quarters, Trafalgar Square"],
@@ -23,6 +48,8 @@ LOCATION_MAP = {
     "new york": ["Club Quarters, Grand Central"],
 }
 
+_CITY_BY_HOTEL = {hotel_name: city for city, hotel_names in LOCATION_MAP.items() for hotel_name in hotel_names}
+
 FALLBACK_IMAGE_BY_CITY = {
     "london": "https://images.unsplash.com/photo-1486299267070-83823f5448dd",
     "denver": "https://images.unsplash.com/photo-1514924013411-cbf25faa35bb",
@@ -43,73 +70,122 @@ class SigtripProvider:
         guests: int,
         max_hotels: int,
         max_offers_per_hotel: int,
+        near: GeoPoint | None = None,
+        radius_km: float | None = None,
+        fields: frozenset[str] | None = None,
+        offer_fields: frozenset[str] | None = None,
     ) -> SearchHotelsResponse:
-        hotels = self._resolve_target_hotels(location)[:max_hotels]
-        hotel_cards: list[HotelCard] = []
+        # Catalog indexes are (re)built in a worker thread, never on the loop.
+        await LOCATION_INDEX.refresh()
+        target = resolve_location(location)
+        # Skip upstream calls whose results the caller did not ask for. Cards are still built whole (a few dict
+        # entries): the service reads image_source/pricing_source for its metadata, then projects them.
+        need_images = fields is None or not fields.isdisjoint(HOTEL_IMAGE_FIELDS)
+        need_prices = fields is None or not fields.isdisjoint(HOTEL_PRICE_FIELDS)
+        distances: dict[str, float] = {}
+        if near is None:
+            hotels = self._resolve_target_hotels(target)[:max_hotels]
+        else:
+            # Pick the hotels that can make the result set before any upstream call.
+            candidates = self._resolve_target_hotels(target) if target is not None else list(_CITY_BY_HOTEL)
+            await GEO_INDEX.refresh()
+            # Provider-id lookups may hit the property DB.
+            distances = await asyncio.to_thread(self._select_near, candidates, near, radius_km, max_hotels)
+            hotels = list(distances)
+        hotel_cards: list[dict[str, Any]] = []
 
         for hotel_name in hotels:
-            provider_hotel_id = self._hotel_id(hotel_name)
-            rooms_data = await call_upstream(
-                "get_rooms",
-                {
-                    "hotelName": hotel_name,
-                    "adults": guests,
-                },
-            )
-            prices_data = await call_upstream(
-                "get_prices",
-                {
-                    "hotelName": hotel_name,
-                    "arrivalDate": check_in,
-                    "departureDate": check_out,
-                    "adults": guests,
-                },
-            )
-
-            prices = prices_data.get("prices", []) if isinstance(prices_data, dict) else []
-            offers = self._map_offers(hotel_name, prices, max_offers_per_hotel)
-            price_preview = self._build_price_preview(offers)
-
-            images = await self._fetch_image_urls(hotel_name, rooms_data)
-            has_upstream_images = bool(images)
-            fallback_image = self._fallback_image(location)
-            thumbnail = images[0] if images else fallback_image
-            if thumbnail and thumbnail not in images:
-                images = [thumbnail, *images]
-            image_source = "upstream" if has_upstream_images else "fallback"
-            if not images and not thumbnail:
+            with tracing.span("sigtrip.hotel", hotel=hotel_name):
+                provider_hotel_id = self._hotel_id(hotel_name)
+                hotel_target = target or resolve_location(_CITY_BY_HOTEL.get(hotel_name, ""))
+                fallback_image = self._fallback_image(hotel_target)
+                rooms_data = None
+                if need_images:
+                    rooms_data = await _cached_upstream(
+                        ROOM_CACHE,
+                        "get_rooms",
+                        {
+                            "hotelName": hotel_name,
+                            "adults": guests,
+                        },
+                    )
+                offers: list[dict[str, Any]] = []
+                if need_prices:
+                    prices_data = await _cached_upstream(
+                        PRICE_CACHE,
+                        "get_prices",
+                        {
+                            "hotelName": hotel_name,
+                            "arrivalDate": check_in,
+                            "departureDate": check_out,
+                            "adults": guests,
+                        },
+                    )
+                    prices = prices_data.get("prices", []) if isinstance(prices_data, dict) else []
+                    offers = self._map_offers(hotel_name, prices, max_offers_per_hotel)
+                price_preview = self._build_price_preview(offers)
+
+                images: list[str] = []
+                thumbnail: str | None = None
                 image_source = "none"
-
-            canonical, mapping = resolve_property(
-                provider_hotel_id=provider_hotel_id,
-                hotel_name=hotel_name,
-                city=location,
-                country_code="US",
-            )
-
-            hotel_cards.append(
-                HotelCard(
-                    hotel_id=provider_hotel_id,
-                    property_id=canonical.get("property_id"),
-                    provider_ids=[provider_hotel_id],
-                    name=canonical.get("name") or hotel_name,
-                    location=str(canonical.get("location_details", {}).get("city") or location.title()),
-                    location_details=canonical.get("location_details"),
-                    description=canonical.get("description"),
-                    amenities=canonical.get("amenities", []),
-                    rating=canonical.get("rating"),
-                    booking_capabilities=canonical.get("booking_capabilities"),
-                    thumbnail_url=thumbnail,
-                    image_urls=images[:5],
-                    price_preview=price_preview,
-                    availability_status="available" if offers else "unavailable",
-                    image_source=image_source,
-                    pricing_source="upstream" if offers else "none",
-                    top_offers=offers,
+                if need_images:
+                    images = await self._fetch_image_urls(hotel_name, rooms_data)
+                    has_upstream_images = bool(images)
+                    thumbnail = images[0] if images else _normalize_image_url(fallback_image) if fallback_image else None
+                    if thumbnail and thumbnail not in images:
+                        images = [thumbnail, *images]
+                    image_source = "upstream" if has_upstream_images else "fallback"
+                    if not images and not thumbnail:
+                        image_source = "none"
+                    HOTEL_CARD_IMAGES.labels(self.provider_name, image_source).inc()
+
+                with tracing.span("sigtrip.resolve_property") as span, profiling.stage("mapping"):
+                    canonical, mapping = await resolve_property_async(
+                        provider_hotel_id=provider_hotel_id,
+                        hotel_name=hotel_name,
+                        city=hotel_target.city if hotel_target is not None else location,
+                        country_code=hotel_target.country_code if hotel_target is not None else "US",
+                    )
+                    span.set_attribute("mapping.method", mapping["method"])
+
+                hotel_cards.append(
+                    hotel_card_payload(
+                        hotel_id=provider_hotel_id,
+                        property_id=canonical.get("property_id"),
+                        provider_ids=[provider_hotel_id],
+                        name=canonical.get("name") or hotel_name,
+                        location=str(canonical.get("location_details", {}).get("city") or location.title()),
+                        location_details=canonical.get("location_details"),
+                        description=canonical.get("description"),
+                        amenities=canonical.get("amenities", ()),
+                        rating=canonical.get("rating"),
+                        booking_capabilities=canonical.get("booking_capabilities"),
+                        thumbnail_url=thumbnail,
+                        image_urls=images[:5],
+                        price_preview=price_preview,
+                        availability_status="available" if offers else "unavailable",
+                        image_source=image_source,
+                        pricing_source="upstream" if offers else "none",
+                        top_offers=offers,
+                        distance_km=round(distances[hotel_name], 3) if hotel_name in distances else None,
+                    )
                 )
-            )
 
-        return SearchHotelsResponse(
+        metadata: dict[str, Any] = {
+            "canonical_mapping": {
+                "strategy": "provider_id_map_then_name_city_then_fuzzy_then_fallback",
+                "provider": self.provider_name,
+                "last_mapping_method": mapping["method"] if hotels else None,
+            },
+        }
+        if near is not None:
+            metadata["geo"] = {
+                "center": {"latitude": near.latitude, "longitude": near.longitude},
+                "radius_km": radius_km or DEFAULT_NEAR_RADIUS_KM,
+                "selected_hotels": len(hotels),
+            }
+        # Cards are built from data validated above (URLs at the upstream boundary), so skip re-validation.
+        return SearchHotelsResponse.from_trusted(
             provider=self.provider_name,
             query={
                 "location": location,
@@ -117,13 +193,7 @@ class SigtripProvider:
                 "check_out": check_out,
                 "guests": guests,
             },
-            metadata={
-                "canonical_mapping": {
-                    "strategy": "provider_id_map_then_name_city_then_fallback",
-                    "provider": self.provider_name,
-                    "last_mapping_method": mapping["method"] if hotels else None,
-                }
-            },
+            metadata=metadata,
             hotels=hotel_cards,
         )
 
@@ -271,12 +341,28 @@ class SigtripProvider:
             message="Status retrieved from upstream." if status != "unknown" else "Status is unknown.",
         )
 
-    def _resolve_target_hotels(self, location: str) -> list[str]:
-        normalized = location.lower()
-        for city_key, hotels in LOCATION_MAP.items():
-            if city_key in normalized:
-                return hotels
-        return []
+    def _resolve_target_hotels(self, target: LocationEntry | None) -> list[str]:
+        return LOCATION_MAP.get(target.city_norm, []) if target is not None else []
+
+    def _select_near(
+        self,
+        hotel_names: list[str],
+        near: GeoPoint,
+        radius_km: float | None,
+        max_hotels: int,
+    ) -> dict[str, float]:
+        names_by_property: dict[str, str] = {}
+        for hotel_name in hotel_names:
+            property_id = property_id_for_provider(self._hotel_id(hotel_name))
+            if property_id is not None:
+                names_by_property.setdefault(property_id, hotel_name)
+        nearest = get_geo_index().nearest(
+            near,
+            k=max_hotels,
+            max_radius_km=radius_km or DEFAULT_NEAR_RADIUS_KM,
+            accept=names_by_property.__contains__,
+        )
+        return {names_by_property[property_id]: distance for distance, property_id in nearest}
 
     def _hotel_id(self, hotel_name: str) -> str:
         return f"sigtrip:{hotel_name.replace(' ', '_')}"
@@ -284,38 +370,39 @@ class SigtripProvider:
     def _offer_id(self, hotel_name: str, room_type: str) -> str:
         return f"sigtrip:{hotel_name.replace(' ', '_')}:{room_type}"
 
-    def _map_offers(self, hotel_name: str, prices: list[dict[str, Any]], max_offers: int) -> list[Offer]:
-        offers: list[Offer] = []
-        for item in prices[:max_offers]:
+    def _map_offers(self, hotel_name: str, prices: list[dict[str, Any]], max_offers: int) -> list[dict[str, Any]]:
+        # Select the cheapest rows first (O(n log k)) so payloads are only built for offers we return.
+        cheapest = heapq.nsmallest(
+            max(max_offers, 0),
+            (item for item in prices if isinstance(item, dict)),
+            key=_offer_sort_key,
+        )
+        offers: list[dict[str, Any]] = []
+        for item in cheapest:
             room_type = str(item.get("roomType") or "UNKNOWN")
-            total_amount = _to_float(item.get("totalAmount"))
-            nightly_amount = _to_float(item.get("nightlyAmount"))
-
             offers.append(
-                Offer(
+                offer_payload(
                     offer_id=self._offer_id(hotel_name, room_type),
                     room_type=room_type,
                     room_name=str(item.get("roomDescription") or "Room"),
-                    total_amount=total_amount,
-                    nightly_amount=nightly_amount,
-                    currency=item.get("currency"),
-                    category=item.get("category"),
-                    cancellation_policy=item.get("cancellationPolicy"),
+                    total_amount=_to_float(item.get("totalAmount")),
+                    nightly_amount=_to_float(item.get("nightlyAmount")),
+                    currency=_to_str(item.get("currency")),
+                    category=_to_str(item.get("category")),
+                    cancellation_policy=_to_str(item.get("cancellationPolicy")),
                 )
             )
-
-        offers.sort(key=lambda x: x.total_amount if x.total_amount is not None else float("inf"))
         return offers
 
-    def _build_price_preview(self, offers: list[Offer]) -> PricePreview:
+    def _build_price_preview(self, offers: list[dict[str, Any]]) -> dict[str, Any]:
         if not offers:
-            return PricePreview()
+            return price_preview_payload()
 
-        best = min(offers, key=lambda x: x.total_amount if x.total_amount is not None else float("inf"))
-        return PricePreview(
-            from_total=best.total_amount,
-            from_nightly=best.nightly_amount,
-            currency=best.currency,
+        best = min(offers, key=lambda x: x["total_amount"] if x["total_amount"] is not None else float("inf"))
+        return price_preview_payload(
+            from_total=best["total_amount"],
+            from_nightly=best["nightly_amount"],
+            currency=best["currency"],
             includes_taxes_fees=True,
         )
 
@@ -339,15 +426,22 @@ class SigtripProvider:
             "expectedCount": len(image_query_rooms),
             "rooms": image_query_rooms,
         }
-        gallery_data = await call_upstream("view_room_gallery", payload)
-        return _extract_image_urls(gallery_data)
-
-    def _fallback_image(self, location: str) -> str | None:
-        normalized = location.lower()
-        for city_key, image_url in FALLBACK_IMAGE_BY_CITY.items():
-            if city_key in normalized:
-                return image_url
-        return None
+        with tracing.span("sigtrip.view_room_gallery") as span, profiling.stage("upstream.view_room_gallery"):
+            key = _cache_key("view_room_gallery", payload)
+            cached = await GALLERY_CACHE.fetch(key)
+            span.set_attribute("cache.hit", cached is not MISS)
+            if cached is not MISS:
+                return list(cached)
+            gallery_data = await call_upstream("view_room_gallery", payload)
+            images = _extract_image_urls(gallery_data)
+            if not _is_cacheable(gallery_data):
+                mark_uncacheable()
+            else:
+                await GALLERY_CACHE.store(key, images)
+            return images
+
+    def _fallback_image(self, target: LocationEntry | None) -> str | None:
+        return FALLBACK_IMAGE_BY_CITY.get(target.city_norm) if target is not None else None
 
     def _parse_offer_id(self, offer_id: str) -> tuple[str, str] | None:
         match = re.match(r"^sigtrip:([^:]+):([^:]+)$", offer_id)
@@ -364,6 +458,9 @@ class SigtripProvider:
         return None
 
     async def _list_upstream_tools(self) -> dict[str, dict[str, Any]]:
+        cached = await TOOLS_CACHE.fetch("tools/list")
+        if cached is not MISS:
+            return cached
         payload = await call_upstream_method("tools/list")
         if not isinstance(payload, dict):
             return {}
@@ -374,12 +471,44 @@ class SigtripProvider:
             for tool in tools:
                 if isinstance(tool, dict) and isinstance(tool.get("name"), str):
                     by_name[tool["name"]] = tool
+        if by_name:
+            await TOOLS_CACHE.store("tools/list", by_name)
         return by_name
 
     async def _list_upstream_tool_names(self) -> set[str]:
         return set((await self._list_upstream_tools()).keys())
 
 
+async def _cached_upstream(cache: TieredCache, tool_name: str, arguments: dict[str, Any]) -> dict[str, Any] | None:
+    with tracing.span(f"sigtrip.{tool_name}") as span, profiling.stage(f"upstream.{tool_name}"):
+        key = _cache_key(tool_name, arguments)
+        cached = await cache.fetch(key)
+        span.set_attribute("cache.hit", cached is not MISS)
+        if cached is not MISS:
+            return cached
+        data = await call_upstream(tool_name, arguments)
+        if not _is_cacheable(data):
+            # Failed calls are retried next time, and responses built on them are not cached.
+            mark_uncacheable()
+        else:
+            await cache.store(key, data)
+        return data
+
+
+def _is_cacheable(data: dict[str, Any] | None) -> bool:
+    # A body that was not JSON (call_upstream's {"text_fallback": ...}) is usually an upstream error message.
+    return data is not None and set(data) != {"text_fallback"}
+
+
+def _cache_key(tool_name: str, arguments: dict[str, Any]) -> str:
+    return f"{tool_name}:{json.dumps(arguments, sort_keys=True, separators=(',', ':'))}"
+
+
+def _offer_sort_key(item: dict[str, Any]) -> float:
+    total_amount = _to_float(item.get("totalAmount"))
+    return total_amount if total_amount is not None else float("inf")
+
+
 def _to_float(value: Any) -> float | None:
     try:
         if value is None:
@@ -389,6 +518,22 @@ def _to_float(value: Any) -> float | None:
         return None
 
 
+def _to_str(value: Any) -> str | None:
+    return None if value is None else str(value)
+
+
+_HTTP_URL = TypeAdapter(HttpUrl)
+
+
+@lru_cache(maxsize=4096)
+def _normalize_image_url(url: str) -> str | None:
+    """Validate an upstream image URL once; returns the canonical form, or None if it is not a valid URL."""
+    try:
+        return str(_HTTP_URL.validate_python(url))
+    except ValidationError:
+        return None
+
+
 def _extract_image_urls(data: Any) -> list[str]:
     found: list[str] = []
 
@@ -403,7 +548,9 @@ def _extract_image_urls(data: Any) -> list[str]:
             return
         if isinstance(node, str):
             if node.startswith("http") and _looks_like_image_url(node):
-                found.append(node)
+                url = _normalize_image_url(node)
+                if url is not None:
+                    found.append(url)
 
     walk(data)
 
@@ -1,271 +1,130 @@
 from __future__ import annotations
 
-import datetime as dt
+import contextlib
 import os
-
-from dotenv import load_dotenv
-from mcp.server.fastmcp import FastMCP
-from starlette.requests import Request
-from starlette.responses import JSONResponse, Response
-
-from src.service import HotelWrapperService, error_envelope
-
-load_dotenv()
-
-MCP_HOST = os.getenv("MCP_HOST", "0.0.0.0")
-MCP_PORT = int(os.getenv("MCP_PORT", "8000"))
-APP_ENV = os.getenv("APP_ENV", "dev")
-APP_VERSION = os.getenv("APP_VERSION", "0.1.0")
-MCP_PROVIDER_SIGTRIP_URL = os.getenv("MCP_PROVIDER_SIGTRIP_URL", "https://hotel.sigtrip.ai/mcp")
-MCP_PROVIDER_SIGTRIP_API_KEY_SET = bool(os.getenv("MCP_PROVIDER_SIGTRIP_API_KEY"))
-MCP_STRICT_PROVIDER_CONFIG = os.getenv("MCP_STRICT_PROVIDER_CONFIG", "false").lower() == "true"
-
-mcp = FastMCP("SigTrip_Wrapper_Node", host=MCP_HOST, port=MCP_PORT)
-service = HotelWrapperService()
+from collections.abc import AsyncIterator, Mapping
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from mcp.server.fastmcp import FastMCP
+    from starlette.applications import Starlette
+
+    from src.cache_snapshot import CacheSnapshot
+    from src.mcp_tools import AppState
+    from src.warmer import CacheWarmer
+
+# Nothing else is imported at module level: most src modules read their settings from the environment when
+# imported, so both entry points load .env first, and FastMCP (most of the start-up time) loads only in create_app().
+
+
+class ServerSettings(NamedTuple):
+    host: str
+    port: int
+    app_env: str
+    app_version: str
+    sigtrip_url: str
+    sigtrip_api_key_set: bool
+    strict_provider_config: bool
+    # Debug routes (/debug/*) are disabled unless an admin token is configured.
+    admin_token: str | None
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] | None = None) -> ServerSettings:
+        env = os.environ if environ is None else environ
+        return cls(
+            host=env.get("MCP_HOST", "0.0.0.0"),
+            port=int(env.get("MCP_PORT", "8000")),
+            app_env=env.get("APP_ENV", "dev"),
+            app_version=env.get("APP_VERSION", "0.1.0"),
+            sigtrip_url=env.get("MCP_PROVIDER_SIGTRIP_URL", "https://hotel.sigtrip.ai/mcp"),
+            sigtrip_api_key_set=bool(env.get("MCP_PROVIDER_SIGTRIP_API_KEY")),
+            strict_provider_config=env.get("MCP_STRICT_PROVIDER_CONFIG", "false").lower() == "true",
+            admin_token=env.get("ADMIN_TOKEN") or None,
+        )
 
 
-def _startup_validation() -> None:
+def validate_settings(settings: ServerSettings) -> None:
     issues: list[str] = []
-    if not MCP_PROVIDER_SIGTRIP_API_KEY_SET:
+    if not settings.sigtrip_api_key_set:
         issues.append("MCP_PROVIDER_SIGTRIP_API_KEY is not set")
-    if not MCP_PROVIDER_SIGTRIP_URL:
+    if not settings.sigtrip_url:
         issues.append("MCP_PROVIDER_SIGTRIP_URL is not set")
 
-    if issues and (APP_ENV.lower() == "prod" or MCP_STRICT_PROVIDER_CONFIG):
+    if issues and (settings.app_env.lower() == "prod" or settings.strict_provider_config):
         raise RuntimeError("Startup validation failed: " + "; ".join(issues))
 
 
-_startup_validation()
-
-
-@mcp.custom_route("/healthz", methods=["GET"], include_in_schema=False)
-async def healthz(_request: Request) -> Response:
-    return JSONResponse(
-        {
-            "status": "ok",
-            "service": "sigtrip-wrapper-mcp",
-            "env": APP_ENV,
-            "version": APP_VERSION,
-        },
-        status_code=200,
-    )
-
-
-@mcp.custom_route("/readyz", methods=["GET"], include_in_schema=False)
-async def readyz(_request: Request) -> Response:
-    issues: list[str] = []
-    if not MCP_PROVIDER_SIGTRIP_API_KEY_SET:
-        issues.append("MCP_PROVIDER_SIGTRIP_API_KEY is not set")
-    if not MCP_PROVIDER_SIGTRIP_URL:
-        issues.append("MCP_PROVIDER_SIGTRIP_URL is not set")
-
-    if issues:
-        return JSONResponse(
-            {
-                "status": "not_ready",
-                "service": "sigtrip-wrapper-mcp",
-                "issues": issues,
-            },
-            status_code=503,
-        )
+def create_app(settings: ServerSettings | None = None) -> FastMCP:
+    """Build the MCP server with every tool and route; providers and caches are built on first use."""
+    from mcp.server.fastmcp import FastMCP
 
-    return JSONResponse(
-        {
-            "status": "ready",
-            "service": "sigtrip-wrapper-mcp",
-            "upstream": MCP_PROVIDER_SIGTRIP_URL,
-            "api_key_configured": MCP_PROVIDER_SIGTRIP_API_KEY_SET,
-        },
-        status_code=200,
-    )
+    from src import mcp_tools
 
+    settings = settings or ServerSettings.from_env()
+    validate_settings(settings)
+    app = FastMCP("SigTrip_Wrapper_Node", host=settings.host, port=settings.port)
+    mcp_tools.register(app, settings)
+    return app
 
-@mcp.tool()
-async def search_hotel_offers(
-    location: str,
-    check_in: str | None = None,
-    check_out: str | None = None,
-    guests: int = 1,
-    max_hotels: int = 5,
-    max_offers_per_hotel: int = 3,
-    ) -> dict:
-    """Return multiple hotels with images and upfront 'price from' previews."""
-    return await service.search_hotel_offers(
-        location=location,
-        check_in=check_in,
-        check_out=check_out,
-        guests=guests,
-        max_hotels=max_hotels,
-        max_offers_per_hotel=max_offers_per_hotel,
-    )
 
+def create_asgi_app(settings: ServerSettings | None = None) -> Starlette:
+    """SSE app for uvicorn (also `uvicorn --factory src.server:create_asgi_app`), with the background jobs."""
+    if settings is None:
+        # The uvicorn --factory path skips main(), so prepare the process here, before create_app()'s imports.
+        _prepare_process()
+        settings = ServerSettings.from_env()
+    app = create_app(settings)
+    asgi_app = app.sse_app()
+    # Started and stopped by the server's lifespan: uvicorn re-raises SIGTERM once it has shut down, so code
+    # after serve() never runs, but lifespan shutdown does (and writes the final cache snapshot).
+    asgi_app.router.lifespan_context = _background_jobs
+    return asgi_app
 
-@mcp.tool()
-async def plan_hotel_options(
-    query: str,
-    max_hotels: int = 5,
-    max_offers_per_hotel: int = 3,
-) -> dict:
-    """Natural-language entrypoint. Example: 'Show me hotels in Denver'."""
-    return await service.plan_hotel_options(
-        query=query,
-        max_hotels=max_hotels,
-        max_offers_per_hotel=max_offers_per_hotel,
-    )
 
+@contextlib.asynccontextmanager
+async def _background_jobs(_app: Starlette) -> AsyncIterator[None]:
+    from src import cache_snapshot, loop_monitor, mcp_tools, tiered_cache, warmer
 
-@mcp.tool()
-async def compare_hotels(
-    location: str,
-    hotel_ids: list[str] | None = None,
-    check_in: str | None = None,
-    check_out: str | None = None,
-    guests: int = 1,
-    max_hotels: int = 8,
-) -> dict:
-    """Compare hotels by upfront price and availability."""
-    return await service.compare_hotels(
-        location=location,
-        hotel_ids=hotel_ids,
-        check_in=check_in,
-        check_out=check_out,
-        guests=guests,
-        max_hotels=max_hotels,
-    )
-
-
-@mcp.tool()
-async def compare_hotels_from_query(
-    query: str,
-    hotel_ids: list[str] | None = None,
-    max_hotels: int = 8,
-) -> dict:
-    """Natural-language comparison entrypoint. Example: 'Compare hotels in Denver for 2 guests'."""
-    return await service.compare_hotels_from_query(
-        query=query,
-        hotel_ids=hotel_ids,
-        max_hotels=max_hotels,
-    )
-
-
-@mcp.tool()
-async def create_booking_request(
-    guest_details: str,
-    offer_id: str | None = None,
-    room_id: str | None = None,
-    hotel_id: str | None = None,
-) -> dict:
-    """Create booking payment request. Supports new offer_id and legacy room_id inputs."""
-    del hotel_id
-    effective_offer_id = offer_id or room_id
-    if not effective_offer_id:
-        return error_envelope(
-            code="MISSING_OFFER_ID",
-            message="offer_id (or legacy room_id) is required",
-            retryable=False,
-        )
-    return await service.create_booking_request(offer_id=effective_offer_id, guest_details=guest_details)
-
-
-@mcp.tool()
-async def cancel_booking(provider_booking_ref: str, reason: str | None = None, email: str | None = None) -> dict:
-    """Attempt booking cancellation. Returns unsupported gracefully if provider lacks capability."""
-    return await service.cancel_booking(provider_booking_ref=provider_booking_ref, reason=reason, email=email)
-
-
-@mcp.tool()
-async def get_booking_status(provider_booking_ref: str) -> dict:
-    """Retrieve booking status. Returns unsupported gracefully if provider lacks capability."""
-    return await service.get_booking_status(provider_booking_ref=provider_booking_ref)
-
-
-# Backward-compatible aliases for existing integrations.
-@mcp.tool()
-async def discover_hotels(location: str) -> dict:
-    """Deprecated alias. Use search_hotel_offers instead."""
-    check_in, check_out = _default_dates()
-    result = await service.search_hotel_offers(
-        location=location,
-        check_in=check_in,
-        check_out=check_out,
-        guests=1,
-        max_hotels=5,
-        max_offers_per_hotel=1,
-    )
-
-    hotels = []
-    for item in result.get("hotels", []):
-        offers = item.get("top_offers", [])
-        room_names = ", ".join(offer.get("room_name", "Room") for offer in offers[:3])
-        hotels.append(
-            {
-                "id": item.get("hotel_id"),
-                "name": item.get("name"),
-                "location": {
-                    "city": location.title(),
-                    "country_code": "US",
-                    "address": "Address provided at booking",
-                },
-                "description": f"Available rooms: {room_names}." if room_names else "No offers currently available.",
-                "amenities": ["wifi_free"],
-                "images": item.get("image_urls", []),
-            }
-        )
-    return hotels
-
+    state: AppState = mcp_tools.state()
+    loop_monitor.ensure_started()
+    # Only enabled jobs are built here; the warmer needs the provider, which is otherwise built on first use.
+    jobs: list[CacheWarmer | CacheSnapshot] = []
+    if cache_snapshot.CACHE_SNAPSHOT_PATH:
+        # Load the snapshot (in a worker thread) before the server accepts requests, so no request waits on it.
+        await state.snapshot.restore()
+        jobs.append(state.snapshot)
+    if warmer.CACHE_WARM_INTERVAL_SECONDS > 0:
+        jobs.append(state.warmer)
+    for job in jobs:
+        job.start()
+    try:
+        yield
+    finally:
+        for job in jobs:
+            await job.stop()
+        if tiered_cache.SHARED_CACHE is not None:
+            await tiered_cache.SHARED_CACHE.close()
 
-@mcp.tool()
-async def get_availability(hotel_id: str, check_in: str, check_out: str, guests: int = 1) -> list[dict]:
-    """Deprecated alias. Use search_hotel_offers and read top_offers instead."""
-    location_guess = _location_from_hotel_id(hotel_id)
-    result = await service.search_hotel_offers(
-        location=location_guess,
-        check_in=check_in,
-        check_out=check_out,
-        guests=guests,
-        max_hotels=10,
-        max_offers_per_hotel=10,
-    )
 
-    for item in result.get("hotels", []):
-        if item.get("hotel_id") == hotel_id:
-            legacy_rooms = []
-            for offer in item.get("top_offers", []):
-                legacy_rooms.append(
-                    {
-                        "room_id": offer.get("offer_id"),
-                        "name": offer.get("room_name"),
-                        "price": {
-                            "amount": offer.get("total_amount"),
-                            "currency": offer.get("currency"),
-                        },
-                        "category": offer.get("category", "Standard"),
-                    }
-                )
-            return legacy_rooms
+def _prepare_process() -> None:
+    from dotenv import load_dotenv
 
-    return []
+    load_dotenv()
+    from src import log_pipeline
 
+    log_pipeline.configure_logging()
 
-def _default_dates() -> tuple[str, str]:
-    today = dt.date.today()
-    check_in = today + dt.timedelta(days=1)
-    check_out = today + dt.timedelta(days=2)
-    return check_in.isoformat(), check_out.isoformat()
 
+def main() -> None:
+    import asyncio
 
-def _location_from_hotel_id(hotel_id: str) -> str:
-    if hotel_id == "sigtrip:The_Rally_Hotel":
-        return "denver"
-    if hotel_id == "sigtrip:Club_Quarters,_Trafalgar_Square":
-        return "london"
-    if hotel_id == "sigtrip:Club_Quarters,_Grand_Central":
-        return "new york"
+    import uvicorn
 
-    if hotel_id.startswith("sigtrip:"):
-        return hotel_id.removeprefix("sigtrip:").replace("_", " ")
-    return "unknown"
+    _prepare_process()
+    settings = ServerSettings.from_env()
+    config = uvicorn.Config(create_asgi_app(settings), host=settings.host, port=settings.port, log_level="info")
+    asyncio.run(uvicorn.Server(config).serve())
 
 
 if __name__ == "__main__":
-    mcp.run(transport="sse")
+    main()
@@ -1,21 +1,66 @@
 from __future__ import annotations
 
 import datetime as dt
+import heapq
 import json
+import os
 import re
-from typing import Any
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any, NamedTuple
 
 from pydantic import ValidationError
 
-from src.models import ApiError, BookingResponse, CompareHotelsResponse, ErrorEnvelope, GuestDetails, HotelComparisonItem, SearchHotelsResponse
+from src import geo, locations, profiling, property_master, tracing
+from src.cache import ResponseCache, record_dependencies
+from src.client import upstream_health
+from src.deltas import DeltaTracker
+from src.models import (
+    ApiError,
+    BookingResponse,
+    ErrorEnvelope,
+    GuestDetails,
+    LocationSuggestion,
+    SearchHotelsResponse,
+    SuggestLocationsResponse,
+    COMPACT_COMPARISON_FIELDS,
+    COMPACT_HOTEL_FIELDS,
+    COMPACT_OFFER_FIELDS,
+    COMPARISON_ITEM_FIELDS,
+    HOTEL_CARD_FIELDS,
+    HOTEL_IMAGE_FIELDS,
+    HOTEL_PRICE_FIELDS,
+    comparison_item_payload,
+    project_payload,
+)
 from src.providers.base import HotelProvider
-from src.providers.sigtrip import SigtripProvider
+from src.providers.registry import ProviderRegistry
 
 
-class HotelWrapperService:
-    def __init__(self, provider: HotelProvider | None = None):
-        self.provider: HotelProvider = provider or SigtripProvider()
+MAX_NEAR_RADIUS_KM = 50.0
+# Serialized search/compare responses; entries also die as soon as an upstream cache entry they used changes.
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_SECONDS", "30"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_VIEWS = ("full", "compact")
+# Observes successful searches: (resolved location, check-in, check-out, guests). The cache warmer adds one.
+SearchListener = Callable[[str, str, str, int], None]
+# Card fields compare_hotels reads from its internal search.
+_COMPARE_SEARCH_FIELDS = ("hotel_id", "property_id", "provider_ids", "name", "availability_status", "price_preview", "top_offers")
+
 
+class HotelWrapperService:
+    def __init__(
+        self,
+        provider: HotelProvider | None = None,
+        response_cache: ResponseCache | None = None,
+        delta_tracker: DeltaTracker | None = None,
+    ):
+        self.provider: HotelProvider = provider or ProviderRegistry.from_env()
+        self.response_cache = response_cache or ResponseCache(RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_SIZE)
+        self.delta_tracker = delta_tracker or DeltaTracker()
+        self.search_listeners: list[SearchListener] = []
+
+    @tracing.traced("service.search_hotel_offers")
     async def search_hotel_offers(
         self,
         location: str,
@@ -24,9 +69,110 @@ class HotelWrapperService:
         guests: int = 1,
         max_hotels: int = 5,
         max_offers_per_hotel: int = 3,
+        near: str | None = None,
+        radius_km: float | None = None,
+        view: str = "full",
+        fields: list[str] | None = None,
+        session_id: str | None = None,
+        since_version: str | None = None,
+    ) -> dict[str, Any]:
+        result = await self._cached_search_hotel_offers(
+            location, check_in, check_out, guests, max_hotels, max_offers_per_hotel, near, radius_km, view, fields
+        )
+        self._add_live_health(result)
+        if self.search_listeners and result.get("ok") is not False:
+            # Response-cache hits count too: they are still searches someone made.
+            self._notify_search_listeners(location, check_in, check_out, guests)
+        if session_id and result.get("ok") is not False:
+            result = self.delta_tracker.apply(session_id, "hotels", result, since_version)
+        return result
+
+    def _notify_search_listeners(self, location: str, check_in: str | None, check_out: str | None, guests: int) -> None:
+        resolved = locations.resolve_location(location)
+        if resolved is None:
+            return
+        normalized_check_in, normalized_check_out, _ = _normalize_or_default_dates(check_in, check_out)
+        for listener in self.search_listeners:
+            listener(resolved.city_norm, normalized_check_in, normalized_check_out, max(1, guests))
+
+    def _add_live_health(self, result: dict[str, Any]) -> None:
+        """Current health scores, added after the response-cache lookup so a cache hit does not report stale ones."""
+        provider_metadata = result.get("metadata", {}).get("provider_metadata")
+        if provider_metadata is None:
+            return
+        provider_metadata["upstream_health"] = upstream_health()
+        if isinstance(self.provider, ProviderRegistry):
+            for name, entry in provider_metadata.get("providers", {}).items():
+                if name in self.provider.providers:
+                    entry["health"] = self.provider.health.get(name).snapshot()
+
+    async def _cached_search_hotel_offers(
+        self,
+        location: str,
+        check_in: str | None,
+        check_out: str | None,
+        guests: int,
+        max_hotels: int,
+        max_offers_per_hotel: int,
+        near: str | None,
+        radius_km: float | None,
+        view: str,
+        fields: list[str] | None,
     ) -> dict[str, Any]:
-        normalized_check_in, normalized_check_out, date_metadata = _normalize_or_default_dates(check_in, check_out)
+        # Raw arguments are part of the key because full responses echo them in metadata.raw_input.
+        key = _response_cache_key(
+            "search_hotel_offers",
+            location,
+            check_in,
+            check_out,
+            guests,
+            max_hotels,
+            max_offers_per_hotel,
+            near,
+            radius_km,
+            view,
+            tuple(fields) if fields else None,
+        )
+        cached = self.response_cache.get(key)
+        tracing.current_span().set_attribute("response_cache.hit", cached is not None)
+        if cached is not None:
+            return cached
+        with record_dependencies() as dependencies:
+            result = await self._search_hotel_offers(
+                location, check_in, check_out, guests, max_hotels, max_offers_per_hotel, near, radius_km, view, fields
+            )
+        if result.get("ok") is not False:
+            with tracing.span("service.response_cache.put"), profiling.stage("serialization"):
+                self.response_cache.put(key, result, dependencies)
+        return result
+
+    async def _search_hotel_offers(
+        self,
+        location: str,
+        check_in: str | None,
+        check_out: str | None,
+        guests: int,
+        max_hotels: int,
+        max_offers_per_hotel: int,
+        near: str | None,
+        radius_km: float | None,
+        view: str,
+        fields: list[str] | None,
+    ) -> dict[str, Any]:
+        projection = _resolve_projection(view, fields, HOTEL_CARD_FIELDS, COMPACT_HOTEL_FIELDS)
+        if isinstance(projection, dict):
+            return projection
+        with profiling.stage("parse"):
+            normalized_check_in, normalized_check_out, date_metadata = _normalize_or_default_dates(check_in, check_out)
         safe_guests = max(1, guests)
+        near_point = geo.resolve_point(near) if near else None
+        safe_radius = min(radius_km, MAX_NEAR_RADIUS_KM) if radius_km and radius_km > 0 else geo.DEFAULT_NEAR_RADIUS_KM
+        # Only pass geo arguments when used so providers without `near` support keep working.
+        geo_arguments: dict[str, Any] = {"near": near_point, "radius_km": safe_radius} if near_point is not None else {}
+        # Likewise for projections; the provider then skips upstream calls for fields nobody asked for.
+        projection_arguments: dict[str, Any] = (
+            {"fields": projection.fields, "offer_fields": projection.offer_fields} if projection.fields is not None else {}
+        )
         response: SearchHotelsResponse = await self.provider.search_hotel_offers(
             location=location,
             check_in=normalized_check_in,
@@ -34,8 +180,26 @@ class HotelWrapperService:
             guests=safe_guests,
             max_hotels=max_hotels,
             max_offers_per_hotel=max_offers_per_hotel,
+            **geo_arguments,
+            **projection_arguments,
         )
-        output = response.model_dump(mode="json")
+        with tracing.span("service.to_payload", hotels=len(response.hotels)), profiling.stage("serialization"):
+            output = response.to_payload()
+        # Projected only after the unprojected cards have been read for the data-source summary below.
+        hotels = output.get("hotels", [])
+        if projection.fields is not None:
+            output["hotels"] = [_project_hotel(hotel, projection) for hotel in hotels]
+        if projection.view == "compact":
+            defaults_applied, warnings = _input_notes(date_metadata, guests)
+            if near and near_point is None:
+                warnings.append(_NEAR_UNRESOLVED_WARNING)
+            output["metadata"] = {
+                "view": "compact",
+                "defaults_applied": defaults_applied,
+                "warnings": warnings,
+                "contract_version": "v1",
+            }
+            return output
         provider_metadata = output.get("metadata", {})
         metadata = _build_metadata(
             raw_location=location,
@@ -46,22 +210,38 @@ class HotelWrapperService:
             normalized_check_in=normalized_check_in,
             normalized_check_out=normalized_check_out,
             normalized_guests=safe_guests,
-            hotels=output.get("hotels", []),
+            hotels=hotels,
             date_metadata=date_metadata,
             interpreted_from_query=False,
+            fields=projection.fields,
         )
+        if near:
+            metadata["raw_input"]["near"] = near
+            metadata["normalized_input"]["near"] = (
+                {"latitude": near_point.latitude, "longitude": near_point.longitude, "radius_km": safe_radius}
+                if near_point is not None
+                else None
+            )
+            if near_point is None:
+                metadata["warnings"].append(_NEAR_UNRESOLVED_WARNING)
         metadata["provider_metadata"] = provider_metadata
         metadata["contract_version"] = "v1"
         output["metadata"] = metadata
         return output
 
+    @tracing.traced("service.plan_hotel_options")
     async def plan_hotel_options(
         self,
         query: str,
         max_hotels: int = 5,
         max_offers_per_hotel: int = 3,
+        view: str = "full",
+        fields: list[str] | None = None,
+        session_id: str | None = None,
+        since_version: str | None = None,
     ) -> dict[str, Any]:
-        parsed = _parse_natural_query(query)
+        with profiling.stage("parse"):
+            parsed = _parse_natural_query(query)
         result = await self.search_hotel_offers(
             location=parsed["location"],
             check_in=parsed.get("check_in"),
@@ -69,7 +249,14 @@ class HotelWrapperService:
             guests=parsed.get("guests", 1),
             max_hotels=max_hotels,
             max_offers_per_hotel=max_offers_per_hotel,
+            near=parsed.get("near"),
+            view=view,
+            fields=fields,
+            session_id=session_id,
+            since_version=since_version,
         )
+        if result.get("ok") is False:
+            return result
         metadata = result.get("metadata", {})
         metadata["interpreted_from_query"] = True
         metadata["query_parse"] = {
@@ -78,10 +265,12 @@ class HotelWrapperService:
             "check_in": parsed.get("check_in"),
             "check_out": parsed.get("check_out"),
             "guests": parsed.get("guests", 1),
+            "near": parsed.get("near"),
         }
         result["metadata"] = metadata
         return result
 
+    @tracing.traced("service.create_booking_request")
     async def create_booking_request(self, offer_id: str, guest_details: str) -> dict[str, Any]:
         guest = self._parse_guest_details(guest_details)
         if isinstance(guest, dict):
@@ -99,6 +288,7 @@ class HotelWrapperService:
         payload["contract_version"] = "v1"
         return payload
 
+    @tracing.traced("service.compare_hotels")
     async def compare_hotels(
         self,
         location: str,
@@ -107,7 +297,68 @@ class HotelWrapperService:
         check_out: str | None = None,
         guests: int = 1,
         max_hotels: int = 8,
+        view: str = "full",
+        fields: list[str] | None = None,
+        session_id: str | None = None,
+        since_version: str | None = None,
+    ) -> dict[str, Any]:
+        result = await self._cached_compare_hotels(location, hotel_ids, check_in, check_out, guests, max_hotels, view, fields)
+        self._add_live_health(result)
+        if session_id and result.get("ok") is not False:
+            result = self.delta_tracker.apply(session_id, "comparison", result, since_version)
+        return result
+
+    async def _cached_compare_hotels(
+        self,
+        location: str,
+        hotel_ids: list[str] | None,
+        check_in: str | None,
+        check_out: str | None,
+        guests: int,
+        max_hotels: int,
+        view: str,
+        fields: list[str] | None,
+    ) -> dict[str, Any]:
+        key = _response_cache_key(
+            "compare_hotels",
+            location,
+            tuple(hotel_ids) if hotel_ids else None,
+            check_in,
+            check_out,
+            guests,
+            max_hotels,
+            view,
+            tuple(fields) if fields else None,
+        )
+        cached = self.response_cache.get(key)
+        tracing.current_span().set_attribute("response_cache.hit", cached is not None)
+        if cached is not None:
+            return cached
+        with record_dependencies() as dependencies:
+            result = await self._compare_hotels(location, hotel_ids, check_in, check_out, guests, max_hotels, view, fields)
+        if result.get("ok") is not False:
+            with tracing.span("service.response_cache.put"), profiling.stage("serialization"):
+                self.response_cache.put(key, result, dependencies)
+        return result
+
+    async def _compare_hotels(
+        self,
+        location: str,
+        hotel_ids: list[str] | None,
+        check_in: str | None,
+        check_out: str | None,
+        guests: int,
+        max_hotels: int,
+        view: str,
+        fields: list[str] | None,
     ) -> dict[str, Any]:
+        projection = _resolve_projection(view, fields, COMPARISON_ITEM_FIELDS, COMPACT_COMPARISON_FIELDS)
+        if isinstance(projection, dict):
+            return projection
+        item_fields = projection.fields if projection.fields is not None else COMPARISON_ITEM_FIELDS
+        search_fields = list(_COMPARE_SEARCH_FIELDS)
+        if "image_url" in item_fields:
+            search_fields.append("thumbnail_url")
         search = await self.search_hotel_offers(
             location=location,
             check_in=check_in,
@@ -115,53 +366,62 @@ class HotelWrapperService:
             guests=guests,
             max_hotels=max_hotels,
             max_offers_per_hotel=5,
+            view=projection.view,
+            fields=search_fields,
         )
         hotels = search.get("hotels", [])
         if hotel_ids:
             requested = set(hotel_ids)
             hotels = [hotel for hotel in hotels if hotel.get("hotel_id") in requested]
 
-        grouped = _group_hotels_by_property(hotels)
-        ranked = sorted(grouped, key=lambda h: h.get("price_preview", {}).get("from_total") or float("inf"))
-        comparison_items: list[HotelComparisonItem] = []
-        for idx, hotel in enumerate(ranked, start=1):
-            preview = hotel.get("price_preview", {})
-            rank = idx if preview.get("from_total") is not None else None
+        ranked = _rank_hotel_groups(_group_hotels_by_property(hotels), limit=max(max_hotels, 1))
+        # Search output is already JSON-ready and validated, so items are built as payloads directly.
+        comparison_items: list[dict[str, Any]] = []
+        for idx, group in enumerate(ranked, start=1):
+            hotel = group.hotel
+            preview = hotel.get("price_preview") or {}
             comparison_items.append(
-                HotelComparisonItem(
+                comparison_item_payload(
                     property_id=hotel.get("property_id"),
                     hotel_id=hotel.get("hotel_id"),
-                    provider_ids=hotel.get("provider_ids", [hotel.get("hotel_id")]),
+                    provider_ids=group.provider_ids,
                     name=hotel.get("name"),
                     availability_status=hotel.get("availability_status", "unavailable"),
                     from_total=preview.get("from_total"),
                     currency=preview.get("currency"),
                     image_url=hotel.get("thumbnail_url"),
-                    offer_count=len(hotel.get("top_offers", [])),
-                    rank_by_price=rank,
+                    offer_count=len(hotel.get("top_offers") or ()),
+                    rank_by_price=idx if group.sort_price != _UNPRICED else None,
                 )
             )
-
-        response = CompareHotelsResponse(
-            provider=str(search.get("provider", "sigtrip")),
-            query=dict(search.get("query", {})),
-            metadata=dict(search.get("metadata", {})),
-            comparison=comparison_items,
-        )
-        payload = response.model_dump(mode="json")
+            if projection.fields is not None:
+                comparison_items[-1] = project_payload(comparison_items[-1], projection.fields)
+
+        payload = {
+            "provider": str(search.get("provider", "sigtrip")),
+            "query": dict(search.get("query", {})),
+            "metadata": dict(search.get("metadata", {})),
+            "comparison": comparison_items,
+        }
         payload["metadata"]["comparison_count"] = len(comparison_items)
         payload["metadata"]["filtered_by_hotel_ids"] = bool(hotel_ids)
         payload["metadata"]["dedupe_strategy"] = "group_by_property_id"
         payload["metadata"]["contract_version"] = "v1"
         return payload
 
+    @tracing.traced("service.compare_hotels_from_query")
     async def compare_hotels_from_query(
         self,
         query: str,
         hotel_ids: list[str] | None = None,
         max_hotels: int = 8,
+        view: str = "full",
+        fields: list[str] | None = None,
+        session_id: str | None = None,
+        since_version: str | None = None,
     ) -> dict[str, Any]:
-        parsed = _parse_natural_query(query)
+        with profiling.stage("parse"):
+            parsed = _parse_natural_query(query)
         result = await self.compare_hotels(
             location=parsed["location"],
             hotel_ids=hotel_ids,
@@ -169,7 +429,13 @@ class HotelWrapperService:
             check_out=parsed.get("check_out"),
             guests=parsed.get("guests", 1),
             max_hotels=max_hotels,
+            view=view,
+            fields=fields,
+            session_id=session_id,
+            since_version=since_version,
         )
+        if result.get("ok") is False:
+            return result
         metadata = result.get("metadata", {})
         metadata["interpreted_from_query"] = True
         metadata["query_parse"] = {
@@ -182,6 +448,21 @@ class HotelWrapperService:
         result["metadata"] = metadata
         return result
 
+    @tracing.traced("service.suggest_locations")
+    async def suggest_locations(self, query: str, limit: int = 5) -> dict[str, Any]:
+        safe_limit = min(max(limit, 1), locations.SUGGESTION_CAP)
+        await locations.LOCATION_INDEX.refresh()
+        resolved = locations.resolve_location(query)
+        response = SuggestLocationsResponse(
+            query=query,
+            resolved=LocationSuggestion(**resolved.to_dict()) if resolved is not None else None,
+            suggestions=[LocationSuggestion(**entry.to_dict()) for entry in locations.suggest_locations(query, safe_limit)],
+        )
+        payload = response.model_dump(mode="json")
+        payload["metadata"]["contract_version"] = "v1"
+        return payload
+
+    @tracing.traced("service.cancel_booking")
     async def cancel_booking(
         self,
         provider_booking_ref: str,
@@ -214,6 +495,7 @@ class HotelWrapperService:
         payload["contract_version"] = "v1"
         return payload
 
+    @tracing.traced("service.get_booking_status")
     async def get_booking_status(self, provider_booking_ref: str) -> dict[str, Any]:
         if not provider_booking_ref.strip():
             return error_envelope(
@@ -267,59 +549,86 @@ def _normalize_or_default_dates(check_in: str | None, check_out: str | None) ->
     return parsed_in.isoformat(), parsed_out.isoformat(), metadata
 
 
+_DATE_RE = re.compile(r"^(?:(\d{4})([-/])(\d{1,2})\2(\d{1,2})|(\d{1,2})([-/])(\d{1,2})\6(\d{4}))$")
+
+_DATE_TOKEN = r"\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{4}"
+_RELATIVE_DATE_TOKEN = r"today|tonight|tomorrow|(?:this|next)\s+weekend"
+_PHRASE_END = rf"\s+(?:for|from|with|check|on|in|near|{_RELATIVE_DATE_TOKEN})\b|\s*[.,!?]|\s*$"
+_QUERY_TOKEN_RE = re.compile(
+    rf"(?:\bfrom\s+)?\b(?P<check_in>{_DATE_TOKEN})\s*(?:to|-)\s*(?P<check_out>{_DATE_TOKEN})\b"
+    rf"|\b(?P<relative>{_RELATIVE_DATE_TOKEN})\b"
+    r"|\b(?P<guests>\d+)\s*(?:guest|guests|adult|adults)\b"
+    rf"|\bin\s+(?P<location>[a-zA-Z][a-zA-Z\s]*?)(?={_PHRASE_END})"
+    rf"|\bnear\s+(?P<near>-?\d{{1,2}}(?:\.\d+)?\s*,\s*-?\d{{1,3}}(?:\.\d+)?|[a-zA-Z][a-zA-Z\s]*?(?={_PHRASE_END}))",
+    re.IGNORECASE,
+)
+_QUERY_CACHE_SIZE = 1024
+
+
 def _parse_date(raw: str) -> dt.date | None:
-    candidates = [
-        "%Y-%m-%d",
-        "%m/%d/%Y",
-        "%m-%d-%Y",
-        "%Y/%m/%d",
-    ]
-    value = raw.strip()
-    for fmt in candidates:
-        try:
-            return dt.datetime.strptime(value, fmt).date()
-        except ValueError:
-            continue
-    return None
+    match = _DATE_RE.match(raw.strip())
+    if not match:
+        return None
+    if match.group(1):
+        year, month, day = match.group(1), match.group(3), match.group(4)
+    else:
+        month, day, year = match.group(5), match.group(7), match.group(8)
+    try:
+        return dt.date(int(year), int(month), int(day))
+    except ValueError:
+        return None
 
 
 def _parse_natural_query(query: str) -> dict[str, Any]:
-    location = _extract_location(query) or query.strip()
-    guests = _extract_guests(query) or 1
-    check_in, check_out = _extract_dates(query)
+    location, guests, check_in, check_out, near = _parse_query_tokens(query, dt.date.today())
     return {
         "location": location,
         "guests": guests,
         "check_in": check_in,
         "check_out": check_out,
+        "near": near,
     }
 
 
-def _extract_location(query: str) -> str | None:
-    match = re.search(r"\bin\s+([a-zA-Z][a-zA-Z\s]+?)(?:\s+(?:for|from|with|check|on)\b|$)", query, re.IGNORECASE)
-    if not match:
-        return None
-    return match.group(1).strip(" .,!?\t")
-
-
-def _extract_guests(query: str) -> int | None:
-    match = re.search(r"\b(\d+)\s*(?:guest|guests|adult|adults)\b", query, re.IGNORECASE)
-    if not match:
-        return None
-    return int(match.group(1))
-
-
-def _extract_dates(query: str) -> tuple[str | None, str | None]:
-    patterns = [
-        r"\b(\d{4}-\d{2}-\d{2})\s*(?:to|-)\s*(\d{4}-\d{2}-\d{2})\b",
-        r"\b(\d{1,2}/\d{1,2}/\d{4})\s*(?:to|-)\s*(\d{1,2}/\d{1,2}/\d{4})\b",
-        r"\bfrom\s+(\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{4})\s+to\s+(\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{4})\b",
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, query, re.IGNORECASE)
-        if match:
-            return match.group(1), match.group(2)
-    return None, None
+@lru_cache(maxsize=_QUERY_CACHE_SIZE)
+def _parse_query_tokens(query: str, today: dt.date) -> tuple[str, int, str | None, str | None, str | None]:
+    # Keyed on `today` as well so relative dates never outlive the day they were parsed on.
+    location: str | None = None
+    guests: int | None = None
+    check_in: str | None = None
+    check_out: str | None = None
+    near: str | None = None
+    for match in _QUERY_TOKEN_RE.finditer(query):
+        kind = match.lastgroup
+        if kind == "check_out" and check_in is None:
+            check_in, check_out = match.group("check_in"), match.group("check_out")
+        elif kind == "relative" and check_in is None:
+            check_in, check_out = _relative_dates(match.group("relative"), today)
+        elif kind == "guests" and guests is None:
+            guests = int(match.group("guests"))
+        elif kind == "location" and location is None:
+            location = match.group("location").strip(" .,!?\t") or None
+        elif kind == "near" and near is None:
+            near = match.group("near").strip(" .,!?\t") or None
+    return location or query.strip(), guests or 1, check_in, check_out, near
+
+
+def _relative_dates(phrase: str, today: dt.date) -> tuple[str, str]:
+    key = " ".join(phrase.lower().split())
+    if key in ("today", "tonight"):
+        start, nights = today, 1
+    elif key == "tomorrow":
+        start, nights = today + dt.timedelta(days=1), 1
+    else:
+        # Weekend stays run Friday -> Sunday; mid-weekend queries start today.
+        friday = today + dt.timedelta(days=(4 - today.weekday()) % 7)
+        if today.weekday() > 4:
+            friday -= dt.timedelta(days=7)
+        if key.startswith("next"):
+            friday += dt.timedelta(days=7)
+        start = max(friday, today)
+        nights = max((friday + dt.timedelta(days=2) - start).days, 1)
+    return start.isoformat(), (start + dt.timedelta(days=nights)).isoformat()
 
 
 def _build_metadata(
@@ -334,23 +643,22 @@ def _build_metadata(
     hotels: list[dict[str, Any]],
     date_metadata: dict[str, bool],
     interpreted_from_query: bool,
+    fields: frozenset[str] | None = None,
 ) -> dict[str, Any]:
-    warnings: list[str] = []
-    defaults_applied: list[str] = []
-    if date_metadata.get("used_default_dates"):
-        defaults_applied.append("dates")
-        warnings.append("Dates were missing or invalid; default date range was applied.")
-    if raw_guests < 1:
-        defaults_applied.append("guests")
-        warnings.append("Guests must be >= 1; guests was set to 1.")
+    defaults_applied, warnings = _input_notes(date_metadata, raw_guests)
 
     source_summary = {
         "image": "upstream",
         "pricing": "upstream",
     }
-    if any(h.get("image_source") != "upstream" for h in hotels):
+    # Images or prices that `fields` did not ask for were never fetched; their "none" sources say nothing.
+    if (fields is None or not fields.isdisjoint(HOTEL_IMAGE_FIELDS)) and any(
+        h.get("image_source") != "upstream" for h in hotels
+    ):
         source_summary["image"] = "mixed"
-    if any(h.get("pricing_source") != "upstream" for h in hotels):
+    if (fields is None or not fields.isdisjoint(HOTEL_PRICE_FIELDS)) and any(
+        h.get("pricing_source") != "upstream" for h in hotels
+    ):
         source_summary["pricing"] = "mixed"
 
     return {
@@ -373,31 +681,112 @@ def _build_metadata(
     }
 
 
+def _response_cache_key(tool_name: str, *arguments: Any) -> tuple[Any, ...]:
+    # Default dates depend on today, and canonical mapping on the property master version.
+    return (tool_name, *arguments, dt.date.today().isoformat(), property_master.catalog_version())
+
+
+def _input_notes(date_metadata: dict[str, bool], raw_guests: int) -> tuple[list[str], list[str]]:
+    warnings: list[str] = []
+    defaults_applied: list[str] = []
+    if date_metadata.get("used_default_dates"):
+        defaults_applied.append("dates")
+        warnings.append("Dates were missing or invalid; default date range was applied.")
+    if raw_guests < 1:
+        defaults_applied.append("guests")
+        warnings.append("Guests must be >= 1; guests was set to 1.")
+    return defaults_applied, warnings
+
+
+_NEAR_UNRESOLVED_WARNING = "near could not be resolved to a known landmark or 'lat,lon'; it was ignored."
+
+
+class _Projection(NamedTuple):
+    view: str
+    fields: frozenset[str] | None
+    offer_fields: frozenset[str] | None
+
+
+def _resolve_projection(
+    view: str,
+    fields: list[str] | None,
+    allowed: frozenset[str],
+    compact: frozenset[str],
+) -> _Projection | dict[str, Any]:
+    if view not in RESPONSE_VIEWS:
+        return error_envelope(
+            code="INVALID_VIEW",
+            message=f"view must be one of: {', '.join(RESPONSE_VIEWS)}",
+            retryable=False,
+            details={"view": view},
+        )
+    offer_fields = COMPACT_OFFER_FIELDS if view == "compact" else None
+    if fields:
+        unknown = sorted(set(fields) - allowed)
+        if unknown:
+            return error_envelope(
+                code="INVALID_FIELDS",
+                message="Unknown response fields requested.",
+                retryable=False,
+                details={"unknown_fields": unknown, "allowed_fields": sorted(allowed)},
+            )
+        # hotel_id is always kept so offers stay bookable and comparable.
+        return _Projection(view, frozenset(fields) | {"hotel_id"}, offer_fields)
+    return _Projection(view, compact if view == "compact" else None, offer_fields)
+
+
+def _project_hotel(hotel: dict[str, Any], projection: _Projection) -> dict[str, Any]:
+    projected = project_payload(hotel, projection.fields)
+    if projection.offer_fields is not None and "top_offers" in projected:
+        projected["top_offers"] = [project_payload(offer, projection.offer_fields) for offer in projected["top_offers"]]
+    return projected
+
+
 def error_envelope(code: str, message: str, retryable: bool = False, details: dict[str, Any] | None = None) -> dict[str, Any]:
     return ErrorEnvelope(
         error=ApiError(code=code, message=message, retryable=retryable, details=details),
     ).model_dump(mode="json")
 
 
-def _group_hotels_by_property(hotels: list[dict[str, Any]]) -> list[dict[str, Any]]:
-    groups: dict[str, list[dict[str, Any]]] = {}
+class _PropertyGroup(NamedTuple):
+    sort_price: float
+    order: int
+    hotel: dict[str, Any]
+    provider_ids: list[str]
+
+
+_UNPRICED = float("inf")
+
+
+def _sort_price(hotel: dict[str, Any]) -> float:
+    from_total = (hotel.get("price_preview") or {}).get("from_total")
+    return _UNPRICED if from_total is None else float(from_total)
+
+
+def _group_hotels_by_property(hotels: list[dict[str, Any]]) -> list[_PropertyGroup]:
+    # Single pass: per property keep [price, first_seen, cheapest card, provider ids, seen ids].
+    groups: dict[str, list[Any]] = {}
     for hotel in hotels:
-        key = hotel.get("property_id") or hotel.get("hotel_id")
-        groups.setdefault(str(key), []).append(hotel)
-
-    deduped: list[dict[str, Any]] = []
-    for group_hotels in groups.values():
-        best = min(group_hotels, key=lambda h: h.get("price_preview", {}).get("from_total") or float("inf"))
-        all_provider_ids: list[str] = []
-        for candidate in group_hotels:
-            ids = candidate.get("provider_ids", [])
-            if not ids and candidate.get("hotel_id"):
-                ids = [candidate["hotel_id"]]
-            for provider_id in ids:
-                if provider_id not in all_provider_ids:
-                    all_provider_ids.append(provider_id)
-        best = dict(best)
-        best["provider_ids"] = all_provider_ids
-        deduped.append(best)
-
-    return deduped
+        key = str(hotel.get("property_id") or hotel.get("hotel_id"))
+        price = _sort_price(hotel)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = [price, len(groups), hotel, [], set()]
+        elif price < group[0]:
+            group[0], group[2] = price, hotel
+
+        ids = hotel.get("provider_ids") or ([hotel["hotel_id"]] if hotel.get("hotel_id") else [])
+        seen: set[str] = group[4]
+        for provider_id in ids:
+            if provider_id not in seen:
+                seen.add(provider_id)
+                group[3].append(provider_id)
+
+    return [_PropertyGroup(price, order, hotel, ids) for price, order, hotel, ids, _seen in groups.values()]
+
+
+def _rank_hotel_groups(groups: list[_PropertyGroup], limit: int) -> list[_PropertyGroup]:
+    # `order` is unique, so ties on price never fall through to comparing dicts.
+    if limit >= len(groups):
+        return sorted(groups)
+    return heapq.nsmallest(limit, groups)
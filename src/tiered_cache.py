@@ -0,0 +1,411 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections.abc import Callable, Iterable, Sequence
+from typing import Any, Protocol
+from urllib.parse import unquote, urlsplit
+
+from src.cache import MISS, TtlCache
+
+# Shared (L2) cache behind every replica's in-process LRU. Empty = in-process only.
+# sqlite:///path/to/cache.db, redis://[:password@]host:port/db, or several redis:// URLs (comma-separated, sharded).
+CACHE_L2_URL = os.getenv("CACHE_L2_URL", "")
+# Part of every shared key; bump it when the cached value format changes.
+CACHE_L2_NAMESPACE = os.getenv("CACHE_L2_NAMESPACE", "sigtrip-mcp:v1")
+# A slow shared cache must cost less than the upstream call it saves; past this it counts as a miss.
+CACHE_L2_TIMEOUT_SECONDS = float(os.getenv("CACHE_L2_TIMEOUT_SECONDS", "0.1"))
+# Encoded values at least this large are zlib-compressed.
+CACHE_L2_COMPRESS_MIN_BYTES = int(os.getenv("CACHE_L2_COMPRESS_MIN_BYTES", "512"))
+
+_RAW = b"j"
+_COMPRESSED = b"z"
+
+logger = logging.getLogger(__name__)
+
+
+def encode_value(value: Any, compress_min_bytes: int = CACHE_L2_COMPRESS_MIN_BYTES) -> bytes:
+    """One format byte, then compact JSON (zlib-compressed when large). Tuples come back as lists."""
+    data = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+    if len(data) >= compress_min_bytes:
+        packed = zlib.compress(data, 6)
+        if len(packed) < len(data):
+            return _COMPRESSED + packed
+    return _RAW + data
+
+
+def decode_value(data: bytes) -> Any:
+    kind, body = data[:1], data[1:]
+    if kind == _COMPRESSED:
+        body = zlib.decompress(body)
+    elif kind != _RAW:
+        raise ValueError(f"unknown cache value format {kind!r}")
+    return json.loads(body)
+
+
+def shared_key(namespace: str, cache_name: str, key: Any) -> str:
+    """Same key on every replica and Python version (unlike hash()), and a fixed length whatever the arguments."""
+    text = key if isinstance(key, str) else json.dumps(key, sort_keys=True, separators=(",", ":"), default=str)
+    return f"{namespace}:{cache_name}:{hashlib.blake2b(text.encode(), digest_size=16).hexdigest()}"
+
+
+class SharedCacheBackend(Protocol):
+    async def get(self, key: str) -> tuple[bytes, float] | None:
+        """(value, seconds left to live), or None when the key is missing or expired."""
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None: ...
+
+    async def delete(self, key: str) -> None: ...
+
+    async def close(self) -> None: ...
+
+    def describe(self) -> dict[str, Any]: ...
+
+
+class SqliteCacheBackend:
+    """Shared cache in a local SQLite file: shared by the workers of one node, and kept across restarts."""
+
+    # Expired rows are deleted every this many writes.
+    PRUNE_EVERY = 500
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    async def get(self, key: str) -> tuple[bytes, float] | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        await asyncio.to_thread(self._set, key, value, ttl_seconds)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._execute, "DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    async def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def describe(self) -> dict[str, Any]:
+        return {"backend": "sqlite", "path": self.path}
+
+    def _get(self, key: str) -> tuple[bytes, float] | None:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        # Wall-clock expiry: the file is shared between processes, which have no common monotonic clock.
+        remaining = row[1] - time.time()
+        return (bytes(row[0]), remaining) if remaining > 0 else None
+
+    def _set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl_seconds),
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+
+    def _execute(self, sql: str, params: tuple[Any, ...]) -> None:
+        with self._lock:
+            self._connection().execute(sql, params)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+
+class RedisCacheBackend:
+    """Minimal RESP2 client (GET/PTTL, SET PX, DEL) on one connection; anything speaking the protocol works."""
+
+    def __init__(self, host: str, port: int = 6379, db: int = 0, password: str | None = None):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock: asyncio.Lock | None = None
+
+    @classmethod
+    def from_url(cls, url: str) -> RedisCacheBackend:
+        parts = urlsplit(url)
+        db = parts.path.strip("/")
+        return cls(
+            parts.hostname or "localhost",
+            parts.port or 6379,
+            int(db) if db else 0,
+            unquote(parts.password) if parts.password else None,
+        )
+
+    async def get(self, key: str) -> tuple[bytes, float] | None:
+        # Both commands in one round trip; PTTL carries the remaining lifetime over to the local cache.
+        value, ttl_ms = await self._execute(("GET", key), ("PTTL", key))
+        if value is None:
+            return None
+        if ttl_ms == -1:
+            # Written by something that set no expiry; let the local TTL decide.
+            return value, float("inf")
+        return (value, ttl_ms / 1000) if ttl_ms > 0 else None
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        await self._execute(("SET", key, value, "PX", max(int(ttl_seconds * 1000), 1)))
+
+    async def delete(self, key: str) -> None:
+        await self._execute(("DEL", key))
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, RuntimeError):
+                pass
+        self._reader = self._writer = None
+
+    def describe(self) -> dict[str, Any]:
+        return {"backend": "redis", "address": f"{self.host}:{self.port}/{self.db}"}
+
+    async def _execute(self, *commands: tuple[Any, ...]) -> list[Any]:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            # Streams belong to the loop that opened them.
+            self._loop, self._lock, self._reader, self._writer = loop, asyncio.Lock(), None, None
+        async with self._lock:
+            try:
+                if self._writer is None or self._writer.is_closing():
+                    await self._connect()
+                assert self._reader is not None and self._writer is not None
+                self._writer.write(b"".join(_resp_command(*command) for command in commands))
+                await self._writer.drain()
+                return [await _read_reply(self._reader) for _ in commands]
+            except BaseException:
+                # A half-read reply would desynchronize every later command on this connection.
+                if self._writer is not None:
+                    self._writer.close()
+                self._reader = self._writer = None
+                raise
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        setup: list[tuple[Any, ...]] = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        for command in setup:
+            self._writer.write(_resp_command(*command))
+            await self._writer.drain()
+            await _read_reply(self._reader)
+
+
+class HashRing:
+    """Consistent hashing: adding or removing a node moves only about 1/n of the keys."""
+
+    def __init__(self, nodes: Sequence[str], replicas: int = 64):
+        if not nodes:
+            raise ValueError("HashRing needs at least one node")
+        points = sorted((_ring_hash(f"{node}#{index}"), node) for node in nodes for index in range(replicas))
+        self._hashes = [point for point, _node in points]
+        self._nodes = [node for _point, node in points]
+
+    def node_for(self, key: str) -> str:
+        index = bisect.bisect(self._hashes, _ring_hash(key)) % len(self._hashes)
+        return self._nodes[index]
+
+
+class ShardedCacheBackend:
+    """Spreads keys over several backends with a HashRing."""
+
+    def __init__(self, backends: dict[str, SharedCacheBackend]):
+        self.backends = backends
+        self.ring = HashRing(list(backends))
+
+    def backend_for(self, key: str) -> SharedCacheBackend:
+        return self.backends[self.ring.node_for(key)]
+
+    async def get(self, key: str) -> tuple[bytes, float] | None:
+        return await self.backend_for(key).get(key)
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        await self.backend_for(key).set(key, value, ttl_seconds)
+
+    async def delete(self, key: str) -> None:
+        await self.backend_for(key).delete(key)
+
+    async def close(self) -> None:
+        for backend in self.backends.values():
+            await backend.close()
+
+    def describe(self) -> dict[str, Any]:
+        return {"backend": "sharded", "shards": [backend.describe() for backend in self.backends.values()]}
+
+
+def backend_from_url(url: str) -> SharedCacheBackend | None:
+    urls = [item.strip() for item in url.split(",") if item.strip()]
+    if not urls:
+        return None
+    backends: dict[str, SharedCacheBackend] = {}
+    for item in urls:
+        scheme = urlsplit(item).scheme
+        if scheme == "sqlite":
+            backends[item] = SqliteCacheBackend(item.removeprefix("sqlite://").removeprefix("/") or "cache.db")
+        elif scheme in ("redis", "tcp"):
+            backends[item] = RedisCacheBackend.from_url(item)
+        else:
+            raise ValueError(f"Unsupported CACHE_L2_URL scheme: {item!r}")
+    if len(backends) == 1:
+        return next(iter(backends.values()))
+    return ShardedCacheBackend(backends)
+
+
+SHARED_CACHE = backend_from_url(CACHE_L2_URL)
+
+
+class TieredCache(TtlCache):
+    """TtlCache (L1) in front of an optional shared backend (L2).
+
+    Reads try L1, then L2; an L2 hit is copied into L1 for no longer than it has left to live there.
+    Writes go to both. L2 failures and timeouts count as misses, so a broken shared cache only costs latency.
+    `clear()` and `invalidate()` touch L1 only: the shared entries belong to every replica.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: float,
+        maxsize: int,
+        shared: SharedCacheBackend | None = None,
+        namespace: str = CACHE_L2_NAMESPACE,
+        timeout_seconds: float = CACHE_L2_TIMEOUT_SECONDS,
+    ):
+        super().__init__(name, ttl_seconds, maxsize)
+        self.shared = shared
+        self.namespace = namespace
+        self.timeout_seconds = timeout_seconds
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.shared_errors = 0
+        self._restore: Callable[[], Iterable[tuple[Any, Any, float]]] | None = None
+        self._restoring: asyncio.Future[None] | None = None
+
+    def restore_from(self, loader: Callable[[], Iterable[tuple[Any, Any, float]]]) -> None:
+        """Fill L1 from `loader()` on the first `fetch()` (or `restore_pending()`), so it costs nothing until then."""
+        self._restore = loader
+
+    async def restore_pending(self) -> None:
+        """Run the pending loader once; concurrent callers wait for the same run instead of missing."""
+        if self._restore is not None:
+            restore, self._restore = self._restore, None
+            self._restoring = asyncio.ensure_future(self._restore_in_thread(restore))
+        restoring = self._restoring
+        if restoring is not None:
+            # Shielded: a caller giving up must not cancel the restore for everyone else.
+            await asyncio.shield(restoring)
+            if self._restoring is restoring:
+                self._restoring = None
+
+    async def _restore_in_thread(self, restore: Callable[[], Iterable[tuple[Any, Any, float]]]) -> None:
+        try:
+            # Reading and decoding up to `maxsize` entries would stall the event loop; only load() runs on it.
+            rows = await asyncio.to_thread(lambda: list(restore()))
+            restored = self.load(rows)
+            logger.info("cache_restored", extra={"cache": self.name, "entries": restored})
+        except Exception as exc:  # noqa: BLE001 - a bad snapshot means a cold cache, not a failed request
+            logger.warning("cache_restore_failed", extra={"cache": self.name, "error": str(exc)})
+
+    async def fetch(self, key: Any) -> Any:
+        if self._restore is not None or self._restoring is not None:
+            await self.restore_pending()
+        value = self.get(key)
+        if value is not MISS or self.shared is None or not self.enabled:
+            return value
+        try:
+            async with asyncio.timeout(self.timeout_seconds):
+                found = await self.shared.get(shared_key(self.namespace, self.name, key))
+            if found is not None:
+                value = decode_value(found[0])
+        except Exception as exc:  # noqa: BLE001 - the shared cache is an optimization, never a dependency
+            self.shared_errors += 1
+            logger.warning("shared_cache_failed", extra={"cache": self.name, "op": "get", "error": str(exc)})
+            return MISS
+        if found is None:
+            self.shared_misses += 1
+            return MISS
+        self.shared_hits += 1
+        self.put(key, value, ttl_seconds=min(found[1], self.ttl_seconds))
+        return value
+
+    async def store(self, key: Any, value: Any) -> None:
+        self.put(key, value)
+        if self.shared is None or not self.enabled:
+            return
+        try:
+            encoded = encode_value(value)
+            async with asyncio.timeout(self.timeout_seconds):
+                await self.shared.set(shared_key(self.namespace, self.name, key), encoded, self.ttl_seconds)
+        except Exception as exc:  # noqa: BLE001 - the shared cache is an optimization, never a dependency
+            self.shared_errors += 1
+            logger.warning("shared_cache_failed", extra={"cache": self.name, "op": "set", "error": str(exc)})
+
+    def stats(self) -> dict[str, Any]:
+        stats = super().stats()
+        if self.shared is not None:
+            stats.update(shared_hits=self.shared_hits, shared_misses=self.shared_misses, shared_errors=self.shared_errors)
+        return stats
+
+
+def _ring_hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def _resp_command(*parts: Any) -> bytes:
+    out = [b"*%d\r\n" % len(parts)]
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode()
+        out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(out)
+
+
+async def _read_reply(reader: asyncio.StreamReader) -> Any:
+    line = await reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("shared cache connection closed")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode()
+    if kind == b"-":
+        raise RuntimeError(f"shared cache error: {body.decode(errors='replace')}")
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        size = int(body)
+        return None if size < 0 else (await reader.readexactly(size + 2))[:-2]
+    if kind == b"*":
+        size = int(body)
+        return None if size < 0 else [await _read_reply(reader) for _ in range(size)]
+    raise RuntimeError(f"unexpected shared cache reply: {line[:40]!r}")
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import atexit
+import functools
+import json
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Protocol, TypeVar
+
+from src.metrics import TRACE_DROPPED
+
+# Fraction of root spans (tool calls) that are traced; child spans follow their root's decision.
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "memory")
+TRACE_FILE_PATH = os.getenv("TRACE_FILE_PATH", "traces.jsonl")
+TRACE_MEMORY_SPANS = int(os.getenv("TRACE_MEMORY_SPANS", "2048"))
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "1000"))
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status", "_root")
+
+    def __init__(self, name: str, trace_id: str, parent: Span | None, attributes: dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start_ns = time.time_ns()
+        self.end_ns: int | None = None
+        self.attributes = attributes
+        self.status = "ok"
+        # Finished spans are buffered on the root and exported together when it ends.
+        self._root: list[Span] = parent._root if parent is not None else []
+
+    @property
+    def recording(self) -> bool:
+        return True
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "duration_ms": round(((self.end_ns or self.start_ns) - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    recording = False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        return None
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter(Protocol):
+    def export(self, spans: list[Span]) -> None: ...
+
+
+class InMemoryExporter:
+    """Keeps the most recent finished spans; read with `spans()` (tests, local debugging)."""
+
+    def __init__(self, max_spans: int = TRACE_MEMORY_SPANS):
+        self._spans: deque[dict[str, Any]] = deque(maxlen=max_spans)
+
+    def export(self, spans: list[Span]) -> None:
+        self._spans.extend(span.to_dict() for span in spans)
+
+    def spans(self) -> list[dict[str, Any]]:
+        return list(self._spans)
+
+    def clear(self) -> None:
+        self._spans.clear()
+
+
+class FileExporter:
+    """Appends one JSON line per span from a writer thread; `export` only queues the finished trace.
+
+    Like the log pipeline, a full queue drops the trace (counted in trace_spans_dropped) instead of
+    blocking the caller. Traces queued together are written with one open and one write.
+    """
+
+    def __init__(self, path: str | Path = TRACE_FILE_PATH, queue_size: int = TRACE_QUEUE_SIZE):
+        self.path = Path(path)
+        self._queue: queue.Queue[list[dict[str, Any]] | None] = queue.Queue(maxsize=max(queue_size, 1))
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+
+    def export(self, spans: list[Span]) -> None:
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait([span.to_dict() for span in spans])
+        except queue.Full:
+            TRACE_DROPPED.inc(len(spans))
+
+    def flush(self) -> None:
+        """Block until every queued trace is on disk."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write what is queued and stop the writer thread."""
+        thread = self._thread
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+            self._thread = None
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            traces = [trace for trace in batch if trace is not None]
+            try:
+                if traces:
+                    with self.path.open("a", encoding="utf-8") as handle:
+                        handle.write(
+                            "".join(json.dumps(span, default=str) + "\n" for trace in traces for span in trace)
+                        )
+            except OSError:
+                TRACE_DROPPED.inc(sum(len(trace) for trace in traces))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if len(traces) < len(batch):
+                return
+
+
+# NOOP_SPAN marks an unsampled trace so its children are not sampled as new roots.
+_CURRENT: ContextVar[Span | _NoopSpan | None] = ContextVar("current_span", default=None)
+_exporter: SpanExporter = FileExporter() if TRACE_EXPORTER == "file" else InMemoryExporter()
+_sample_rate = TRACE_SAMPLE_RATE
+
+
+def configure(exporter: SpanExporter | None = None, sample_rate: float | None = None) -> None:
+    global _exporter, _sample_rate
+    if exporter is not None:
+        _exporter = exporter
+    if sample_rate is not None:
+        _sample_rate = sample_rate
+
+
+def get_exporter() -> SpanExporter:
+    return _exporter
+
+
+def current_span() -> Span | _NoopSpan:
+    return _CURRENT.get() or NOOP_SPAN
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | _NoopSpan]:
+    parent = _CURRENT.get()
+    if parent is NOOP_SPAN:
+        yield NOOP_SPAN
+        return
+    if parent is None and (_sample_rate <= 0 or random.random() >= _sample_rate):
+        token = _CURRENT.set(NOOP_SPAN)
+        try:
+            yield NOOP_SPAN
+        finally:
+            _CURRENT.reset(token)
+        return
+    assert parent is None or isinstance(parent, Span)
+    current = Span(name, parent.trace_id if parent is not None else secrets.token_hex(16), parent, attributes)
+    token = _CURRENT.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.status = "error"
+        current.attributes["error.type"] = type(exc).__name__
+        raise
+    finally:
+        _CURRENT.reset(token)
+        current.end_ns = time.time_ns()
+        current._root.append(current)
+        if parent is None:
+            _exporter.export(current._root)
+
+
+_AsyncFn = TypeVar("_AsyncFn", bound=Callable[..., Awaitable[Any]])
+
+
+def traced(name: str) -> Callable[[_AsyncFn], _AsyncFn]:
+    """Wrap an async function in a span named `name`."""
+
+    def decorator(fn: _AsyncFn) -> _AsyncFn:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return await fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
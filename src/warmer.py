@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import heapq
+import json
+import logging
+import os
+import random
+from typing import Any, NamedTuple
+
+from src import client, tracing
+from src.metrics import CACHE_WARM_RUNS
+from src.providers.base import HotelProvider
+
+# Disabled by default (0). Keep the interval at or below SIGTRIP_PRICE_CACHE_SECONDS for prices to stay warm.
+CACHE_WARM_INTERVAL_SECONDS = float(os.getenv("CACHE_WARM_INTERVAL_SECONDS", "0"))
+CACHE_WARM_JITTER = float(os.getenv("CACHE_WARM_JITTER", "0.2"))
+# Hard cap on upstream requests per warm cycle, retries and hedges included.
+CACHE_WARM_MAX_CALLS = int(os.getenv("CACHE_WARM_MAX_CALLS", "30"))
+CACHE_WARM_TOP_N = int(os.getenv("CACHE_WARM_TOP_N", "5"))
+CACHE_WARM_MAX_HOTELS = int(os.getenv("CACHE_WARM_MAX_HOTELS", "5"))
+# JSON list of {"location", "days_ahead", "nights", "guests"} objects (or plain location strings).
+CACHE_WARM_TARGETS = os.getenv("CACHE_WARM_TARGETS", "")
+
+logger = logging.getLogger(__name__)
+
+
+class WarmTarget(NamedTuple):
+    location: str
+    days_ahead: int = 1
+    nights: int = 1
+    guests: int = 1
+
+    def dates(self, today: dt.date) -> tuple[str, str]:
+        check_in = today + dt.timedelta(days=self.days_ahead)
+        return check_in.isoformat(), (check_in + dt.timedelta(days=self.nights)).isoformat()
+
+
+def parse_targets(raw: str) -> list[WarmTarget]:
+    if not raw.strip():
+        return []
+    targets: list[WarmTarget] = []
+    for item in json.loads(raw):
+        if isinstance(item, str):
+            targets.append(WarmTarget(item.strip().lower()))
+        elif isinstance(item, dict) and item.get("location"):
+            targets.append(
+                WarmTarget(
+                    str(item["location"]).strip().lower(),
+                    int(item.get("days_ahead", 1)),
+                    max(int(item.get("nights", 1)), 1),
+                    max(int(item.get("guests", 1)), 1),
+                )
+            )
+    return targets
+
+
+class PopularSearches:
+    """Search counts per (location, days ahead, nights, guests); halved every warm cycle so interest fades."""
+
+    def __init__(self, max_keys: int = 1000):
+        self.max_keys = max_keys
+        self._counts: dict[WarmTarget, float] = {}
+
+    def record(self, location: str, check_in: str, check_out: str, guests: int, today: dt.date | None = None) -> None:
+        try:
+            start = dt.date.fromisoformat(check_in)
+            nights = (dt.date.fromisoformat(check_out) - start).days
+        except ValueError:
+            return
+        days_ahead = (start - (today or dt.date.today())).days
+        if days_ahead < 0 or nights < 1:
+            return
+        key = WarmTarget(location.strip().lower(), days_ahead, nights, guests)
+        if key not in self._counts and len(self._counts) >= self.max_keys:
+            return
+        self._counts[key] = self._counts.get(key, 0.0) + 1.0
+
+    def top(self, n: int) -> list[WarmTarget]:
+        return [key for key, _count in heapq.nlargest(n, self._counts.items(), key=lambda item: item[1])]
+
+    def decay(self) -> None:
+        self._counts = {key: count / 2 for key, count in self._counts.items() if count >= 1.0}
+
+
+POPULAR_SEARCHES = PopularSearches()
+
+
+class CacheWarmer:
+    """Background task that prefetches rooms, galleries and near-term prices into the provider caches."""
+
+    def __init__(
+        self,
+        provider: HotelProvider,
+        targets: list[WarmTarget] | None = None,
+        popular: PopularSearches = POPULAR_SEARCHES,
+        interval_seconds: float = CACHE_WARM_INTERVAL_SECONDS,
+        jitter: float = CACHE_WARM_JITTER,
+        max_calls: int = CACHE_WARM_MAX_CALLS,
+        top_n: int = CACHE_WARM_TOP_N,
+    ):
+        self.provider = provider
+        self.targets = parse_targets(CACHE_WARM_TARGETS) if targets is None else targets
+        self.popular = popular
+        self.interval_seconds = interval_seconds
+        self.jitter = jitter
+        self.max_calls = max_calls
+        self.top_n = top_n
+        self.last_run: dict[str, Any] | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval_seconds > 0 and self.max_calls > 0
+
+    def plan(self) -> list[WarmTarget]:
+        # Configured targets first, then the most searched ones not already listed.
+        return list(dict.fromkeys([*self.targets, *self.popular.top(self.top_n)]))
+
+    async def run_once(self) -> dict[str, Any]:
+        stats: dict[str, Any] = {"planned": 0, "warmed": 0, "failed": 0, "upstream_calls": 0, "result": "completed"}
+        with tracing.span("warmer.run") as span:
+            if not client.upstream_available():
+                stats["result"] = "paused"
+            else:
+                plan = self.plan()
+                stats["planned"] = len(plan)
+                today = dt.date.today()
+                with client.upstream_budget(self.max_calls) as budget:
+                    for target in plan:
+                        if budget.remaining <= 0:
+                            stats["result"] = "budget_exhausted"
+                            break
+                        if not client.upstream_available():
+                            stats["result"] = "paused"
+                            break
+                        check_in, check_out = target.dates(today)
+                        try:
+                            await self.provider.search_hotel_offers(
+                                location=target.location,
+                                check_in=check_in,
+                                check_out=check_out,
+                                guests=target.guests,
+                                max_hotels=CACHE_WARM_MAX_HOTELS,
+                                max_offers_per_hotel=1,
+                            )
+                            stats["warmed"] += 1
+                        except Exception as exc:  # noqa: BLE001 - a bad target must not stop the warmer
+                            stats["failed"] += 1
+                            logger.warning("cache_warm_failed", extra={"location": target.location, "error": str(exc)})
+                    stats["upstream_calls"] = budget.used
+                    if budget.refused:
+                        stats["result"] = "budget_exhausted"
+            self.popular.decay()
+            span.set_attribute("result", stats["result"])
+        CACHE_WARM_RUNS.labels(stats["result"]).inc()
+        self.last_run = stats
+        return stats
+
+    def start(self) -> asyncio.Task[None] | None:
+        if not self.enabled or (self._task is not None and not self._task.done()):
+            return self._task
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="cache-warmer")
+        return self._task
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "interval_seconds": self.interval_seconds,
+            "max_calls": self.max_calls,
+            "configured_targets": len(self.targets),
+            "last_run": self.last_run,
+        }
+
+    def next_delay(self) -> float:
+        # Jitter spreads replicas apart so they do not warm (and hit the upstream) in lockstep.
+        return max(self.interval_seconds * (1 + random.uniform(-self.jitter, self.jitter)), 0.0)
+
+    async def _run(self) -> None:
+        # First pass soon after start (jittered), so a fresh replica is warm before most traffic arrives.
+        await asyncio.sleep(random.uniform(0, self.jitter * self.interval_seconds))
+        while True:
+            try:
+                await self.run_once()
+            except Exception as exc:  # noqa: BLE001 - keep the loop alive
+                logger.warning("cache_warm_cycle_failed", extra={"error": str(exc)})
+            await asyncio.sleep(self.next_delay())
@@ -0,0 +1,67 @@
+import unittest
+from unittest import mock
+
+from src import cache
+from src.cache import MISS, ResponseCache, TtlCache, record_dependencies
+
+
+class TtlCacheTests(unittest.TestCase):
+    def test_expiry_and_generations(self):
+        prices = TtlCache("prices", ttl_seconds=10, maxsize=2)
+        with mock.patch.object(cache.time, "monotonic", return_value=100.0):
+            prices.put("a", {"total": 1})
+            first = prices.generation("a")
+            self.assertEqual(prices.get("a"), {"total": 1})
+            prices.put("a", {"total": 2})
+            self.assertNotEqual(prices.generation("a"), first)
+        with mock.patch.object(cache.time, "monotonic", return_value=111.0):
+            self.assertIs(prices.get("a"), MISS)
+            self.assertIsNone(prices.generation("a"))
+        self.assertEqual(prices.stats()["hits"], 1)
+
+    def test_disabled_cache_marks_responses_uncacheable(self):
+        disabled = TtlCache("off", ttl_seconds=0, maxsize=10)
+        with record_dependencies() as deps:
+            disabled.put("a", 1)
+        self.assertFalse(deps.cacheable)
+        self.assertIs(disabled.get("a"), MISS)
+
+
+class ResponseCacheTests(unittest.TestCase):
+    def test_hit_returns_fresh_copy_until_an_input_generation_changes(self):
+        rooms = TtlCache("rooms", ttl_seconds=60, maxsize=10)
+        responses = ResponseCache(ttl_seconds=60, maxsize=10)
+        with record_dependencies() as deps:
+            rooms.put("hotel", ["KING"])
+        responses.put("search", {"hotels": [1]}, deps)
+
+        hit = responses.get("search")
+        self.assertEqual(hit, {"hotels": [1]})
+        hit["hotels"].append(2)
+        self.assertEqual(responses.get("search"), {"hotels": [1]})
+
+        rooms.put("hotel", ["QUEEN"])
+        self.assertIsNone(responses.get("search"))
+        self.assertEqual(responses.stats()["invalidations"], 1)
+
+    def test_nested_recorders_and_hits_propagate_dependencies(self):
+        rooms = TtlCache("rooms", ttl_seconds=60, maxsize=10)
+        responses = ResponseCache(ttl_seconds=60, maxsize=10)
+        with record_dependencies() as inner:
+            rooms.put("hotel", ["KING"])
+        responses.put("search", {"ok": True}, inner)
+
+        with record_dependencies() as outer:
+            responses.get("search")
+        self.assertEqual([dep.key for dep in outer.entries], ["hotel"])
+
+        with record_dependencies() as outer:
+            with record_dependencies():
+                cache.mark_uncacheable()
+        self.assertFalse(outer.cacheable)
+        responses.put("compare", {"ok": True}, outer)
+        self.assertIsNone(responses.get("compare"))
+
+
+if __name__ == "__main__":
+    unittest.main()
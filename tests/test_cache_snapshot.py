@@ -0,0 +1,100 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src import cache, cache_snapshot, tiered_cache
+from src.cache import MISS, TtlCache
+from src.cache_snapshot import CacheSnapshot
+from src.tiered_cache import TieredCache
+
+
+class CacheSnapshotTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "snapshots", "cache.db")
+
+    async def asyncTearDown(self):
+        self.tmp.cleanup()
+
+    async def test_restart_restores_lazily_with_remaining_ttl(self):
+        rooms = TieredCache("rooms", 3600, 10)
+        tools = TieredCache("tools", 3600, 10)
+        with mock.patch.object(cache.time, "monotonic", return_value=100.0):
+            rooms.put("hotel-a", {"rooms": ["KING"]})
+            rooms.put("hotel-b", {"rooms": ["QUEEN"]}, ttl_seconds=10)
+            tools.put("tools/list", {"cancel_booking": {"name": "cancel_booking"}})
+        with mock.patch.object(cache.time, "monotonic", return_value=200.0), mock.patch.object(
+            cache_snapshot.time, "time", return_value=5000.0
+        ):
+            self.assertEqual(await CacheSnapshot([rooms, tools], self.path).save(), 2)
+
+        restarted_rooms = TieredCache("rooms", 3600, 10)
+        snapshot = CacheSnapshot([restarted_rooms], self.path)
+        with mock.patch.object(snapshot, "read", wraps=snapshot.read) as read:
+            snapshot.attach()
+            self.assertEqual(len(restarted_rooms), 0)
+            read.assert_not_called()
+            with mock.patch.object(cache_snapshot.time, "time", return_value=5600.0), mock.patch.object(
+                cache.time, "monotonic", return_value=10.0
+            ):
+                # Two first fetches at once share one restore, read in a worker thread.
+                with mock.patch.object(tiered_cache.asyncio, "to_thread", wraps=tiered_cache.asyncio.to_thread) as to_thread:
+                    first, second = await asyncio.gather(restarted_rooms.fetch("hotel-a"), restarted_rooms.fetch("hotel-a"))
+                self.assertEqual(first, {"rooms": ["KING"]})
+                self.assertEqual(second, first)
+                to_thread.assert_called_once()
+            read.assert_called_once_with("rooms")
+        # Saved with 3500s left, restored 600s later: 2900s left.
+        with mock.patch.object(cache.time, "monotonic", return_value=2909.0):
+            self.assertIsNotNone(restarted_rooms.generation("hotel-a"))
+        with mock.patch.object(cache.time, "monotonic", return_value=2911.0):
+            self.assertIsNone(restarted_rooms.generation("hotel-a"))
+
+    async def test_missing_or_corrupt_snapshot_leaves_cache_cold(self):
+        rooms = TieredCache("rooms", 3600, 10)
+        CacheSnapshot([rooms], self.path).attach()
+        self.assertIs(await rooms.fetch("hotel-a"), MISS)
+
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "wb") as handle:
+            handle.write(b"not a database")
+        rooms = TieredCache("rooms", 3600, 10)
+        CacheSnapshot([rooms], self.path).attach()
+        with self.assertLogs(tiered_cache.logger, "WARNING"):
+            self.assertIs(await rooms.fetch("hotel-a"), MISS)
+
+    async def test_save_before_first_read_keeps_the_restored_entries(self):
+        rooms = TieredCache("rooms", 3600, 10)
+        rooms.put("hotel-a", ["KING"])
+        await CacheSnapshot([rooms], self.path).save()
+
+        restarted = TieredCache("rooms", 3600, 10)
+        snapshot = CacheSnapshot([restarted], self.path)
+        snapshot.attach()
+        self.assertEqual(await snapshot.save(), 1)
+
+    async def test_stop_writes_a_final_snapshot(self):
+        rooms = TieredCache("rooms", 3600, 10)
+        rooms.put("hotel-a", ["KING"])
+        snapshot = CacheSnapshot([rooms], self.path, interval_seconds=3600)
+        snapshot.start()
+        await snapshot.stop()
+        self.assertEqual(snapshot.stats()["last_saved_entries"], 1)
+        self.assertEqual([row[:2] for row in snapshot.read("rooms")], [("hotel-a", ["KING"])])
+
+
+class TtlCacheLoadTests(unittest.TestCase):
+    def test_load_keeps_fresher_entries_and_evicts_loaded_ones_first(self):
+        rooms = TtlCache("rooms", 60, 2)
+        rooms.put("live", "new")
+        loaded = rooms.load([("old", 1, 30), ("live", "stale", 30), ("expired", 2, 0), ("recent", 3, 30)])
+        self.assertEqual(loaded, 2)
+        self.assertEqual(rooms.get("live"), "new")
+        self.assertIs(rooms.get("old"), MISS)
+        self.assertEqual(rooms.get("recent"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,13 @@
+import asyncio
+import time
 import unittest
+from unittest.mock import patch
 
+import httpx
+
+from src import client
 from src.client import parse_upstream_response
+from src.metrics import UPSTREAM_HEDGES
 
 
 class ParseUpstreamResponseTests(unittest.TestCase):
@@ -24,5 +31,132 @@ class ParseUpstreamResponseTests(unittest.TestCase):
         self.assertEqual(parsed, {"text_fallback": "No JSON here"})
 
 
+def _response(body: dict, status: int = 200) -> httpx.Response:
+    return httpx.Response(status, json=body, request=httpx.Request("POST", "https://upstream.test/mcp"))
+
+
+class HedgingTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        client._LATENCY_WINDOWS.clear()
+        client.ENDPOINT_HEALTH.clear()
+
+    async def test_slow_primary_is_hedged_and_the_hedge_wins(self):
+        delays = [1.0, 0.01]
+        calls = []
+
+        async def fake_post(url, payload, headers):
+            delay = delays[len(calls)]
+            calls.append(delay)
+            await asyncio.sleep(delay)
+            return _response({"result": {"structuredContent": {"served_by": delay}}})
+
+        won_before = UPSTREAM_HEDGES.labels("get_prices", "won").value
+        with (
+            patch.object(client, "_post", fake_post),
+            patch.object(client, "HEDGE_TOOLS", frozenset({"get_prices"})),
+            patch.object(client, "HEDGE_DEFAULT_DELAY_SECONDS", 0.05),
+        ):
+            started = time.perf_counter()
+            data = await client.call_upstream("get_prices", {"hotelName": "The Rally Hotel"})
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(data, {"served_by": 0.01})
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(UPSTREAM_HEDGES.labels("get_prices", "won").value, won_before + 1)
+        # The cancelled primary is still sampled, with the time it had run, so p95 does not drift down.
+        await asyncio.sleep(0)
+        samples = sorted(client._LATENCY_WINDOWS["get_prices"]._samples)
+        self.assertEqual(len(samples), 2)
+        self.assertGreater(samples[1], 0.05)
+
+    async def test_cancelled_caller_leaves_no_request_running(self):
+        cancelled = []
+
+        async def hanging_post(url, payload, headers):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(url)
+                raise
+
+        with (
+            patch.object(client, "_post", hanging_post),
+            patch.object(client, "HEDGE_TOOLS", frozenset({"get_prices"})),
+            patch.object(client, "HEDGE_DEFAULT_DELAY_SECONDS", 5.0),
+        ):
+            with self.assertRaises(TimeoutError):
+                async with asyncio.timeout(0.02):
+                    await client.call_upstream("get_prices", {})
+            await asyncio.sleep(0)
+        self.assertEqual(len(cancelled), 1)
+
+    async def test_hedge_consumes_the_retry_budget(self):
+        calls = []
+
+        async def failing_post(url, payload, headers):
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return _response({}, status=503)
+
+        with (
+            patch.object(client, "_post", failing_post),
+            patch.object(client, "HEDGE_TOOLS", frozenset({"get_prices"})),
+            patch.object(client, "HEDGE_DEFAULT_DELAY_SECONDS", 0.01),
+            patch.object(client, "RETRY_ATTEMPTS", 2),
+        ):
+            self.assertIsNone(await client.call_upstream("get_prices", {}))
+        self.assertEqual(len(calls), 3)
+
+    async def test_tools_outside_the_hedge_list_are_not_hedged(self):
+        calls = []
+
+        async def slow_post(url, payload, headers):
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return _response({"result": {"structuredContent": {"ok": True}}})
+
+        with patch.object(client, "_post", slow_post), patch.object(client, "HEDGE_DEFAULT_DELAY_SECONDS", 0.01):
+            self.assertEqual(await client.call_upstream("create_booking", {}), {"ok": True})
+        self.assertEqual(len(calls), 1)
+
+    def test_hedge_delay_tracks_observed_p95(self):
+        self.assertEqual(client.hedge_delay("get_rooms"), client.HEDGE_DEFAULT_DELAY_SECONDS)
+        window = client._LATENCY_WINDOWS.setdefault("get_rooms", client._LatencyWindow(size=100))
+        for millis in range(1, 101):
+            window.add(millis / 1000)
+        self.assertAlmostEqual(client.hedge_delay("get_rooms"), 0.096)
+
+
+class EndpointRoutingTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        client.ENDPOINT_HEALTH.clear()
+
+    async def test_failing_endpoint_loses_traffic_to_the_healthy_one(self):
+        endpoints = ["https://primary.test/mcp", "https://mirror.test/mcp?key=secret"]
+        used = []
+
+        async def fake_post(url, payload, headers):
+            used.append(url)
+            if url == endpoints[0]:
+                return _response({}, status=503)
+            return _response({"result": {"structuredContent": {"ok": True}}})
+
+        with patch.object(client, "_post", fake_post), patch.object(client, "UPSTREAM_ENDPOINTS", endpoints):
+            for _ in range(3):
+                self.assertEqual(await client.call_upstream("get_rooms", {}), {"ok": True})
+            report = client.upstream_health()
+        self.assertEqual(used[0], endpoints[0])
+        self.assertEqual(used.count(endpoints[0]), 1)
+        self.assertIn("https://mirror.test/mcp", report)
+        self.assertGreater(report["https://primary.test/mcp"]["error_rate"], 0)
+
+    async def test_client_errors_do_not_count_against_the_endpoint(self):
+        async def rejecting_post(url, payload, headers):
+            return _response({}, status=400)
+
+        with patch.object(client, "_post", rejecting_post), patch.object(client, "RETRY_ATTEMPTS", 0):
+            self.assertIsNone(await client.call_upstream("get_rooms", {}))
+        self.assertEqual(client.ENDPOINT_HEALTH.get(client.UPSTREAM_URL).error_rate, 0.0)
+
+
 if __name__ == "__main__":
     unittest.main()
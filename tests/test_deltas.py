@@ -0,0 +1,60 @@
+import copy
+import unittest
+
+from src.deltas import DeltaTracker
+
+
+def _card(hotel_id, total, offers):
+    return {
+        "hotel_id": hotel_id,
+        "name": hotel_id,
+        "availability_status": "available",
+        "price_preview": {"from_total": total, "currency": "USD"},
+        "top_offers": [{"offer_id": f"{hotel_id}:{room}", "total_amount": amount, "currency": "USD"} for room, amount in offers],
+    }
+
+
+class DeltaTrackerTests(unittest.TestCase):
+    def setUp(self):
+        self.tracker = DeltaTracker()
+        self.first = {
+            "metadata": {},
+            "hotels": [_card("a", 100, [("K", 100), ("Q", 120)]), _card("b", 200, [("K", 200)]), _card("c", 90, [])],
+        }
+
+    def test_first_call_and_stale_token_return_full_result(self):
+        result = self.tracker.apply("s1", "hotels", copy.deepcopy(self.first), since_version=None)
+        self.assertEqual(result["metadata"]["delta"]["mode"], "full")
+        self.assertEqual(len(result["hotels"]), 3)
+
+        stale = self.tracker.apply("s1", "hotels", copy.deepcopy(self.first), since_version="not-the-token")
+        self.assertEqual(stale["metadata"]["delta"]["mode"], "full")
+        self.assertNotEqual(stale["metadata"]["delta"]["version"], result["metadata"]["delta"]["version"])
+
+    def test_follow_up_sends_only_changed_hotels_and_offers(self):
+        version = self.tracker.apply("s1", "hotels", copy.deepcopy(self.first), None)["metadata"]["delta"]["version"]
+        follow_up = {
+            "metadata": {},
+            "hotels": [_card("a", 95, [("K", 95), ("Q", 120)]), _card("b", 200, [("K", 200)]), _card("d", 80, [])],
+        }
+        result = self.tracker.apply("s1", "hotels", follow_up, since_version=version)
+        delta = result["metadata"]["delta"]
+
+        self.assertEqual(delta["mode"], "delta")
+        self.assertEqual(delta["base_version"], version)
+        self.assertEqual([hotel["hotel_id"] for hotel in result["hotels"]], ["a", "d"])
+        self.assertEqual([offer["offer_id"] for offer in result["hotels"][0]["top_offers"]], ["a:K"])
+        self.assertEqual(delta["unchanged_offer_ids"], {"a": ["a:Q"]})
+        self.assertEqual(delta["unchanged_hotel_ids"], ["b"])
+        self.assertEqual(delta["removed_hotel_ids"], ["c"])
+
+    def test_sessions_and_tools_are_isolated(self):
+        version = self.tracker.apply("s1", "hotels", copy.deepcopy(self.first), None)["metadata"]["delta"]["version"]
+        other = self.tracker.apply("s2", "hotels", copy.deepcopy(self.first), since_version=version)
+        self.assertEqual(other["metadata"]["delta"]["mode"], "full")
+        comparison = self.tracker.apply("s1", "comparison", {"metadata": {}, "comparison": []}, since_version=version)
+        self.assertEqual(comparison["metadata"]["delta"]["mode"], "full")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from src.geo import GeoIndex, GeoPoint, haversine_km, resolve_point
+from src.providers.sigtrip import SigtripProvider
+
+COORS_FIELD = GeoPoint(39.7559, -104.9942)
+
+
+class GeoIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.index = GeoIndex()
+        self.index.add("near", GeoPoint(39.7547, -104.9958))
+        self.index.add("mid", GeoPoint(39.7392, -104.9903))
+        self.index.add("far", GeoPoint(39.8561, -104.6737))
+        self.index.add("fiji_east", GeoPoint(-17.0, 179.99))
+        self.index.add("fiji_west", GeoPoint(-17.0, -179.99))
+
+    def test_within_radius_returns_sorted_matches(self):
+        found = self.index.within_radius(COORS_FIELD, 5)
+        self.assertEqual([key for _distance, key in found], ["near", "mid"])
+        self.assertLess(found[0][0], 0.5)
+
+    def test_nearest_expands_until_k_found(self):
+        self.assertEqual([key for _d, key in self.index.nearest(COORS_FIELD, k=3)], ["near", "mid", "far"])
+        self.assertEqual([key for _d, key in self.index.nearest(COORS_FIELD, k=3, max_radius_km=5)], ["near", "mid"])
+        self.assertEqual(
+            [key for _d, key in self.index.nearest(COORS_FIELD, k=1, accept=lambda key: key != "near")],
+            ["mid"],
+        )
+
+    def test_radius_search_wraps_antimeridian(self):
+        found = self.index.within_radius(GeoPoint(-17.0, 179.999), 10)
+        self.assertEqual({key for _d, key in found}, {"fiji_east", "fiji_west"})
+
+    def test_resolve_point(self):
+        self.assertEqual(resolve_point("39.75, -104.99"), GeoPoint(39.75, -104.99))
+        self.assertEqual(resolve_point("Coors Field"), COORS_FIELD)
+        self.assertIsNone(resolve_point("91,0"))
+        self.assertIsNone(resolve_point("unknown place"))
+        self.assertAlmostEqual(haversine_km(COORS_FIELD, COORS_FIELD), 0.0)
+
+
+class SigtripNearSelectionTests(unittest.TestCase):
+    def test_selects_only_hotels_within_radius(self):
+        provider = SigtripProvider()
+        all_hotels = ["The Rally Hotel", "Club Quarters, Grand Central", "Club Quarters, Trafalgar Square"]
+        selected = provider._select_near(all_hotels, COORS_FIELD, radius_km=5, max_hotels=5)
+        self.assertEqual(list(selected), ["The Rally Hotel"])
+        self.assertEqual(provider._select_near(all_hotels, COORS_FIELD, radius_km=5, max_hotels=0), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from unittest.mock import patch
+
+from src import health
+from src.health import HealthTracker
+
+
+class HealthTrackerTests(unittest.TestCase):
+    def test_prefers_the_faster_healthy_target(self):
+        tracker = HealthTracker()
+        for _ in range(5):
+            tracker.record("primary", 0.40, ok=True)
+            tracker.record("mirror", 0.10, ok=True)
+        self.assertEqual(tracker.choose(["primary", "mirror"]), "mirror")
+        self.assertEqual(tracker.choose(["primary", "unseen"]), "primary")
+
+    def test_errors_raise_the_score_and_eject_after_the_threshold(self):
+        tracker = HealthTracker()
+        for _ in range(5):
+            tracker.record("primary", 0.1, ok=True)
+        for _ in range(3):
+            tracker.record("primary", 0.1, ok=False)
+        self.assertGreater(tracker.get("primary").score, tracker.get("mirror").score)
+        self.assertTrue(tracker.healthy("primary"))
+        tracker.record("primary", 0.1, ok=False)
+        self.assertFalse(tracker.healthy("primary"))
+        self.assertEqual(tracker.choose(["primary", "mirror"]), "mirror")
+        self.assertLess(tracker.confidence()["primary"], 0.5)
+
+    def test_cooldown_expiry_allows_a_probe_and_success_clears_it(self):
+        tracker = HealthTracker()
+        with patch.object(health, "HEALTH_MIN_SAMPLES", 1), patch.object(health, "HEALTH_COOLDOWN_SECONDS", 0):
+            tracker.record("primary", 0.1, ok=False)
+            tracker.record("primary", 0.1, ok=False)
+            tracker.record("primary", 0.1, ok=False)
+            tracker.record("primary", 0.1, ok=False)
+        self.assertTrue(tracker.healthy("primary"))
+        tracker.record("primary", 0.1, ok=True)
+        self.assertEqual(tracker.get("primary").skip_until, 0.0)
+        self.assertEqual(tracker.choose(["only-unhealthy"]), "only-unhealthy")
+
+
+if __name__ == "__main__":
+    unittest.main()
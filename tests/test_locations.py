@@ -0,0 +1,42 @@
+import unittest
+
+from src.locations import LocationEntry, LocationIndex, resolve_location, suggest_locations
+from src.providers.sigtrip import SigtripProvider
+
+
+class LocationIndexTests(unittest.TestCase):
+    def test_resolves_aliases_on_word_boundaries_only(self):
+        self.assertEqual(resolve_location("hotels in New York City").location_id, "us:new_york")
+        self.assertEqual(resolve_location("NYC").location_id, "us:new_york")
+        self.assertIsNone(resolve_location("newyorker magazine"))
+        self.assertIsNone(resolve_location(""))
+
+    def test_country_names_disambiguate(self):
+        index = LocationIndex(
+            [
+                LocationEntry("gb:london", "London", "london", "GB", hotel_count=5),
+                LocationEntry("ca:london", "London", "london", "CA", hotel_count=1),
+                LocationEntry("gb:york", "York", "york", "GB", hotel_count=1),
+                LocationEntry("us:new_york", "New York", "new york", "US", hotel_count=3),
+            ]
+        )
+        self.assertEqual(index.resolve("London").location_id, "gb:london")
+        self.assertEqual(index.resolve("London, Canada").location_id, "ca:london")
+        self.assertEqual(index.resolve("new york").location_id, "us:new_york")
+        self.assertIsNone(index.resolve("London, Japan"))
+        self.assertEqual([e.location_id for e in index.suggest("lon")], ["gb:london", "ca:london"])
+        self.assertEqual([e.location_id for e in index.suggest("york")], ["us:new_york", "gb:york"])
+
+    def test_suggest_from_property_master(self):
+        self.assertEqual([entry.city for entry in suggest_locations("den")], ["Denver"])
+        self.assertEqual(suggest_locations("zz"), [])
+
+    def test_sigtrip_targets_use_location_index(self):
+        provider = SigtripProvider()
+        self.assertEqual(provider._resolve_target_hotels(resolve_location("Manhattan")), ["Club Quarters, Grand Central"])
+        self.assertEqual(provider._resolve_target_hotels(resolve_location("renew yorkshire")), [])
+        self.assertIsNone(provider._fallback_image(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
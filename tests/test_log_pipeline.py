@@ -0,0 +1,71 @@
+import io
+import json
+import logging
+import os
+import queue
+import unittest
+from unittest.mock import patch
+
+from src import log_pipeline
+from src.log_pipeline import JsonFormatter, NonBlockingQueueHandler, RateLimitFilter, redact
+from src.metrics import LOG_DROPPED
+
+
+def _record(msg: str, level: int = logging.WARNING, **extra) -> logging.LogRecord:
+    record = logging.LogRecord("src.client", level, __file__, 1, msg, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class RedactionTests(unittest.TestCase):
+    def test_redacts_secret_and_pii_keys_and_inline_values(self):
+        self.assertEqual(redact("abc", "apikey"), "[REDACTED]")
+        self.assertEqual(redact({"guest_email": "a@b.co", "nights": 2}), {"guest_email": "[REDACTED]", "nights": 2})
+        text = redact("POST failed: Authorization: Bearer sk_live_123 for jane.doe@example.com, call +1 415 555 0100")
+        self.assertNotIn("sk_live_123", text)
+        self.assertNotIn("jane.doe@example.com", text)
+        self.assertNotIn("555 0100", text)
+        self.assertEqual(redact("check_in=2026-10-19 property 12345678"), "check_in=2026-10-19 property 12345678")
+
+    def test_json_formatter_emits_extras_redacted(self):
+        line = JsonFormatter().format(_record("upstream_call_failed", tool="get_prices", error="apikey=secret123"))
+        entry = json.loads(line)
+        self.assertEqual(entry["event"], "upstream_call_failed")
+        self.assertEqual(entry["tool"], "get_prices")
+        self.assertEqual(entry["error"], "apikey=[REDACTED]")
+
+    def test_configured_credentials_are_redacted_literally(self):
+        stream = io.StringIO()
+        with patch.dict(os.environ, {"MCP_PROVIDER_TEST_API_KEY": "very-secret-key-value"}):
+            log_pipeline.configure_logging(stream=stream)
+        try:
+            logging.getLogger("src.client").warning("upstream_call_failed", extra={"error": "bad very-secret-key-value"})
+        finally:
+            log_pipeline.shutdown_logging()
+            for handler in [h for h in logging.getLogger().handlers if isinstance(h, NonBlockingQueueHandler)]:
+                logging.getLogger().removeHandler(handler)
+        self.assertIn("bad [REDACTED]", stream.getvalue())
+
+
+class RateLimitTests(unittest.TestCase):
+    def test_repetitive_events_are_sampled_with_suppressed_count(self):
+        limiter = RateLimitFilter(rate_per_second=2, sample_every=5)
+        passed = [record for record in (_record("upstream_call_failed") for _ in range(12)) if limiter.filter(record)]
+        self.assertEqual(len(passed), 4)
+        self.assertEqual(passed[2].suppressed, 4)
+        self.assertTrue(limiter.filter(_record("other_event")))
+        self.assertTrue(limiter.filter(_record("upstream_call_failed", level=logging.CRITICAL)))
+
+
+class QueueHandlerTests(unittest.TestCase):
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+        before = LOG_DROPPED.labels("queue_full").value
+        handler.handle(_record("first"))
+        handler.handle(_record("second"))
+        self.assertEqual(handler.queue.qsize(), 1)
+        self.assertEqual(LOG_DROPPED.labels("queue_full").value, before + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
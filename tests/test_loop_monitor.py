@@ -0,0 +1,49 @@
+import asyncio
+import time
+import unittest
+
+from src.loop_monitor import BlockingCallDetector, LoopLagMonitor
+from src.metrics import REGISTRY
+
+
+class LoopLagMonitorTests(unittest.IsolatedAsyncioTestCase):
+    def test_percentiles_use_nearest_rank_over_the_window(self):
+        monitor = LoopLagMonitor(interval_seconds=0.01, window=4)
+        for lag in (0.5, 0.001, 0.002, 0.003, 0.004):
+            monitor.record(lag)
+        self.assertEqual(monitor.percentiles((0.5, 1.0)), {0.5: 0.002, 1.0: 0.004})
+        self.assertEqual(monitor.count, 5)
+        self.assertEqual(monitor.stats()["lag_ms"]["p100"], 4.0)
+
+    async def test_blocking_callback_shows_up_as_lag(self):
+        monitor = LoopLagMonitor(interval_seconds=0.01, window=100)
+        monitor.ensure_started()
+        monitor.ensure_started()
+        await asyncio.sleep(0.02)
+        time.sleep(0.1)
+        await asyncio.sleep(0.02)
+        await monitor.stop()
+        self.assertGreaterEqual(monitor.percentiles((1.0,))[1.0], 0.05)
+
+
+class BlockingCallDetectorTests(unittest.IsolatedAsyncioTestCase):
+    async def test_logs_the_stack_of_the_blocking_callback(self):
+        detector = BlockingCallDetector(threshold_seconds=0.02)
+        detector.ensure_started()
+
+        def parse_everything():
+            time.sleep(0.15)
+
+        with self.assertLogs("src.loop_monitor", level="WARNING") as logs:
+            await asyncio.sleep(0.03)
+            parse_everything()
+            await asyncio.sleep(0.05)
+        detector.stop()
+        self.assertEqual(detector.blocked_count, 1)
+        self.assertIn("parse_everything", logs.records[0].stack)
+        self.assertGreaterEqual(logs.records[0].blocked_ms, 100)
+        self.assertIn("event_loop_blocked_total", REGISTRY.render())
+
+
+if __name__ == "__main__":
+    unittest.main()
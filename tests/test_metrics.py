@@ -0,0 +1,46 @@
+import unittest
+
+from src.cache import TtlCache
+from src.metrics import PROPERTY_MAPPINGS, Registry, cache_collector
+from src.property_master import resolve_property
+
+
+class RegistryTests(unittest.TestCase):
+    def test_renders_prometheus_text_format(self):
+        registry = Registry()
+        latency = registry.histogram("tool_seconds", "Latency.", ("tool",), buckets=(0.1, 1.0))
+        calls = registry.counter("calls", "Calls.", ("tool",))
+        latency.labels("search").observe(0.05)
+        latency.labels("search").observe(0.5)
+        latency.labels("search").observe(3)
+        calls.labels('say "hi"').inc()
+
+        text = registry.render()
+        self.assertIn("# TYPE tool_seconds histogram", text)
+        self.assertIn('tool_seconds_bucket{tool="search",le="0.1"} 1', text)
+        self.assertIn('tool_seconds_bucket{tool="search",le="1"} 2', text)
+        self.assertIn('tool_seconds_bucket{tool="search",le="+Inf"} 3', text)
+        self.assertIn('tool_seconds_count{tool="search"} 3', text)
+        self.assertIn("# TYPE calls_total counter", text)
+        self.assertIn('calls_total{tool="say \\"hi\\""} 1', text)
+
+    def test_cache_collector_reads_stats_at_scrape_time(self):
+        registry = Registry()
+        prices = TtlCache("prices", ttl_seconds=60, maxsize=10)
+        registry.register_collector(cache_collector(lambda: [prices]))
+        prices.put("a", 1)
+        prices.get("a")
+        prices.get("b")
+        text = registry.render()
+        self.assertIn('cache_requests_total{cache="prices",result="hit"} 1', text)
+        self.assertIn('cache_requests_total{cache="prices",result="miss"} 1', text)
+        self.assertIn('cache_entries{cache="prices"} 1', text)
+
+    def test_resolve_property_counts_mapping_methods(self):
+        before = PROPERTY_MAPPINGS.labels("fallback_generated").value
+        resolve_property(provider_hotel_id="sigtrip:Nowhere_Inn", hotel_name="Nowhere Inn", city="Atlantis")
+        self.assertEqual(PROPERTY_MAPPINGS.labels("fallback_generated").value, before + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+from src.models import (
+    CompareHotelsResponse,
+    HotelCard,
+    HotelComparisonItem,
+    Offer,
+    PricePreview,
+    SearchHotelsResponse,
+    comparison_item_payload,
+    hotel_card_payload,
+    offer_payload,
+    price_preview_payload,
+)
+
+
+def _card(**overrides):
+    offer = offer_payload(offer_id="sigtrip:The_Rally_Hotel:KING", room_type="KING", room_name="King", total_amount=310.0)
+    fields = {
+        "hotel_id": "sigtrip:The_Rally_Hotel",
+        "name": "The Rally Hotel",
+        "location": "Denver",
+        "price_preview": price_preview_payload(from_total=310.0, currency="USD"),
+        "availability_status": "available",
+        "property_id": "prop_rally_denver",
+        "provider_ids": ["sigtrip:The_Rally_Hotel"],
+        "location_details": {"city": "Denver"},
+        "amenities": ("wifi",),
+        "thumbnail_url": "https://images.example.com/a.jpg",
+        "image_urls": ["https://images.example.com/a.jpg"],
+        "image_source": "upstream",
+        "pricing_source": "upstream",
+        "top_offers": [offer],
+        "distance_km": 0.4,
+    }
+    fields.update(overrides)
+    return hotel_card_payload(**fields)
+
+
+class TrustedPayloadTests(unittest.TestCase):
+    """Builders must stay byte-for-byte equivalent to the validated model dumps."""
+
+    def assertMatchesModel(self, model, payload):
+        dumped = model.model_validate(payload).model_dump(mode="json")
+        self.assertEqual(dumped, payload)
+        self.assertEqual(list(dumped), list(payload))
+
+    def test_builders_match_model_dumps(self):
+        self.assertMatchesModel(PricePreview, price_preview_payload())
+        self.assertMatchesModel(Offer, offer_payload(offer_id="x", room_name="Room"))
+        self.assertMatchesModel(HotelCard, _card())
+        self.assertMatchesModel(HotelCard, _card(price_preview=price_preview_payload(), top_offers=(), thumbnail_url=None))
+        self.assertMatchesModel(
+            HotelComparisonItem,
+            comparison_item_payload(hotel_id="h", name="H", availability_status="unavailable", image_url="https://images.example.com/a.jpg"),
+        )
+
+    def test_trusted_search_response_payload_matches_validated_dump(self):
+        query = {"location": "denver"}
+        trusted = SearchHotelsResponse.from_trusted(provider="sigtrip", query=query, metadata={}, hotels=[_card()])
+        validated = SearchHotelsResponse(provider="sigtrip", query=query, metadata={}, hotels=[_card()])
+        self.assertEqual(trusted.to_payload(), validated.to_payload())
+        self.assertEqual(validated.to_payload(), validated.model_dump(mode="json"))
+        card = trusted.hotels[0]
+        self.assertIsInstance(card, HotelCard)
+        self.assertEqual(card.hotel_id, validated.hotels[0].hotel_id)
+        self.assertEqual(card.price_preview.from_total, validated.hotels[0].price_preview.from_total)
+        self.assertEqual([offer.offer_id for offer in card.top_offers], [offer.offer_id for offer in validated.hotels[0].top_offers])
+
+    def test_compare_payload_keys_match_model(self):
+        self.assertEqual(list(CompareHotelsResponse.model_fields), ["provider", "query", "metadata", "comparison"])
+
+
+if __name__ == "__main__":
+    unittest.main()
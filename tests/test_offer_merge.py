@@ -0,0 +1,67 @@
+import unittest
+
+from src.models import offer_payload
+from src.offer_merge import RankingPolicy, cancellation_terms, merge_offers, room_key, to_base_currency
+
+
+def _offer(offer_id, room_name, total, currency="USD", cancellation=None):
+    return offer_payload(
+        offer_id=offer_id,
+        room_type=None,
+        room_name=room_name,
+        total_amount=total,
+        currency=currency,
+        cancellation_policy=cancellation,
+    )
+
+
+class NormalizationTests(unittest.TestCase):
+    def test_currency_room_and_cancellation_normalization(self):
+        self.assertAlmostEqual(to_base_currency(100, "eur"), 108.0)
+        self.assertIsNone(to_base_currency(100, "XYZ"))
+        # Rates are USD-based; other base currencies divide by their own rate.
+        self.assertAlmostEqual(to_base_currency(108, "usd", base_currency="EUR"), 100.0)
+        self.assertAlmostEqual(to_base_currency(100, "EUR", base_currency="EUR"), 100.0)
+        self.assertAlmostEqual(to_base_currency(127, None, base_currency="GBP"), 127.0)
+        self.assertIsNone(to_base_currency(100, "EUR", base_currency="XYZ"))
+        self.assertEqual(room_key({"room_name": "Deluxe King Room"}), room_key({"room_name": "Room, 1 King Bed - DLX"}))
+        self.assertNotEqual(room_key({"room_name": "King Room"}), room_key({"room_name": "Queen Room"}))
+        self.assertEqual(cancellation_terms("Non-refundable rate"), "nonrefundable")
+        self.assertEqual(cancellation_terms("Free cancellation until 48h"), "refundable")
+        self.assertEqual(cancellation_terms(None), "unknown")
+
+
+class MergeOffersTests(unittest.TestCase):
+    def test_k_way_merge_ranks_across_currencies_and_dedupes_rooms(self):
+        merged = merge_offers(
+            {
+                "alpha": [_offer("a:king", "King Room", 200, cancellation="Free cancellation"), _offer("a:suite", "Suite", 400)],
+                "beta": [
+                    _offer("b:king", "Room 1 King Bed", 170, "EUR", cancellation="Free cancellation"),
+                    _offer("b:queen", "Queen Room", 150, "GBP", cancellation="Free cancellation"),
+                ],
+            },
+            limit=3,
+        )
+        self.assertEqual([offer["offer_id"] for offer in merged], ["b:king", "b:queen", "a:suite"])
+        self.assertEqual(merged[0]["currency"], "EUR")
+        self.assertEqual(merged[0]["total_amount"], 170)
+
+    def test_policy_weighs_cancellation_terms_and_provider_confidence(self):
+        offers = {
+            "alpha": [_offer("a:king", "King", 100, cancellation="Non-refundable")],
+            "beta": [_offer("b:king", "King", 105, cancellation="Free cancellation")],
+        }
+        self.assertEqual(merge_offers(offers, limit=1)[0]["offer_id"], "b:king")
+        price_only = RankingPolicy(nonrefundable_penalty=0, unknown_cancellation_penalty=0)
+        self.assertEqual(merge_offers(offers, limit=1, policy=price_only)[0]["offer_id"], "a:king")
+        distrust_beta = RankingPolicy(provider_confidence={"beta": 0.0})
+        self.assertEqual(merge_offers(offers, limit=1, policy=distrust_beta)[0]["offer_id"], "a:king")
+
+    def test_unpriced_offers_rank_last(self):
+        merged = merge_offers({"alpha": [_offer("a:x", "Twin", None), _offer("a:y", "Double", 90)]}, limit=5)
+        self.assertEqual([offer["offer_id"] for offer in merged], ["a:y", "a:x"])
+
+
+if __name__ == "__main__":
+    unittest.main()
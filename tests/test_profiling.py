@@ -0,0 +1,46 @@
+import unittest
+
+from src import profiling
+from src.profiling import SlowRequestLog, stage, track_stages
+
+
+class StageTimingTests(unittest.TestCase):
+    def test_stages_accumulate_only_inside_a_tracked_invocation(self):
+        with stage("parse"):
+            pass
+        with track_stages() as timings:
+            with stage("upstream.get_prices"):
+                pass
+            with stage("upstream.get_prices"):
+                pass
+            with stage("mapping"):
+                pass
+        self.assertEqual(set(timings.stages), {"upstream.get_prices", "mapping"})
+        self.assertGreaterEqual(timings.stages["upstream.get_prices"], 0.0)
+
+
+class SlowRequestLogTests(unittest.TestCase):
+    def test_keeps_the_slowest_invocations_in_descending_order(self):
+        log = SlowRequestLog(capacity=3)
+        for tool, seconds in (("a", 0.1), ("b", 0.5), ("c", 0.2), ("d", 0.05), ("e", 0.9)):
+            log.record(tool, seconds, "ok", {"mapping": seconds / 10})
+        snapshot = log.snapshot()
+        self.assertEqual([entry["tool"] for entry in snapshot], ["e", "b", "c"])
+        self.assertEqual(snapshot[0]["duration_ms"], 900.0)
+        self.assertEqual(snapshot[0]["stages_ms"], {"mapping": 90.0})
+
+
+class ProfilerTests(unittest.IsolatedAsyncioTestCase):
+    async def test_cprofile_and_stack_sampling_sessions(self):
+        profile = await profiling.run_profile(0.1, mode="cprofile", limit=5)
+        self.assertEqual(profile["mode"], "cprofile")
+        self.assertIn("function calls", profile["stats"])
+
+        sampled = await profiling.run_profile(0.1, mode="sample", limit=5)
+        self.assertEqual(sampled["mode"], "sample")
+        self.assertGreater(sampled["samples"], 0)
+        self.assertFalse(profiling.profiler_busy())
+
+
+if __name__ == "__main__":
+    unittest.main()
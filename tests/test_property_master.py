@@ -0,0 +1,110 @@
+import unittest
+
+from src import property_master
+from src.name_matching import TrigramIndex
+from src.property_master import PROPERTY_MASTER, PropertyRecord, pending_mapping_reviews, rebuild_property_index, resolve_property
+
+
+class ResolvePropertyTests(unittest.TestCase):
+    def tearDown(self):
+        PROPERTY_MASTER.pop("prop_test_denver_indexed", None)
+        rebuild_property_index()
+        property_master._REVIEW_QUEUE.clear()
+
+    def test_provider_id_map_returns_cached_read_only_profile(self):
+        profile, mapping = resolve_property(
+            provider_hotel_id="sigtrip:The_Rally_Hotel",
+            hotel_name="The Rally Hotel",
+            city="denver",
+        )
+        again, _ = resolve_property(
+            provider_hotel_id="sigtrip:The_Rally_Hotel",
+            hotel_name="The Rally Hotel",
+            city="denver",
+        )
+        self.assertEqual(mapping["method"], "provider_id_map")
+        self.assertIs(profile, again)
+        self.assertEqual(profile["location_details"]["city"], "Denver")
+        with self.assertRaises(TypeError):
+            profile["name"] = "changed"
+
+    def test_name_city_match_uses_normalized_aliases(self):
+        profile, mapping = resolve_property(
+            provider_hotel_id="other:clubq",
+            hotel_name="Club-Quarters  Grand Central!",
+            city="NEW YORK",
+        )
+        self.assertEqual(mapping["method"], "name_city_match")
+        self.assertEqual(profile["property_id"], "prop_us_nyc_clubq_grand_central")
+
+    def test_rebuild_picks_up_new_records(self):
+        PROPERTY_MASTER["prop_test_denver_indexed"] = PropertyRecord(
+            property_id="prop_test_denver_indexed",
+            name="Indexed Test Hotel",
+            city="Denver",
+            country_code="US",
+            address="1 Test St",
+            description="",
+            amenities=[],
+        )
+        _, before = resolve_property(provider_hotel_id="x:1", hotel_name="Indexed Test Hotel", city="Denver")
+        self.assertEqual(before["method"], "fallback_generated")
+
+        rebuild_property_index()
+        profile, after = resolve_property(provider_hotel_id="x:1", hotel_name="Indexed Test Hotel", city="Denver")
+        self.assertEqual(after["method"], "name_city_match")
+        self.assertEqual(profile["property_id"], "prop_test_denver_indexed")
+
+    def test_fuzzy_match_absorbs_small_spelling_differences(self):
+        profile, mapping = resolve_property(
+            provider_hotel_id="p2:cq_gc",
+            hotel_name="Club Quarters Hotel, Grand Central",
+            city="New York",
+        )
+        self.assertEqual(profile["property_id"], "prop_us_nyc_clubq_grand_central")
+        self.assertEqual(mapping["method"], "fuzzy_name_match")
+        self.assertLess(mapping["confidence"], 0.75)
+        self.assertEqual(pending_mapping_reviews(), [])
+
+    def test_fuzzy_match_is_scoped_by_city(self):
+        _, mapping = resolve_property(
+            provider_hotel_id="p2:cq_gc_london",
+            hotel_name="Club Quarters Hotel, Grand Central",
+            city="London",
+        )
+        self.assertEqual(mapping["method"], "fallback_generated")
+
+    def test_low_confidence_matches_are_queued_for_review(self):
+        profile, mapping = resolve_property(provider_hotel_id="p2:rally", hotel_name="Rally Hotel Denver", city="Denver")
+        self.assertEqual(mapping["method"], "fuzzy_name_match")
+        self.assertEqual(profile["property_id"], "prop_us_denver_rally_hotel")
+
+        _, near_miss = resolve_property(provider_hotel_id="p2:rally_inn", hotel_name="Rally Inn Suites", city="Denver")
+        self.assertEqual(near_miss["method"], "fallback_generated")
+
+        resolve_property(provider_hotel_id="p2:rally", hotel_name="Rally Hotel Denver", city="Denver")
+        reviews = pending_mapping_reviews()
+        self.assertEqual([r["provider_hotel_id"] for r in reviews], ["p2:rally", "p2:rally_inn"])
+        self.assertEqual(reviews[0]["decision"], "matched_low_confidence")
+        self.assertEqual(reviews[1]["decision"], "unmatched")
+        self.assertEqual(reviews[1]["candidates"][0]["property_id"], "prop_us_denver_rally_hotel")
+
+
+class TrigramIndexTests(unittest.TestCase):
+    def test_search_ranks_by_score_and_dedupes_keys(self):
+        index = TrigramIndex(
+            [
+                ("the rally hotel", "rally"),
+                ("rally hotel", "rally"),
+                ("grand hyatt", "hyatt"),
+            ]
+        )
+        results = index.search("rally hotel", limit=5)
+        self.assertEqual(results[0], (1.0, "rally"))
+        self.assertEqual([key for _score, key in results], ["rally"])
+        self.assertEqual([key for _score, key in index.search("grand hotel", limit=5)], ["hyatt", "rally"])
+        self.assertEqual(index.search("zzzz"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
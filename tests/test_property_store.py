@@ -0,0 +1,195 @@
+import asyncio
+import json
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src import property_master, property_store
+from src.property_master import resolve_property, resolve_property_async
+from src.property_store import SqlitePropertyStore
+
+
+class SqlitePropertyStoreTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        self.db_path = self.tmp / "property_master.db"
+
+    def tearDown(self):
+        if property_store._STORE is not None:
+            property_store._STORE.close()
+            property_store._STORE = None
+        property_store._MISSING = None
+        property_master._REVIEW_QUEUE.clear()
+        self._tmp.cleanup()
+
+    def test_imports_csv_and_jsonl_and_resolves_lookups(self):
+        csv_path = self.tmp / "catalog.csv"
+        csv_path.write_text(
+            "property_id,name,city,country_code,amenities,aliases,provider_ids,rating_score\n"
+            "prop_us_austin_lark,The Lark,Austin,us,wifi_free|gym,lark austin,sigtrip:The_Lark,4.2\n",
+            encoding="utf-8",
+        )
+        jsonl_path = self.tmp / "catalog.jsonl"
+        jsonl_path.write_text(
+            json.dumps(
+                {
+                    "property_id": "prop_us_boston_harbor",
+                    "name": "Harbor Inn",
+                    "city": "Boston",
+                    "provider_ids": ["p2:harbor"],
+                    "latitude": 42.36,
+                    "longitude": -71.05,
+                }
+            )
+            + "\nnot json\n\n",
+            encoding="utf-8",
+        )
+        store = SqlitePropertyStore(self.db_path, reload_interval_seconds=0)
+        self.assertEqual(store.import_file(csv_path), 1)
+        self.assertEqual(store.import_file(jsonl_path), 1)
+
+        lark = store.lookup_provider_id("sigtrip:The_Lark")
+        self.assertEqual(lark["property_id"], "prop_us_austin_lark")
+        self.assertEqual(lark["amenities"], ("wifi_free", "gym"))
+        self.assertEqual(lark["rating"]["score"], 4.2)
+        self.assertEqual(lark["location_details"]["country_code"], "US")
+        self.assertEqual(store.lookup_name_city("Lark, Austin", "AUSTIN")["property_id"], "prop_us_austin_lark")
+        self.assertEqual(store.lookup_name_city("Harbor Inn", "boston")["property_id"], "prop_us_boston_harbor")
+        self.assertIsNone(store.lookup_name_city("Harbor Inn", "denver"))
+        records = {record.property_id: record for record, _ids in store.iter_records()}
+        self.assertEqual(records["prop_us_boston_harbor"].latitude, 42.36)
+        self.assertIsNone(records["prop_us_austin_lark"].longitude)
+        store.close()
+
+    def test_read_through_cache_and_hot_reload(self):
+        store = SqlitePropertyStore(self.db_path, reload_interval_seconds=0)
+        store.import_rows([{"property_id": "prop_a", "name": "Alpha Hotel", "city": "Denver", "provider_ids": ["x:alpha"]}])
+        self.assertEqual(store.lookup_provider_id("x:alpha")["name"], "Alpha Hotel")
+        self.assertEqual(store.lookup_provider_id("x:alpha")["name"], "Alpha Hotel")
+        self.assertEqual(store.cache_stats()["hits"], 1)
+
+        other = sqlite3.connect(self.db_path)
+        with other:
+            other.execute("UPDATE properties SET name = 'Alpha Hotel Renamed' WHERE property_id = 'prop_a'")
+        other.close()
+
+        self.assertEqual(store.lookup_provider_id("x:alpha")["name"], "Alpha Hotel Renamed")
+        store.close()
+
+    def test_reimport_keeps_provider_mappings_and_iter_records_loads_aliases_in_one_query(self):
+        store = SqlitePropertyStore(self.db_path, reload_interval_seconds=0)
+        rows = [
+            {"property_id": f"prop_{i}", "name": f"Hotel {i}", "city": "Denver", "aliases": f"H{i}", "provider_ids": [f"x:{i}"]}
+            for i in range(3)
+        ]
+        store.import_rows(rows)
+        # Re-importing upserts in place, so the property's mappings are not cascaded away with the old row.
+        store.import_rows([{**row, "name": row["name"] + " Renamed"} for row in rows])
+        self.assertEqual(store.lookup_provider_id("x:1")["name"], "Hotel 1 Renamed")
+
+        statements: list[str] = []
+        store._connection().set_trace_callback(statements.append)
+        records = list(store.iter_records())
+        self.assertEqual([(record.aliases, ids) for record, ids in records][0], (("H0",), ("x:0",)))
+        self.assertEqual(sum("property_aliases" in sql for sql in statements), 1)
+        store.close()
+
+    def test_reimport_replaces_the_provider_id_list(self):
+        store = SqlitePropertyStore(self.db_path, reload_interval_seconds=0)
+        row = {"property_id": "prop_a", "name": "Alpha Hotel", "city": "Denver", "provider_ids": ["x:old", "x:kept"]}
+        store.import_rows([row])
+        store.import_rows([{**row, "provider_ids": ["x:kept", "x:new"]}])
+        self.assertIsNone(store.lookup_provider_id("x:old"))
+        self.assertEqual(store.lookup_provider_id("x:kept")["property_id"], "prop_a")
+        self.assertEqual(store.lookup_provider_id("x:new")["property_id"], "prop_a")
+        self.assertEqual([ids for _record, ids in store.iter_records()], [("x:kept", "x:new")])
+        store.close()
+
+    def test_review_decisions_are_written_off_thread_to_a_separate_file(self):
+        store = SqlitePropertyStore(self.db_path, reload_interval_seconds=0)
+        store.import_rows([{"property_id": "prop_a", "name": "Alpha Hotel", "city": "Denver"}])
+        other_worker = SqlitePropertyStore(self.db_path, reload_interval_seconds=0)
+        other_worker.lookup_property_id("prop_a")
+        reloads = other_worker.reloads
+        entry = {"hotel_name": "Alfa Hotel", "city": "Denver", "decision": "unmatched", "queued_at": "2026-01-01T00:00:00"}
+        store.enqueue_review({**entry, "provider_hotel_id": "x:alfa"})
+        store.enqueue_review({**entry, "provider_hotel_id": "x:alfa2", "candidates": [{"property_id": "prop_a"}]})
+        store.close()
+        # The catalog DB is untouched, so other workers keep their caches and indexes.
+        other_worker.lookup_property_id("prop_a")
+        self.assertEqual(other_worker.reloads, reloads)
+        other_worker.close()
+
+        reviews = sqlite3.connect(store.review_path)
+        rows = reviews.execute("SELECT provider_hotel_id, candidates FROM mapping_review_queue ORDER BY rowid").fetchall()
+        reviews.close()
+        self.assertEqual(rows, [("x:alfa", "[]"), ("x:alfa2", '[{"property_id": "prop_a"}]')])
+
+    def test_resolve_property_prefers_db_and_falls_back_to_static_dicts(self):
+        store = SqlitePropertyStore(self.db_path)
+        store.import_rows([{"property_id": "prop_db_only", "name": "Db Hotel", "city": "Denver", "provider_ids": ["x:db"]}])
+        store.close()
+
+        with mock.patch.object(property_store, "PROPERTY_MASTER_DB_PATH", str(self.db_path)):
+            profile, mapping = resolve_property(provider_hotel_id="x:db", hotel_name="Db Hotel", city="Denver")
+            self.assertEqual(profile["property_id"], "prop_db_only")
+            self.assertEqual(mapping["source"], "db")
+
+            profile, mapping = resolve_property(
+                provider_hotel_id="sigtrip:The_Rally_Hotel",
+                hotel_name="The Rally Hotel",
+                city="Denver",
+            )
+            self.assertEqual(profile["property_id"], "prop_us_denver_rally_hotel")
+            self.assertEqual(mapping["method"], "provider_id_map")
+
+        with mock.patch.object(property_store, "PROPERTY_MASTER_DB_PATH", str(self.tmp / "missing.db")):
+            _, mapping = resolve_property(provider_hotel_id="x:db", hotel_name="Db Hotel", city="Denver")
+            self.assertEqual(mapping["method"], "fallback_generated")
+            # A missing file is not looked for again on every lookup.
+            with mock.patch.object(property_store.os.path, "exists", return_value=True) as exists:
+                self.assertIsNone(property_store.get_property_store())
+                exists.assert_not_called()
+
+    def test_db_lookups_and_index_rebuilds_run_off_the_event_loop(self):
+        store = SqlitePropertyStore(self.db_path)
+        store.import_rows([{"property_id": "prop_db_only", "name": "Db Hotel", "city": "Boulder", "provider_ids": ["x:db"]}])
+        store.close()
+        index = property_master.CatalogIndex(lambda records: {record.property_id for record in records}, "test-index")
+        threaded = []
+        to_thread = asyncio.to_thread
+
+        async def recording_to_thread(func, /, *args, **kwargs):
+            threaded.append(func.__name__)
+            return await to_thread(func, *args, **kwargs)
+
+        async def scenario():
+            self.assertIn("prop_db_only", await index.refresh())
+            first, _ = await resolve_property_async(provider_hotel_id="x:db", hotel_name="Db Hotel", city="Boulder")
+            again, mapping = await resolve_property_async(provider_hotel_id="x:db", hotel_name="Db Hotel", city="Boulder")
+            self.assertIs(again, first)
+            self.assertEqual(mapping["method"], "provider_id_map")
+
+            writer = SqlitePropertyStore(self.db_path)
+            writer.import_rows([{"property_id": "prop_db_new", "name": "New Hotel", "city": "Boulder"}])
+            writer.close()
+            property_store.get_property_store().reload()
+            # The loop keeps the previous index until the rebuilt one is swapped in.
+            self.assertNotIn("prop_db_new", index.get())
+            self.assertIn("prop_db_new", await index.refresh())
+
+        with (
+            mock.patch.object(property_store, "PROPERTY_MASTER_DB_PATH", str(self.db_path)),
+            mock.patch.object(property_master.asyncio, "to_thread", recording_to_thread),
+        ):
+            asyncio.run(scenario())
+        # One lookup missed the LRU; the repeat was answered on the loop.
+        self.assertEqual(threaded.count("resolve_property"), 1)
+        self.assertEqual(threaded.count("_rebuild"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+import asyncio
+import time
+import unittest
+
+from src.models import BookingResponse, hotel_card_payload, offer_payload, price_preview_payload, SearchHotelsResponse
+from src.providers.registry import ProviderRegistry, provider_configs
+from src.providers.sigtrip import SigtripProvider
+from src.service import HotelWrapperService
+
+
+class StaticProvider:
+    def __init__(self, name, hotels, delay=0.0, fail=False):
+        self.provider_name = name
+        self.hotels = hotels
+        self.delay = delay
+        self.fail = fail
+        self.bookings = []
+
+    async def search_hotel_offers(self, location, check_in, check_out, guests, max_hotels, max_offers_per_hotel, **_):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream exploded")
+        cards = [
+            hotel_card_payload(
+                hotel_id=f"{self.provider_name}:{slug}",
+                property_id=property_id,
+                provider=self.provider_name,
+                provider_ids=[f"{self.provider_name}:{slug}"],
+                name=slug,
+                location="Denver",
+                price_preview=price_preview_payload(from_total=price, currency="USD"),
+                availability_status="available",
+                top_offers=[
+                    offer_payload(offer_id=f"{self.provider_name}:{slug}:{room}", room_type=room, room_name=room, total_amount=price + extra, currency="USD")
+                    for room, extra in (("King", 0.0), ("Suite", 100.0))
+                ],
+            )
+            for slug, property_id, price in self.hotels
+        ]
+        return SearchHotelsResponse.from_trusted(
+            provider=self.provider_name, query={"location": location}, metadata={"source": self.provider_name}, hotels=cards
+        )
+
+    async def create_booking_request(self, offer_id, guest):
+        self.bookings.append(offer_id)
+        return BookingResponse(status="failed", provider_reference=self.provider_name)
+
+
+class ProviderConfigTests(unittest.TestCase):
+    def test_reads_provider_env_with_sigtrip_first(self):
+        configs = provider_configs(
+            {
+                "MCP_PROVIDER_BOOKING_URL": "https://booking.example/mcp",
+                "MCP_PROVIDER_BOOKING_API_KEY": "k",
+                "MCP_PROVIDER_BOOKING_DEADLINE_SECONDS": "2.5",
+                "MCP_PROVIDER_EMPTY_URL": "",
+            }
+        )
+        self.assertEqual([config.name for config in configs], ["sigtrip", "booking"])
+        self.assertEqual(configs[1].deadline_seconds, 2.5)
+        self.assertTrue(configs[1].api_key_set)
+
+    def test_providers_without_an_adapter_are_skipped(self):
+        registry = ProviderRegistry.from_env({"MCP_PROVIDER_BOOKING_URL": "https://booking.example/mcp"})
+        self.assertEqual(list(registry.providers), ["sigtrip"])
+        self.assertIn("booking", registry.describe()["skipped"])
+        self.assertIsInstance(registry.providers["sigtrip"], SigtripProvider)
+
+
+class FanOutTests(unittest.IsolatedAsyncioTestCase):
+    async def test_merges_by_property_and_drops_only_the_slow_provider(self):
+        registry = ProviderRegistry(
+            {
+                "alpha": StaticProvider("alpha", [("rally", "prop_rally", 210.0), ("oxford", "prop_oxford", 150.0)]),
+                "beta": StaticProvider("beta", [("rally_hotel", "prop_rally", 190.0), ("crawford", "prop_crawford", 300.0)]),
+                "slow": StaticProvider("slow", [("late", "prop_late", 50.0)], delay=1.0),
+                "broken": StaticProvider("broken", [], fail=True),
+            },
+            deadlines={"alpha": 1, "beta": 1, "slow": 0.05, "broken": 1},
+        )
+        started = time.perf_counter()
+        response = await registry.search_hotel_offers("denver", "2026-11-01", "2026-11-03", 2, 10, 3)
+        self.assertLess(time.perf_counter() - started, 0.5)
+
+        payload = response.to_payload()
+        hotels = payload["hotels"]
+        # Cheapest first across providers, not in arrival order.
+        self.assertEqual([hotel["property_id"] for hotel in hotels], ["prop_oxford", "prop_rally", "prop_crawford"])
+        self.assertEqual(hotels[1]["hotel_id"], "beta:rally_hotel")
+        self.assertEqual(hotels[1]["provider_ids"], ["alpha:rally", "beta:rally_hotel"])
+        self.assertEqual([offer["offer_id"] for offer in hotels[1]["top_offers"]], ["beta:rally_hotel:King", "beta:rally_hotel:Suite"])
+        self.assertEqual([offer["offer_id"] for offer in hotels[0]["top_offers"]], ["alpha:oxford:King", "alpha:oxford:Suite"])
+        providers = payload["metadata"]["providers"]
+        self.assertEqual(providers["slow"]["status"], "timeout")
+        self.assertEqual(providers["broken"]["status"], "error")
+        self.assertEqual(providers["alpha"]["hotels"], 2)
+        self.assertEqual(payload["provider"], "alpha,beta")
+
+    async def test_merged_card_preview_follows_merged_offers_and_ranking_precedes_the_cut(self):
+        registry = ProviderRegistry(
+            {
+                "alpha": StaticProvider("alpha", [("rally", "prop_rally", 210.0), ("oxford", "prop_oxford", 400.0)]),
+                "beta": StaticProvider("beta", [("crawford", "prop_crawford", 150.0)]),
+                # Gamma's cheaper rally card has sold out; only alpha's offers are left.
+                "gamma": StaticProvider("gamma", [("rally_hotel", "prop_rally", 90.0)]),
+            },
+        )
+        gamma = registry.providers["gamma"]
+        search = gamma.search_hotel_offers
+
+        async def sold_out(*args, **kwargs):
+            response = await search(*args, **kwargs)
+            payload = response.to_payload()
+            for hotel in payload["hotels"]:
+                hotel["top_offers"] = []
+                hotel["availability_status"] = "unavailable"
+            return SearchHotelsResponse.from_trusted(provider="gamma", query={}, metadata={}, hotels=payload["hotels"])
+
+        gamma.search_hotel_offers = sold_out
+        payload = (await registry.search_hotel_offers("denver", "2026-11-01", "2026-11-03", 2, 2, 3)).to_payload()
+        hotels = payload["hotels"]
+        self.assertEqual([hotel["property_id"] for hotel in hotels], ["prop_crawford", "prop_rally"])
+        rally = hotels[1]
+        self.assertEqual(rally["availability_status"], "available")
+        self.assertEqual(rally["price_preview"]["from_total"], 210.0)
+        self.assertEqual(rally["top_offers"][0]["offer_id"], "alpha:rally:King")
+
+    async def test_a_single_provider_passes_through_under_its_deadline(self):
+        registry = ProviderRegistry.from_env({"MCP_PROVIDER_SIGTRIP_DEADLINE_SECONDS": "0.05"})
+        self.assertEqual(registry.deadlines, {"sigtrip": 0.05})
+
+        registry = ProviderRegistry({"alpha": StaticProvider("alpha", [("rally", "prop_rally", 210.0)])})
+        payload = (await registry.search_hotel_offers("denver", "2026-11-01", "2026-11-03", 2, 10, 3)).to_payload()
+        self.assertEqual(payload["metadata"], {"source": "alpha"})
+
+        registry = ProviderRegistry({"slow": StaticProvider("slow", [("late", "prop_late", 50.0)], delay=1.0)}, deadlines={"slow": 0.01})
+        started = time.perf_counter()
+        payload = (await registry.search_hotel_offers("denver", "2026-11-01", "2026-11-03", 2, 10, 3)).to_payload()
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(payload["hotels"], [])
+        self.assertEqual(payload["metadata"]["providers"]["slow"]["status"], "timeout")
+
+    async def test_service_search_over_the_registry_is_not_cached_when_a_provider_times_out(self):
+        registry = ProviderRegistry(
+            {"alpha": StaticProvider("alpha", [("rally", "prop_rally", 210.0)]), "slow": StaticProvider("slow", [], delay=1.0)},
+            deadlines={"alpha": 1, "slow": 0.01},
+        )
+        service = HotelWrapperService(provider=registry)
+        result = await service.search_hotel_offers("denver", "2026-11-01", "2026-11-03")
+        self.assertEqual(len(result["hotels"]), 1)
+        self.assertEqual(result["metadata"]["provider_metadata"]["providers"]["slow"]["status"], "timeout")
+        self.assertEqual(len(service.response_cache._data), 0)
+
+    async def test_unhealthy_provider_sits_out_and_feeds_offer_confidence(self):
+        flaky = StaticProvider("flaky", [("rally", "prop_rally", 100.0)])
+        steady = StaticProvider("steady", [("rally", "prop_rally", 104.0)])
+        registry = ProviderRegistry({"flaky": flaky, "steady": steady})
+        for _ in range(3):
+            registry.health.record("flaky", 0.1, ok=True)
+        for _ in range(2):
+            registry.health.record("flaky", 0.1, ok=False)
+        payload = (await registry.search_hotel_offers("denver", "2026-11-01", "2026-11-03", 2, 10, 1)).to_payload()
+        # A ~30% error rate x confidence weight 0.2 outweighs the 4% price difference.
+        self.assertEqual(payload["hotels"][0]["top_offers"][0]["offer_id"], "steady:rally:King")
+
+        for _ in range(5):
+            registry.health.record("flaky", 0.1, ok=False)
+        payload = (await registry.search_hotel_offers("denver", "2026-11-01", "2026-11-03", 2, 10, 1)).to_payload()
+        self.assertEqual(payload["metadata"]["providers"]["flaky"]["status"], "skipped_unhealthy")
+        self.assertEqual(payload["hotels"][0]["provider_ids"], ["steady:rally"])
+        self.assertFalse(registry.describe()["active"][0]["health"]["healthy"])
+
+    async def test_bookings_route_by_id_prefix(self):
+        alpha = StaticProvider("alpha", [])
+        beta = StaticProvider("beta", [])
+        registry = ProviderRegistry({"alpha": alpha, "beta": beta})
+        response = await registry.create_booking_request("beta:rally:ASK", guest=None)
+        self.assertEqual(response.provider_reference, "beta")
+        await registry.create_booking_request("unknown-offer", guest=None)
+        self.assertEqual(alpha.bookings, ["unknown-offer"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+from starlette.testclient import TestClient
+
+from src import cache_snapshot, mcp_tools
+from src.server import ServerSettings, create_app, create_asgi_app, validate_settings
+
+
+class ServerSettingsTests(unittest.TestCase):
+    def test_from_env_defaults_and_strict_validation(self):
+        settings = ServerSettings.from_env({})
+        self.assertEqual((settings.host, settings.port, settings.app_env), ("0.0.0.0", 8000, "dev"))
+        self.assertFalse(settings.sigtrip_api_key_set)
+        self.assertIsNone(settings.admin_token)
+        validate_settings(settings)
+        with self.assertRaises(RuntimeError):
+            validate_settings(ServerSettings.from_env({"APP_ENV": "prod"}))
+        validate_settings(ServerSettings.from_env({"APP_ENV": "prod", "MCP_PROVIDER_SIGTRIP_API_KEY": "key"}))
+
+
+class CreateAppTests(unittest.IsolatedAsyncioTestCase):
+    async def test_registers_every_tool_without_building_providers(self):
+        app = create_app(ServerSettings.from_env({"APP_VERSION": "9.9.9"}))
+        tools = [tool.name for tool in await app.list_tools()]
+        self.assertEqual(tools, [tool.__name__ for tool in mcp_tools.TOOLS])
+        self.assertIn("search_hotel_offers", tools)
+        self.assertIsNone(mcp_tools.state().built("providers"))
+        self.assertIsNone(mcp_tools.state().built("service"))
+
+        with TestClient(app.sse_app()) as http:
+            self.assertEqual(http.get("/healthz").json()["version"], "9.9.9")
+            self.assertIn("# TYPE mcp_tool_duration_seconds", http.get("/metrics").text)
+            self.assertEqual(http.get("/readyz").status_code, 503)
+        self.assertIsNone(mcp_tools.state().built("service"))
+
+    def test_factory_entry_point_loads_dotenv_before_settings_are_read(self):
+        # A fresh interpreter, as `uvicorn --factory` would be: nothing from src is imported yet.
+        script = (
+            "import sys, dotenv\n"
+            "seen = []\n"
+            "dotenv.load_dotenv = lambda *args, **kwargs: seen.append('src.client' in sys.modules)\n"
+            "from src.server import create_asgi_app\n"
+            "create_asgi_app()\n"
+            "print(seen)\n"
+        )
+        env = {key: value for key, value in os.environ.items() if key != "APP_ENV"}
+        output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True, env=env)
+        self.assertEqual(output.stdout.strip(), "[False]")
+
+    def test_asgi_app_runs_background_jobs_in_its_lifespan(self):
+        with TestClient(create_asgi_app(ServerSettings.from_env({}))) as http:
+            self.assertEqual(http.get("/healthz").status_code, 200)
+        # Warmer and snapshot are disabled by default, so nothing was built.
+        self.assertIsNone(mcp_tools.state().built("warmer"))
+
+    def test_readiness_probe_does_not_build_the_app_state(self):
+        app = create_app(ServerSettings.from_env({"MCP_PROVIDER_SIGTRIP_API_KEY": "key"}))
+        with TestClient(app.sse_app()) as http:
+            ready = http.get("/readyz")
+        self.assertEqual(ready.status_code, 200)
+        self.assertIsNone(ready.json()["cache_warmer"])
+        for name in ("providers", "service", "warmer", "snapshot"):
+            self.assertIsNone(mcp_tools.state().built(name))
+
+    def test_snapshot_is_restored_before_the_first_request(self):
+        restore = mock.AsyncMock()
+        with (
+            mock.patch.object(cache_snapshot, "CACHE_SNAPSHOT_PATH", "snapshot.db"),
+            mock.patch.object(cache_snapshot.CacheSnapshot, "restore", restore),
+        ):
+            with TestClient(create_asgi_app(ServerSettings.from_env({}))) as http:
+                restore.assert_awaited_once()
+                self.assertEqual(http.get("/healthz").status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
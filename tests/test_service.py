@@ -1,19 +1,35 @@
+import datetime as dt
 import unittest
 
 from src.models import BookingCancellationResponse, BookingResponse, BookingStatusResponse, HotelCard, Offer, PricePreview, SearchHotelsResponse
-from src.service import HotelWrapperService
+from src.service import HotelWrapperService, _group_hotels_by_property, _parse_date, _parse_natural_query, _rank_hotel_groups, _relative_dates
 
 
 class FakeProvider:
     def __init__(self):
         self.last_search = None
 
-    async def search_hotel_offers(self, location, check_in, check_out, guests, max_hotels, max_offers_per_hotel):
+    async def search_hotel_offers(
+        self,
+        location,
+        check_in,
+        check_out,
+        guests,
+        max_hotels,
+        max_offers_per_hotel,
+        near=None,
+        radius_km=None,
+        fields=None,
+        offer_fields=None,
+    ):
         self.last_search = {
             "location": location,
             "check_in": check_in,
             "check_out": check_out,
             "guests": guests,
+            "near": near,
+            "radius_km": radius_km,
+            "fields": fields,
         }
         return SearchHotelsResponse(
             provider="sigtrip",
@@ -155,6 +171,17 @@ class HotelWrapperServiceTests(unittest.IsolatedAsyncioTestCase):
         self.assertIn("data_source", result["metadata"])
         self.assertEqual(result["metadata"]["contract_version"], "v1")
 
+    async def test_search_listeners_see_successful_searches_with_the_resolved_location(self):
+        service = HotelWrapperService(provider=FakeProvider())
+        seen = []
+        service.search_listeners.append(lambda *search: seen.append(search))
+        await service.search_hotel_offers("Denver", "2026-02-11", "2026-02-12", view="bogus")
+        await service.search_hotel_offers("nowhere at all", "2026-02-11", "2026-02-12")
+        self.assertEqual(seen, [])
+        await service.search_hotel_offers("hotels in NYC", "02/11/2026", "2026-02-13", guests=0)
+        await service.search_hotel_offers("hotels in NYC", "02/11/2026", "2026-02-13", guests=0)
+        self.assertEqual(seen, [("new york", "2026-02-11", "2026-02-13", 1)] * 2)
+
     async def test_booking_validates_guest_schema(self):
         service = HotelWrapperService(provider=FakeProvider())
 
@@ -204,6 +231,37 @@ class HotelWrapperServiceTests(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(provider.last_search["guests"], 2)
         self.assertTrue(result["metadata"]["interpreted_from_query"])
 
+    async def test_plan_hotel_options_resolves_relative_dates(self):
+        provider = FakeProvider()
+        service = HotelWrapperService(provider=provider)
+        await service.plan_hotel_options("Hotels in New York tomorrow for 3 adults")
+        tomorrow = dt.date.today() + dt.timedelta(days=1)
+        self.assertEqual(provider.last_search["location"], "New York")
+        self.assertEqual(provider.last_search["guests"], 3)
+        self.assertEqual(provider.last_search["check_in"], tomorrow.isoformat())
+        self.assertEqual(provider.last_search["check_out"], (tomorrow + dt.timedelta(days=1)).isoformat())
+
+    async def test_search_passes_resolved_near_point(self):
+        provider = FakeProvider()
+        service = HotelWrapperService(provider=provider)
+        result = await service.search_hotel_offers("denver", near="Coors Field", radius_km=2)
+        self.assertAlmostEqual(provider.last_search["near"].latitude, 39.7559)
+        self.assertEqual(provider.last_search["radius_km"], 2)
+        self.assertEqual(result["metadata"]["normalized_input"]["near"]["radius_km"], 2)
+
+        unresolved = await service.search_hotel_offers("denver", near="somewhere vague")
+        self.assertIsNone(provider.last_search["near"])
+        self.assertIsNone(unresolved["metadata"]["normalized_input"]["near"])
+        self.assertTrue(any("near" in warning for warning in unresolved["metadata"]["warnings"]))
+
+    async def test_plan_hotel_options_parses_near(self):
+        provider = FakeProvider()
+        service = HotelWrapperService(provider=provider)
+        result = await service.plan_hotel_options("Hotels in Denver near Coors Field")
+        self.assertEqual(provider.last_search["location"], "Denver")
+        self.assertIsNotNone(provider.last_search["near"])
+        self.assertEqual(result["metadata"]["query_parse"]["near"], "Coors Field")
+
     async def test_compare_hotels_returns_ranked_items(self):
         provider = FakeProvider()
         service = HotelWrapperService(provider=provider)
@@ -219,6 +277,54 @@ class HotelWrapperServiceTests(unittest.IsolatedAsyncioTestCase):
             result["comparison"][1]["from_total"],
         )
 
+    async def test_search_compact_view_and_field_projection(self):
+        provider = FakeProvider()
+        service = HotelWrapperService(provider=provider)
+        compact = await service.search_hotel_offers("denver", view="compact")
+        hotel = compact["hotels"][0]
+        self.assertEqual(set(hotel), {"hotel_id", "property_id", "name", "availability_status", "price_preview", "top_offers"})
+        self.assertEqual(set(hotel["top_offers"][0]), {"offer_id", "room_name", "total_amount", "currency"})
+        self.assertNotIn("raw_input", compact["metadata"])
+        self.assertEqual(compact["metadata"]["contract_version"], "v1")
+        self.assertEqual(provider.last_search["fields"], frozenset(hotel))
+
+        projected = await service.search_hotel_offers("denver", fields=["name", "thumbnail_url"])
+        self.assertEqual(list(projected["hotels"][0]), ["hotel_id", "name", "thumbnail_url"])
+        self.assertIn("raw_input", projected["metadata"])
+
+    async def test_invalid_view_or_fields_return_error_envelope(self):
+        service = HotelWrapperService(provider=FakeProvider())
+        bad_fields = await service.search_hotel_offers("denver", fields=["name", "nope"])
+        self.assertEqual(bad_fields["error"]["code"], "INVALID_FIELDS")
+        self.assertEqual(bad_fields["error"]["details"]["unknown_fields"], ["nope"])
+        bad_view = await service.compare_hotels_from_query("Compare hotels in Denver", view="tiny")
+        self.assertEqual(bad_view["error"]["code"], "INVALID_VIEW")
+
+    async def test_compare_hotels_compact_view(self):
+        provider = FakeProvider()
+        service = HotelWrapperService(provider=provider)
+        result = await service.compare_hotels("denver", view="compact")
+        self.assertNotIn("image_url", result["comparison"][0])
+        self.assertEqual(result["comparison"][0]["rank_by_price"], 1)
+        self.assertNotIn("thumbnail_url", provider.last_search["fields"])
+        self.assertEqual(result["metadata"]["view"], "compact")
+        self.assertEqual(result["metadata"]["dedupe_strategy"], "group_by_property_id")
+
+    async def test_session_follow_up_returns_delta(self):
+        service = HotelWrapperService(provider=FakeProvider())
+        first = await service.plan_hotel_options("Hotels in Denver", session_id="chat-1")
+        self.assertEqual(first["metadata"]["delta"]["mode"], "full")
+        self.assertEqual(len(first["hotels"]), 3)
+
+        version = first["metadata"]["delta"]["version"]
+        again = await service.plan_hotel_options("Hotels in Denver", session_id="chat-1", since_version=version)
+        self.assertEqual(again["hotels"], [])
+        self.assertEqual(len(again["metadata"]["delta"]["unchanged_hotel_ids"]), 3)
+        self.assertTrue(again["metadata"]["interpreted_from_query"])
+
+        plain = await service.search_hotel_offers("Denver")
+        self.assertNotIn("delta", plain["metadata"])
+
     async def test_compare_hotels_can_filter_ids(self):
         provider = FakeProvider()
         service = HotelWrapperService(provider=provider)
@@ -234,6 +340,16 @@ class HotelWrapperServiceTests(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(provider.last_search["guests"], 2)
         self.assertTrue(result["metadata"]["interpreted_from_query"])
 
+    async def test_suggest_locations_resolves_and_autocompletes(self):
+        service = HotelWrapperService(provider=FakeProvider())
+        result = await service.suggest_locations("new y")
+        self.assertEqual(result["suggestions"][0]["location_id"], "us:new_york")
+        self.assertIsNone(result["resolved"])
+        self.assertEqual(result["metadata"]["contract_version"], "v1")
+
+        resolved = await service.suggest_locations("London, UK")
+        self.assertEqual(resolved["resolved"]["city"], "London")
+
     async def test_cancel_booking_supported_and_unsupported(self):
         service = HotelWrapperService(provider=FakeProvider())
         cancelled = await service.cancel_booking("ref-123")
@@ -260,5 +376,59 @@ class HotelWrapperServiceTests(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(unsupported["status"], "unsupported")
 
 
+class NaturalQueryParserTests(unittest.TestCase):
+    def test_parses_explicit_date_range_and_guests(self):
+        parsed = _parse_natural_query("Find hotels in Denver for 2 guests from 2026-03-01 to 2026-03-03")
+        self.assertEqual(
+            parsed,
+            {"location": "Denver", "guests": 2, "check_in": "2026-03-01", "check_out": "2026-03-03", "near": None},
+        )
+
+    def test_falls_back_to_whole_query_as_location(self):
+        parsed = _parse_natural_query("denver")
+        self.assertEqual(parsed["location"], "denver")
+        self.assertEqual(parsed["guests"], 1)
+        self.assertIsNone(parsed["check_in"])
+
+    def test_weekend_ranges_run_friday_to_sunday(self):
+        monday = dt.date(2026, 10, 19)
+        self.assertEqual(_relative_dates("this weekend", monday), ("2026-10-23", "2026-10-25"))
+        self.assertEqual(_relative_dates("next weekend", monday), ("2026-10-30", "2026-11-01"))
+        saturday = dt.date(2026, 10, 24)
+        self.assertEqual(_relative_dates("this weekend", saturday), ("2026-10-24", "2026-10-25"))
+
+    def test_parse_date_accepts_supported_formats_only(self):
+        self.assertEqual(_parse_date("2026-04-10"), dt.date(2026, 4, 10))
+        self.assertEqual(_parse_date("04/10/2026"), dt.date(2026, 4, 10))
+        self.assertEqual(_parse_date("04-10-2026"), dt.date(2026, 4, 10))
+        self.assertEqual(_parse_date("2026/04/10"), dt.date(2026, 4, 10))
+        self.assertIsNone(_parse_date("2026-04/10"))
+        self.assertIsNone(_parse_date("2026-02-30"))
+
+    def test_returns_fresh_dict_for_memoized_queries(self):
+        first = _parse_natural_query("Compare hotels in Denver for 2 guests")
+        first["location"] = "mutated"
+        second = _parse_natural_query("Compare hotels in Denver for 2 guests")
+        self.assertEqual(second["location"], "Denver")
+
+
+class PropertyGroupingTests(unittest.TestCase):
+    def test_groups_keep_cheapest_card_and_unique_provider_ids(self):
+        hotels = [
+            {"hotel_id": "a:1", "property_id": "p1", "provider_ids": ["a:1"], "price_preview": {"from_total": 300.0}},
+            {"hotel_id": "b:1", "property_id": "p1", "provider_ids": ["b:1", "a:1"], "price_preview": {"from_total": 250.0}},
+            {"hotel_id": "c:2", "property_id": "p2", "price_preview": {"from_total": None}},
+            {"hotel_id": "a:3", "property_id": "p3", "provider_ids": ["a:3"], "price_preview": {"from_total": 120.0}},
+        ]
+        groups = _group_hotels_by_property(hotels)
+        self.assertEqual([g.hotel["hotel_id"] for g in groups], ["b:1", "c:2", "a:3"])
+        self.assertEqual(groups[0].provider_ids, ["a:1", "b:1"])
+        self.assertEqual(groups[1].provider_ids, ["c:2"])
+
+        ranked = _rank_hotel_groups(groups, limit=2)
+        self.assertEqual([g.hotel["property_id"] for g in ranked], ["p3", "p1"])
+        self.assertEqual([g.hotel["property_id"] for g in _rank_hotel_groups(groups, limit=10)], ["p3", "p1", "p2"])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,181 @@
+import unittest
+from unittest import mock
+
+from src import client
+from src.providers import sigtrip
+from src.providers.sigtrip import SigtripProvider, _extract_image_urls
+from src.service import HotelWrapperService
+
+
+class MapOffersTests(unittest.TestCase):
+    def test_returns_cheapest_offers_not_first_rows(self):
+        prices = [
+            {"roomType": "SUITE", "totalAmount": "540.00", "currency": "USD"},
+            {"roomType": "KING", "totalAmount": 310.5, "currency": "USD"},
+            {"roomType": "NOPRICE", "totalAmount": None},
+            {"roomType": "QUEEN", "totalAmount": 199, "currency": "USD"},
+            {"roomType": "TWIN", "totalAmount": "bad"},
+            {"roomType": "DOUBLE", "totalAmount": 250, "currency": "USD"},
+        ]
+        offers = SigtripProvider()._map_offers("The Rally Hotel", prices, 3)
+        self.assertEqual([offer["room_type"] for offer in offers], ["QUEEN", "DOUBLE", "KING"])
+        self.assertEqual(offers[0]["offer_id"], "sigtrip:The_Rally_Hotel:QUEEN")
+        self.assertEqual(offers[0]["total_amount"], 199.0)
+
+    def test_unpriced_rows_only_fill_remaining_slots(self):
+        prices = [{"roomType": "NOPRICE"}, {"roomType": "KING", "totalAmount": 310}]
+        offers = SigtripProvider()._map_offers("The Rally Hotel", prices, 5)
+        self.assertEqual([offer["room_type"] for offer in offers], ["KING", "NOPRICE"])
+        self.assertEqual(SigtripProvider()._map_offers("The Rally Hotel", prices, 0), [])
+
+
+class ImageUrlTests(unittest.TestCase):
+    def test_urls_are_validated_and_canonicalized_at_the_boundary(self):
+        data = {
+            "rooms": [
+                {"images": ["https://cdn.example.com/img/a.jpg", "https://cdn.example.com/img/a.jpg"]},
+                {"images": ["https://exa mple.com/img/bad.jpg", "https://IMAGES.example.com"]},
+            ]
+        }
+        self.assertEqual(
+            _extract_image_urls(data),
+            ["https://cdn.example.com/img/a.jpg", "https://images.example.com/"],
+        )
+
+
+class FieldProjectionTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        for upstream_cache in (sigtrip.PRICE_CACHE, sigtrip.ROOM_CACHE, sigtrip.GALLERY_CACHE):
+            upstream_cache.clear()
+
+    async def test_skips_upstream_calls_for_unrequested_fields(self):
+        calls = []
+
+        async def fake_upstream(tool_name, arguments):
+            calls.append(tool_name)
+            return {"prices": [{"roomType": "KING", "roomDescription": "King", "totalAmount": 310, "currency": "USD"}]}
+
+        with mock.patch.object(sigtrip, "call_upstream", fake_upstream):
+            response = await SigtripProvider().search_hotel_offers(
+                "denver",
+                "2026-11-01",
+                "2026-11-03",
+                1,
+                5,
+                3,
+                fields=frozenset({"hotel_id", "name", "price_preview", "top_offers"}),
+                offer_fields=frozenset({"offer_id"}),
+            )
+        self.assertEqual(calls, ["get_prices"])
+        # Cards stay whole; the service projects them after reading their sources.
+        card = response.to_payload()["hotels"][0]
+        self.assertEqual((card["image_urls"], card["image_source"], card["pricing_source"]), ([], "none", "upstream"))
+        self.assertEqual(card["top_offers"][0]["offer_id"], "sigtrip:The_Rally_Hotel:KING")
+        self.assertEqual(card["price_preview"]["from_total"], 310.0)
+
+    async def test_projected_search_and_compare_keep_the_data_source_summary(self):
+        async def fake_upstream(tool_name, arguments):
+            return {
+                "prices": [{"roomType": "KING", "totalAmount": 310, "currency": "USD"}],
+                "rooms": [{"images": ["https://cdn.example.com/rally.jpg"]}],
+            }
+
+        service = HotelWrapperService(provider=SigtripProvider())
+        with mock.patch.object(sigtrip, "call_upstream", fake_upstream):
+            compared = await service.compare_hotels("denver", check_in="2026-11-01", check_out="2026-11-03")
+            searched = await service.search_hotel_offers("denver", "2026-11-01", "2026-11-03", fields=["name", "top_offers"])
+        self.assertEqual(compared["metadata"]["data_source"], {"image": "upstream", "pricing": "upstream"})
+        self.assertEqual(compared["comparison"][0]["image_url"], "https://cdn.example.com/rally.jpg")
+        self.assertEqual(searched["metadata"]["data_source"], {"image": "upstream", "pricing": "upstream"})
+        self.assertEqual(list(searched["hotels"][0]), ["hotel_id", "name", "top_offers"])
+
+
+class ResponseCacheTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        for upstream_cache in (sigtrip.PRICE_CACHE, sigtrip.ROOM_CACHE, sigtrip.GALLERY_CACHE):
+            upstream_cache.clear()
+
+    async def test_repeat_search_is_served_from_cache_until_prices_refresh(self):
+        calls = []
+
+        async def fake_upstream(tool_name, arguments):
+            calls.append(tool_name)
+            return {"prices": [{"roomType": "KING", "totalAmount": 300 + len(calls), "currency": "USD"}]}
+
+        service = HotelWrapperService(provider=SigtripProvider())
+        with mock.patch.object(sigtrip, "call_upstream", fake_upstream):
+            first = await service.search_hotel_offers("denver", "2026-11-01", "2026-11-03", view="compact")
+            second = await service.search_hotel_offers("denver", "2026-11-01", "2026-11-03", view="compact")
+            self.assertEqual(first, second)
+            self.assertEqual(calls, ["get_prices"])
+
+            sigtrip.PRICE_CACHE.clear()
+            third = await service.search_hotel_offers("denver", "2026-11-01", "2026-11-03", view="compact")
+        self.assertEqual(calls, ["get_prices", "get_prices"])
+        self.assertNotEqual(third["hotels"][0]["price_preview"], first["hotels"][0]["price_preview"])
+
+    async def test_cache_hits_report_current_upstream_health(self):
+        async def fake_upstream(tool_name, arguments):
+            return {"prices": [{"roomType": "KING", "totalAmount": 310, "currency": "USD"}]}
+
+        client.ENDPOINT_HEALTH.clear()
+        service = HotelWrapperService(provider=SigtripProvider())
+        with mock.patch.object(sigtrip, "call_upstream", fake_upstream):
+            first = await service.search_hotel_offers("denver", "2026-11-01", "2026-11-03", fields=["name", "top_offers"])
+            client.ENDPOINT_HEALTH.record(client.UPSTREAM_URL, 0.1, ok=False)
+            second = await service.search_hotel_offers("denver", "2026-11-01", "2026-11-03", fields=["name", "top_offers"])
+        client.ENDPOINT_HEALTH.clear()
+        self.assertEqual(service.response_cache.stats()["hits"], 1)
+        health = [result["metadata"]["provider_metadata"]["upstream_health"] for result in (first, second)]
+        self.assertEqual(health[0][client.UPSTREAM_URL]["error_rate"], 0.0)
+        self.assertGreater(health[1][client.UPSTREAM_URL]["error_rate"], 0.0)
+
+    async def test_failed_upstream_calls_are_not_cached(self):
+        async def failing_upstream(tool_name, arguments):
+            return None
+
+        service = HotelWrapperService(provider=SigtripProvider())
+        with mock.patch.object(sigtrip, "call_upstream", failing_upstream):
+            await service.search_hotel_offers("denver", "2026-11-01", "2026-11-03", view="compact")
+        self.assertEqual(service.response_cache.stats()["size"], 0)
+        self.assertEqual(len(sigtrip.PRICE_CACHE), 0)
+
+    async def test_non_json_upstream_bodies_are_not_cached(self):
+        async def text_upstream(tool_name, arguments):
+            if tool_name == "get_rooms":
+                return {"rooms": [{"roomType": "KING"}]}
+            return {"text_fallback": "Error: rate limit exceeded"}
+
+        service = HotelWrapperService(provider=SigtripProvider())
+        with mock.patch.object(sigtrip, "call_upstream", text_upstream):
+            await service.search_hotel_offers("denver", "2026-11-01", "2026-11-03")
+        self.assertEqual(service.response_cache.stats()["size"], 0)
+        self.assertEqual((len(sigtrip.PRICE_CACHE), len(sigtrip.ROOM_CACHE), len(sigtrip.GALLERY_CACHE)), (0, 1, 0))
+
+
+class ToolListCacheTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        sigtrip.TOOLS_CACHE.clear()
+
+    def tearDown(self):
+        sigtrip.TOOLS_CACHE.clear()
+
+    async def test_tool_list_is_fetched_once_and_failures_are_not_cached(self):
+        calls = []
+
+        async def fake_method(method, params=None):
+            calls.append(method)
+            if len(calls) == 1:
+                return None
+            return {"result": {"tools": [{"name": "cancel_booking", "inputSchema": {}}]}}
+
+        provider = SigtripProvider()
+        with mock.patch.object(sigtrip, "call_upstream_method", fake_method):
+            self.assertEqual(await provider._list_upstream_tools(), {})
+            self.assertEqual(await provider._list_upstream_tool_names(), {"cancel_booking"})
+            self.assertEqual(await provider._list_upstream_tool_names(), {"cancel_booking"})
+        self.assertEqual(calls, ["tools/list", "tools/list"])
+
+
+if __name__ == "__main__":
+    unittest.main()
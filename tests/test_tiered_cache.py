@@ -0,0 +1,157 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src import cache, tiered_cache
+from src.cache import MISS
+from src.tiered_cache import (
+    HashRing,
+    RedisCacheBackend,
+    SqliteCacheBackend,
+    TieredCache,
+    backend_from_url,
+    decode_value,
+    encode_value,
+    shared_key,
+)
+
+
+class CodecTests(unittest.TestCase):
+    def test_round_trip_and_compression_of_large_values(self):
+        small = {"prices": [{"roomType": "KING", "totalAmount": 310}]}
+        self.assertEqual(decode_value(encode_value(small)), small)
+        self.assertTrue(encode_value(small).startswith(b"j"))
+
+        large = {"rooms": [{"name": "King Room", "images": [f"https://cdn.example.com/{i}.jpg"]} for i in range(50)]}
+        encoded = encode_value(large)
+        self.assertTrue(encoded.startswith(b"z"))
+        self.assertLess(len(encoded), len(encode_value(large, compress_min_bytes=10**9)))
+        self.assertEqual(decode_value(encoded), large)
+
+    def test_shared_keys_are_stable_namespaced_and_fixed_length(self):
+        key = shared_key("ns", "prices", 'get_prices:{"hotelName":"The Rally Hotel"}')
+        self.assertEqual(key, shared_key("ns", "prices", 'get_prices:{"hotelName":"The Rally Hotel"}'))
+        self.assertTrue(key.startswith("ns:prices:"))
+        self.assertEqual(len(key), len(shared_key("ns", "prices", "x" * 1000)))
+        self.assertNotEqual(key, shared_key("ns", "rooms", 'get_prices:{"hotelName":"The Rally Hotel"}'))
+
+
+class HashRingTests(unittest.TestCase):
+    def test_adding_a_node_moves_about_one_nth_of_the_keys(self):
+        keys = [f"key-{i}" for i in range(2000)]
+        before = HashRing(["a", "b", "c"])
+        after = HashRing(["a", "b", "c", "d"])
+        moved = [key for key in keys if before.node_for(key) != after.node_for(key)]
+        self.assertTrue(all(after.node_for(key) == "d" for key in moved))
+        self.assertLess(len(moved), len(keys) * 0.4)
+
+    def test_backend_from_url(self):
+        self.assertIsNone(backend_from_url(""))
+        self.assertIsInstance(backend_from_url("sqlite:////tmp/cache.db"), SqliteCacheBackend)
+        self.assertEqual(backend_from_url("sqlite:////tmp/cache.db").path, "/tmp/cache.db")
+        redis = backend_from_url("redis://:pw@cache.internal:6380/2")
+        self.assertEqual((redis.host, redis.port, redis.db, redis.password), ("cache.internal", 6380, 2, "pw"))
+        sharded = backend_from_url("redis://a:6379,redis://b:6379")
+        self.assertEqual(sharded.describe()["backend"], "sharded")
+        with self.assertRaises(ValueError):
+            backend_from_url("memcached://a")
+
+
+class SqliteTieredCacheTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.db")
+
+    async def asyncTearDown(self):
+        self.tmp.cleanup()
+
+    async def test_second_replica_reads_shared_entry_with_remaining_ttl(self):
+        replica_a = TieredCache("rooms", 60, 10, SqliteCacheBackend(self.path), namespace="t")
+        replica_b = TieredCache("rooms", 60, 10, SqliteCacheBackend(self.path), namespace="t")
+        with mock.patch.object(tiered_cache.time, "time", return_value=1000.0):
+            await replica_a.store("hotel", {"rooms": ["KING"]})
+        with mock.patch.object(tiered_cache.time, "time", return_value=1045.0), mock.patch.object(
+            cache.time, "monotonic", return_value=500.0
+        ):
+            self.assertEqual(await replica_b.fetch("hotel"), {"rooms": ["KING"]})
+        # Copied into L1 for the 15s the shared entry had left, not a fresh 60s.
+        with mock.patch.object(cache.time, "monotonic", return_value=514.0):
+            self.assertEqual(replica_b.get("hotel"), {"rooms": ["KING"]})
+        with mock.patch.object(cache.time, "monotonic", return_value=516.0):
+            self.assertIs(replica_b.get("hotel"), MISS)
+        self.assertEqual(replica_b.stats()["shared_hits"], 1)
+        await replica_a.shared.close()
+        await replica_b.shared.close()
+
+    async def test_shared_failures_count_as_misses(self):
+        class BrokenBackend:
+            async def get(self, key):
+                raise ConnectionError("down")
+
+            async def set(self, key, value, ttl_seconds):
+                raise ConnectionError("down")
+
+        rooms = TieredCache("rooms", 60, 10, BrokenBackend())
+        await rooms.store("hotel", ["KING"])
+        self.assertEqual(rooms.get("hotel"), ["KING"])
+        rooms.clear()
+        self.assertIs(await rooms.fetch("hotel"), MISS)
+        self.assertEqual(rooms.stats()["shared_errors"], 2)
+
+
+class RedisTieredCacheTests(unittest.IsolatedAsyncioTestCase):
+    """Against a local stand-in that speaks enough RESP for the backend."""
+
+    async def asyncSetUp(self):
+        self.data: dict[bytes, tuple[bytes, int]] = {}
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                command = await tiered_cache._read_reply(reader)
+                name, args = command[0].upper(), command[1:]
+                if name == b"SET":
+                    self.data[args[0]] = (args[1], int(args[3]))
+                    writer.write(b"+OK\r\n")
+                elif name == b"GET":
+                    value = self.data.get(args[0])
+                    writer.write(b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value[0]), value[0]))
+                elif name == b"PTTL":
+                    writer.write(b":%d\r\n" % (self.data[args[0]][1] - 4000 if args[0] in self.data else -2))
+                elif name == b"DEL":
+                    writer.write(b":%d\r\n" % int(self.data.pop(args[0], None) is not None))
+                else:
+                    writer.write(b"-ERR unknown command\r\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def test_round_trip_propagates_ttl_and_binary_values(self):
+        backend = RedisCacheBackend("127.0.0.1", self.port)
+        writer = TieredCache("prices", 60, 10, backend, namespace="t")
+        reader = TieredCache("prices", 60, 10, backend, namespace="t")
+        await writer.store("q", {"prices": [{"totalAmount": 310}] * 100})
+        stored_value, stored_ttl_ms = self.data[shared_key("t", "prices", "q").encode()]
+        self.assertEqual(stored_ttl_ms, 60000)
+        self.assertTrue(stored_value.startswith(b"z"))
+
+        with mock.patch.object(cache.time, "monotonic", return_value=100.0):
+            self.assertEqual((await reader.fetch("q"))["prices"][0], {"totalAmount": 310})
+        with mock.patch.object(cache.time, "monotonic", return_value=157.0):
+            self.assertIs(reader.get("q"), MISS)
+        self.assertIsNone(await backend.get("missing"))
+        await backend.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
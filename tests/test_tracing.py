@@ -0,0 +1,81 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src import tracing
+from src.providers import sigtrip
+from src.providers.sigtrip import SigtripProvider
+from src.service import HotelWrapperService
+
+
+class TracingTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.exporter = tracing.InMemoryExporter()
+        tracing.configure(exporter=self.exporter, sample_rate=1.0)
+        for upstream_cache in (sigtrip.PRICE_CACHE, sigtrip.ROOM_CACHE, sigtrip.GALLERY_CACHE):
+            upstream_cache.clear()
+
+    def tearDown(self):
+        tracing.configure(exporter=tracing.InMemoryExporter(), sample_rate=0.0)
+
+    def test_unsampled_roots_record_nothing_including_children(self):
+        tracing.configure(sample_rate=0.0)
+        with tracing.span("root") as root:
+            tracing.configure(sample_rate=1.0)
+            with tracing.span("child") as child:
+                self.assertFalse(root.recording)
+                self.assertFalse(child.recording)
+        self.assertEqual(self.exporter.spans(), [])
+
+    def test_children_share_trace_and_export_with_root(self):
+        with tracing.span("root", tool="search"):
+            with tracing.span("child") as child:
+                child.set_attribute("cache.hit", True)
+        child_span, root_span = self.exporter.spans()
+        self.assertEqual(child_span["trace_id"], root_span["trace_id"])
+        self.assertEqual(child_span["parent_id"], root_span["span_id"])
+        self.assertEqual(child_span["attributes"], {"cache.hit": True})
+        self.assertIsNone(root_span["parent_id"])
+
+    def test_failed_span_is_marked_and_file_exporter_writes_json_lines(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "traces.jsonl"
+            exporter = tracing.FileExporter(path)
+            tracing.configure(exporter=exporter)
+            writers = []
+            open_file = Path.open
+
+            def recording_open(self, *args, **kwargs):
+                writers.append(threading.current_thread().name)
+                return open_file(self, *args, **kwargs)
+
+            with mock.patch.object(tracing.Path, "open", recording_open):
+                with self.assertRaises(ValueError):
+                    with tracing.span("boom"):
+                        raise ValueError("nope")
+                exporter.close()
+            line = path.read_text().strip()
+        self.assertEqual(writers, ["trace-writer"])
+        self.assertIn('"status": "error"', line)
+        self.assertIn('"error.type": "ValueError"', line)
+
+    async def test_search_spans_cover_service_provider_and_cache(self):
+        async def fake_upstream(tool_name, arguments):
+            return {"prices": [{"roomType": "KING", "totalAmount": 310, "currency": "USD"}]}
+
+        service = HotelWrapperService(provider=SigtripProvider())
+        with mock.patch.object(sigtrip, "call_upstream", fake_upstream):
+            await service.search_hotel_offers("denver", "2026-11-01", "2026-11-03", view="compact")
+        names = [span["name"] for span in self.exporter.spans()]
+        self.assertIn("sigtrip.get_prices", names)
+        self.assertIn("sigtrip.hotel", names)
+        self.assertIn("service.to_payload", names)
+        self.assertEqual(names[-1], "service.search_hotel_offers")
+        prices = next(span for span in self.exporter.spans() if span["name"] == "sigtrip.get_prices")
+        self.assertFalse(prices["attributes"]["cache.hit"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import datetime as dt
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from src import client
+from src.warmer import CacheWarmer, PopularSearches, WarmTarget, parse_targets
+
+
+class UpstreamBackedProvider:
+    """Makes two upstream calls per search, like a hotel with rooms + prices."""
+
+    def __init__(self):
+        self.searches = []
+
+    async def search_hotel_offers(self, location, check_in, check_out, guests, max_hotels, max_offers_per_hotel):
+        self.searches.append((location, check_in, check_out, guests))
+        await client.call_upstream("get_rooms", {"hotelName": location})
+        await client.call_upstream("get_prices", {"hotelName": location})
+
+
+async def _ok_post(url, payload, headers):
+    return httpx.Response(200, json={"result": {"structuredContent": {}}}, request=httpx.Request("POST", url))
+
+
+class PopularSearchesTests(unittest.TestCase):
+    def test_counts_by_relative_dates_and_decays(self):
+        today = dt.date(2026, 10, 19)
+        popular = PopularSearches()
+        for _ in range(3):
+            popular.record(" Denver", "2026-10-20", "2026-10-22", 2, today=today)
+        popular.record("london", "2026-10-26", "2026-10-27", 1, today=today)
+        popular.record("paris", "2026-10-01", "2026-10-02", 1, today=today)
+        self.assertEqual(popular.top(5), [WarmTarget("denver", 1, 2, 2), WarmTarget("london", 7, 1, 1)])
+        popular.decay()
+        popular.decay()
+        self.assertEqual(popular.top(5), [WarmTarget("denver", 1, 2, 2)])
+
+    def test_parses_configured_targets(self):
+        targets = parse_targets('["London", {"location": "Denver", "days_ahead": 3, "nights": 2, "guests": 2}]')
+        self.assertEqual(targets, [WarmTarget("london"), WarmTarget("denver", 3, 2, 2)])
+
+
+class CacheWarmerTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        client.ENDPOINT_HEALTH.clear()
+
+    async def test_warms_configured_then_popular_targets_within_the_call_budget(self):
+        popular = PopularSearches()
+        today = dt.date.today()
+        popular.record("london", (today + dt.timedelta(days=1)).isoformat(), (today + dt.timedelta(days=2)).isoformat(), 1)
+        provider = UpstreamBackedProvider()
+        warmer = CacheWarmer(
+            provider, targets=[WarmTarget("denver"), WarmTarget("new york")], popular=popular, interval_seconds=60, max_calls=5
+        )
+        self.assertEqual(warmer.plan(), [WarmTarget("denver"), WarmTarget("new york"), WarmTarget("london")])
+        calls = []
+
+        async def counting_post(url, payload, headers):
+            calls.append(payload["params"]["name"])
+            return await _ok_post(url, payload, headers)
+
+        with patch.object(client, "_post", counting_post):
+            stats = await warmer.run_once()
+        self.assertEqual(len(calls), 5)
+        self.assertEqual(stats["upstream_calls"], 5)
+        self.assertEqual(stats["result"], "budget_exhausted")
+        self.assertEqual([search[0] for search in provider.searches], ["denver", "new york", "london"])
+
+    async def test_pauses_while_the_upstream_circuit_is_open(self):
+        provider = UpstreamBackedProvider()
+        warmer = CacheWarmer(provider, targets=[WarmTarget("denver")], popular=PopularSearches(), interval_seconds=60)
+        with patch.object(client, "upstream_available", return_value=False):
+            stats = await warmer.run_once()
+        self.assertEqual(stats["result"], "paused")
+        self.assertEqual(provider.searches, [])
+
+    def test_jittered_delay_and_opt_in(self):
+        warmer = CacheWarmer(UpstreamBackedProvider(), targets=[], interval_seconds=100, jitter=0.2)
+        self.assertTrue(all(80 <= warmer.next_delay() <= 120 for _ in range(50)))
+        self.assertFalse(CacheWarmer(UpstreamBackedProvider(), targets=[], interval_seconds=0).enabled)
+
+
+if __name__ == "__main__":
+    unittest.main()